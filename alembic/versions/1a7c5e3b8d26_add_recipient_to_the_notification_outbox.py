@@ -0,0 +1,32 @@
+"""Add the recipient field to the notification_outbox table
+
+Revision ID: 1a7c5e3b8d26
+Revises: 6e1b3f9a2c54
+Create Date: 2026-10-17 20:15:38.046921
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '1a7c5e3b8d26'
+down_revision = '6e1b3f9a2c54'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the `recipient` column on the notification_outbox table. '''
+    op.add_column(
+        'notification_outbox',
+        sa.Column('recipient', sa.Text, nullable=True)
+    )
+    op.create_index(
+        'ix_notification_outbox_recipient',
+        'notification_outbox', ['recipient'])
+
+
+def downgrade():
+    ''' Drop the `recipient` column of the notification_outbox table. '''
+    op.drop_index(
+        'ix_notification_outbox_recipient', table_name='notification_outbox')
+    op.drop_column('notification_outbox', 'recipient')
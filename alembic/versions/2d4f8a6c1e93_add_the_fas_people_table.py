@@ -0,0 +1,33 @@
+"""Add the fas_people table
+
+Revision ID: 2d4f8a6c1e93
+Revises: 5a9e1c3d7b20
+Create Date: 2026-10-17 18:12:45.903112
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '2d4f8a6c1e93'
+down_revision = '5a9e1c3d7b20'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the fas_people table, mirroring the accounts of the Fedora
+    Account System.
+    '''
+    op.create_table(
+        'fas_people',
+        sa.Column('username', sa.String(255), primary_key=True),
+        sa.Column('bugzilla_email', sa.Text, nullable=True),
+        sa.Column('groups', sa.Text, nullable=False, server_default=''),
+        sa.Column('status', sa.String(50), nullable=False),
+        sa.Column('date_updated', sa.DateTime, nullable=False),
+    )
+
+
+def downgrade():
+    ''' Drop the fas_people table. '''
+    op.drop_table('fas_people')
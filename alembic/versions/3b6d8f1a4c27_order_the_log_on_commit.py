@@ -0,0 +1,47 @@
+"""Order the Log on the commit of the changes
+
+Revision ID: 3b6d8f1a4c27
+Revises: 4f2a9d7c3b18
+Create Date: 2026-10-18 10:12:45.118302
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3b6d8f1a4c27'
+down_revision = '4f2a9d7c3b18'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the `commit_seq` column on the Log table and the data_version
+    table, the entries logged so far are considered committed in the order
+    of their identifier.
+    '''
+    op.add_column(
+        'Log',
+        sa.Column('commit_seq', sa.Integer, nullable=True)
+    )
+    op.create_index('ix_Log_commit_seq', 'Log', ['commit_seq'])
+    op.execute('UPDATE "Log" SET commit_seq = id')
+
+    op.create_table(
+        'data_version',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('version', sa.Integer, nullable=False),
+        sa.Column('date_updated', sa.DateTime, nullable=False),
+    )
+    op.execute(
+        'INSERT INTO data_version (id, version, date_updated) '
+        'SELECT 1, COALESCE(MAX(id), 0), COALESCE(MAX(change_time), '
+        'CURRENT_TIMESTAMP) FROM "Log"')
+
+
+def downgrade():
+    ''' Drop the data_version table and the `commit_seq` column of the Log
+    table.
+    '''
+    op.drop_table('data_version')
+    op.drop_index('ix_Log_commit_seq', table_name='Log')
+    op.drop_column('Log', 'commit_seq')
@@ -0,0 +1,101 @@
+"""Add the effective_acls table
+
+Revision ID: 3c8e5f2b9d71
+Revises: 4b5cdf5d4a3e
+Create Date: 2026-10-17 14:02:11.204518
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3c8e5f2b9d71'
+down_revision = '4b5cdf5d4a3e'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the effective_acls table, denormalizing the approved ACLs of
+    each package listing, and fill it.
+    '''
+    op.create_table(
+        'effective_acls',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'packagelisting_id',
+            sa.Integer,
+            sa.ForeignKey(
+                'PackageListing.id', ondelete='CASCADE', onupdate='CASCADE'),
+            nullable=False,
+            index=True),
+        sa.Column(
+            'packagelistingacl_id',
+            sa.Integer,
+            sa.ForeignKey(
+                'PackageListingAcl.id',
+                ondelete='CASCADE', onupdate='CASCADE'),
+            nullable=True),
+        sa.Column('fas_name', sa.String(32), nullable=True),
+        sa.Column('acl', sa.String(50), nullable=True),
+        sa.Column('package_id', sa.Integer, nullable=False, index=True),
+        sa.Column('package_name', sa.Text, nullable=False),
+        sa.Column('package_namespace', sa.String(50), nullable=False),
+        sa.Column('package_summary', sa.Text, nullable=False),
+        sa.Column('package_status', sa.String(50), nullable=False),
+        sa.Column('collection_id', sa.Integer, nullable=False, index=True),
+        sa.Column('collection_name', sa.Text, nullable=False),
+        sa.Column('collection_version', sa.Text, nullable=False),
+        sa.Column('collection_branchname', sa.String(32), nullable=False),
+        sa.Column('collection_status', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(50), nullable=False),
+        sa.Column('point_of_contact', sa.Text, nullable=False),
+    )
+    op.create_index(
+        'ix_effective_acls_acl_collection_status_package_name',
+        'effective_acls', ['acl', 'collection_status', 'package_name'])
+
+    op.execute('''
+INSERT INTO effective_acls (
+    packagelisting_id, packagelistingacl_id, fas_name, acl,
+    package_id, package_name, package_namespace, package_summary,
+    package_status, collection_id, collection_name, collection_version,
+    collection_branchname, collection_status, status, point_of_contact)
+SELECT "PackageListing".id, NULL, NULL, NULL,
+    "Package".id, "Package".name, "Package".namespace, "Package".summary,
+    "Package".status, "Collection".id, "Collection".name,
+    "Collection".version, "Collection".branchname, "Collection".status,
+    "PackageListing".status, "PackageListing".point_of_contact
+FROM "PackageListing"
+JOIN "Package" ON "PackageListing".package_id = "Package".id
+JOIN "Collection" ON "PackageListing".collection_id = "Collection".id;
+''')
+
+    op.execute('''
+INSERT INTO effective_acls (
+    packagelisting_id, packagelistingacl_id, fas_name, acl,
+    package_id, package_name, package_namespace, package_summary,
+    package_status, collection_id, collection_name, collection_version,
+    collection_branchname, collection_status, status, point_of_contact)
+SELECT "PackageListing".id, "PackageListingAcl".id,
+    "PackageListingAcl".fas_name, "PackageListingAcl".acl,
+    "Package".id, "Package".name, "Package".namespace, "Package".summary,
+    "Package".status, "Collection".id, "Collection".name,
+    "Collection".version, "Collection".branchname, "Collection".status,
+    "PackageListing".status, "PackageListing".point_of_contact
+FROM "PackageListingAcl"
+JOIN "PackageListing"
+    ON "PackageListingAcl".packagelisting_id = "PackageListing".id
+JOIN "Package" ON "PackageListing".package_id = "Package".id
+JOIN "Collection" ON "PackageListing".collection_id = "Collection".id
+WHERE "PackageListingAcl".status = 'Approved'
+ORDER BY "PackageListingAcl".id;
+''')
+
+
+def downgrade():
+    ''' Drop the effective_acls table.
+    '''
+    op.drop_index(
+        'ix_effective_acls_acl_collection_status_package_name',
+        table_name='effective_acls')
+    op.drop_table('effective_acls')
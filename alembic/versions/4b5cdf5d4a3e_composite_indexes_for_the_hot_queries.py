@@ -0,0 +1,52 @@
+"""Composite indexes for the hot queries
+
+Revision ID: 4b5cdf5d4a3e
+Revises: 27924040e3ad
+Create Date: 2026-10-17 10:12:43.518230
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4b5cdf5d4a3e'
+down_revision = '27924040e3ad'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# name, table, columns
+INDEXES = [
+    ('ix_packagelisting_collection_id_status', 'PackageListing',
+     ['collection_id', 'status']),
+    ('ix_packagelisting_package_id_collection_id_status', 'PackageListing',
+     ['package_id', 'collection_id', 'status']),
+    ('ix_packagelistingacl_packagelisting_id_acl_status',
+     'PackageListingAcl', ['packagelisting_id', 'acl', 'status']),
+    ('ix_packagelistingacl_fas_name_acl_status', 'PackageListingAcl',
+     ['fas_name', 'acl', 'status']),
+    ('ix_log_package_id_change_time', 'Log',
+     ['package_id', 'change_time']),
+    ('ix_admin_actions_status_date_created', 'admin_actions',
+     ['status', 'date_created']),
+]
+
+
+def upgrade():
+    ''' Add the composite indexes used by the queries filtering on several
+    columns at once as well as the functional index on lower(Package.name)
+    used by the case insensitive searches.
+    '''
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+    op.execute(
+        'CREATE INDEX "ix_package_lower_name" ON "Package" (lower(name));')
+
+
+def downgrade():
+    ''' Drop the composite and functional indexes.
+    '''
+    op.execute('DROP INDEX IF EXISTS "ix_package_lower_name";')
+
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,43 @@
+"""Add the bugzilla_jobs table
+
+Revision ID: 4f2a9d7c3b18
+Revises: 1a7c5e3b8d26
+Create Date: 2026-10-17 21:32:09.771284
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4f2a9d7c3b18'
+down_revision = '1a7c5e3b8d26'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the bugzilla_jobs table, holding the reassignments of bugs to
+    run in bugzilla.
+    '''
+    op.create_table(
+        'bugzilla_jobs',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('package_name', sa.Text, nullable=False),
+        sa.Column('collection_name', sa.Text, nullable=False),
+        sa.Column('collection_version', sa.Text, nullable=False),
+        sa.Column('username', sa.Text, nullable=False),
+        sa.Column('prev_poc', sa.Text, nullable=True),
+        sa.Column('status', sa.String(50), nullable=False),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('next_attempt', sa.DateTime, nullable=True, index=True),
+        sa.Column('last_error', sa.Text, nullable=True),
+        sa.Column('date_created', sa.DateTime, nullable=False),
+        sa.Column('date_updated', sa.DateTime, nullable=False),
+        sa.Column('revision', sa.Integer, nullable=False),
+        sa.UniqueConstraint(
+            'package_name', 'collection_name', 'collection_version'),
+    )
+
+
+def downgrade():
+    ''' Drop the bugzilla_jobs table. '''
+    op.drop_table('bugzilla_jobs')
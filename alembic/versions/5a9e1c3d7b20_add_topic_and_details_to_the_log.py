@@ -0,0 +1,32 @@
+"""add the topic and details fields in the Log table
+
+Revision ID: 5a9e1c3d7b20
+Revises: 3c8e5f2b9d71
+Create Date: 2026-10-17 16:41:07.387215
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5a9e1c3d7b20'
+down_revision = '3c8e5f2b9d71'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the `topic` and `details` columns on the Log table. '''
+    op.add_column(
+        'Log',
+        sa.Column('topic', sa.String(50), nullable=True)
+    )
+    op.add_column(
+        'Log',
+        sa.Column('details', sa.Text, nullable=True)
+    )
+
+
+def downgrade():
+    ''' Drop the `topic` and `details` columns of the Log table. '''
+    op.drop_column('Log', 'details')
+    op.drop_column('Log', 'topic')
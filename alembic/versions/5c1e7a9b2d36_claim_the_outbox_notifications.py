@@ -0,0 +1,27 @@
+"""Claim the outbox notifications
+
+Revision ID: 5c1e7a9b2d36
+Revises: 3b6d8f1a4c27
+Create Date: 2026-10-18 15:41:07.502114
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9b2d36'
+down_revision = '3b6d8f1a4c27'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the `claimed_until` column on the notification_outbox table. '''
+    op.add_column(
+        'notification_outbox',
+        sa.Column('claimed_until', sa.DateTime, nullable=True)
+    )
+
+
+def downgrade():
+    ''' Drop the `claimed_until` column of the notification_outbox table. '''
+    op.drop_column('notification_outbox', 'claimed_until')
@@ -0,0 +1,36 @@
+"""Add the notification_outbox table
+
+Revision ID: 6e1b3f9a2c54
+Revises: 2d4f8a6c1e93
+Create Date: 2026-10-17 19:03:21.518470
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '6e1b3f9a2c54'
+down_revision = '2d4f8a6c1e93'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ''' Add the notification_outbox table, holding the notifications
+    waiting to be sent.
+    '''
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('kind', sa.String(10), nullable=False),
+        sa.Column('topic', sa.String(100), nullable=True),
+        sa.Column('payload', sa.Text, nullable=False),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('next_attempt', sa.DateTime, nullable=True, index=True),
+        sa.Column('last_error', sa.Text, nullable=True),
+        sa.Column('date_created', sa.DateTime, nullable=False),
+    )
+
+
+def downgrade():
+    ''' Drop the notification_outbox table. '''
+    op.drop_table('notification_outbox')
@@ -23,6 +23,7 @@
 Top level of the pkgdb Flask application.
 '''
 
+import hashlib
 import logging
 import logging.handlers
 import os
@@ -62,6 +63,38 @@ CACHE = dogpile.cache.make_region().configure(
     **APP.config.get('PKGDB2_CACHE_KWARGS', {})
 )
 
+
+def cache_on_data_version(function):
+    """ Decorator caching the output of a function taking the session to
+    connect to the database as first argument, until the data in the
+    database changes.
+
+    The version of the data (see ``pkgdb2.lib.get_data_version``) is part
+    of the key under which the output is cached, thus every change made
+    through pkgdb2 makes the outputs cached so far obsolete.
+    Nothing is cached while the session holds changes not yet committed.
+
+    The outputs may be shared between callers, they must not be modified.
+    """
+    namespace = '%s:%s' % (function.__module__, function.__name__)
+
+    @wraps(function)
+    def decorated_function(session, *args, **kwargs):
+        ''' Return the cached output of the function. '''
+        if session.info.get('pkgdb2_written'):
+            return function(session, *args, **kwargs)
+
+        key = '%s|%s|%s' % (
+            namespace,
+            pkgdblib.get_data_version(session),
+            hashlib.sha1(repr((args, sorted(kwargs.items())))).hexdigest()
+        )
+        return CACHE.get_or_create(
+            key, lambda: function(session, *args, **kwargs))
+
+    return decorated_function
+
+
 if not APP.debug:
     APP.logger.addHandler(pkgdb2.mail_logging.get_mail_handler(
         smtp_server=APP.config.get('SMTP_SERVER', '127.0.0.1'),
@@ -246,10 +279,18 @@ if APP.config.get('PKGDB_OLD_URL', True):
 APP.register_blueprint(UI)
 
 
+@APP.before_first_request
+def load_status():
+    """ Load the statuses and namespaces kept in memory (see
+    ``pkgdb2.lib.get_status``) before serving the first request. """
+    pkgdblib.get_status(SESSION)
+
+
 # pylint: disable=W0613
 @APP.teardown_request
 def shutdown_session(exception=None):
     """ Remove the DB session at the end of each request. """
+    pkgdblib.clear_lookups(SESSION)
     SESSION.remove()
 
 
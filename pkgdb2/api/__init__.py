@@ -25,9 +25,13 @@ API namespace for the Flask application.
 
 import flask
 
+from functools import wraps
+
 
 API = flask.Blueprint('api_ns', __name__, url_prefix='/api')
 
+import pkgdb2
+import pkgdb2.lib as pkgdblib
 from pkgdb2 import __version__, __api_version__, APP
 from pkgdb2.doc_utils import load_doc
 
@@ -46,6 +50,57 @@ def get_limit():
     return limit
 
 
+def conditional_get(function):
+    """ Flask decorator answering the GET requests with a
+    ``304 Not Modified`` when the client already has the current version of
+    the data, before running the queries of the endpoint.
+
+    The responses get a weak ETag built from the version of the data (see
+    ``pkgdb2.lib.get_data_version``), unless they already have one, and a
+    Last-Modified header set to the time of the last change made to the
+    data. These are checked against the ``If-None-Match`` and
+    ``If-Modified-Since`` headers of the following requests.
+    """
+    @wraps(function)
+    def decorated_function(*args, **kwargs):
+        """ Do the actual work of the decorator. """
+        if flask.request.method not in ('GET', 'HEAD'):
+            return function(*args, **kwargs)
+
+        version, last_modified = pkgdblib.get_last_change(pkgdb2.SESSION)
+        etag = 'pkgdb-%s' % version
+
+        request = flask.request
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = last_modified is not None \
+                and request.if_modified_since is not None \
+                and last_modified.replace(microsecond=0) \
+                <= request.if_modified_since
+
+        if not_modified:
+            response = flask.Response(status=304)
+            response.set_etag(etag, weak=True)
+        else:
+            response = flask.make_response(function(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if 'ETag' not in response.headers:
+                response.set_etag(etag, weak=True)
+
+        if last_modified:
+            response.last_modified = last_modified
+        response.vary.add('Accept')
+        if not not_modified and not response.headers['ETag'].startswith('W/'):
+            # The response has its own ETag (the snapshots of the exports)
+            # which the client may send back
+            response.make_conditional(request)
+        return response
+
+    return decorated_function
+
+
 from pkgdb2.api import admin
 from pkgdb2.api import acls
 from pkgdb2.api import collections
@@ -108,6 +163,7 @@ def api():
     api_package_request = load_doc(packages.api_package_request)
 
     api_acl_update = load_doc(acls.api_acl_update)
+    api_acl_bulk_update = load_doc(acls.api_acl_bulk_update)
     api_acl_reassign = load_doc(acls.api_acl_reassign)
 
     api_admin_actions = load_doc(admin.api_admin_actions)
@@ -126,6 +182,7 @@ def api():
     api_extras_koschei = load_doc(extras.api_koschei)
     api_extras_retired = load_doc(extras.api_retired)
     api_extras_pkgrequest = load_doc(extras.api_pkgrequest)
+    api_extras_changes = load_doc(extras.api_changes)
 
     return flask.render_template(
         'api.html',
@@ -147,7 +204,7 @@ def api():
             api_package_request,
         ],
         acls=[
-            api_acl_update, api_acl_reassign,
+            api_acl_update, api_acl_bulk_update, api_acl_reassign,
         ],
         other=[
             api_version_doc,
@@ -161,7 +218,7 @@ def api():
             api_extras_vcs, api_extras_pendingacls,
             api_extras_api_groups, api_extras_monitored,
             api_extras_koschei, api_extras_retired,
-            api_extras_pkgrequest,
+            api_extras_pkgrequest, api_extras_changes,
         ]
     )
 
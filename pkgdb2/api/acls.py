@@ -27,8 +27,12 @@ API for ACL management.
 '''
 
 import itertools
+import json
+
 import flask
 
+from sqlalchemy.exc import SQLAlchemyError
+
 import pkgdb2
 import pkgdb2.forms as forms
 import pkgdb2.lib as pkgdblib
@@ -91,9 +95,7 @@ def api_acl_update():
 
     status = pkgdblib.get_status(
         SESSION, ['pkg_acl', 'acl_status', 'namespaces'])
-    collections = pkgdblib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.extend(pkgdblib.search_collection(SESSION, '*', 'Active'))
+    collections = pkgdblib.get_collection_registry(SESSION).active()
 
     form = forms.SetAclPackageForm(
         csrf_enabled=False,
@@ -164,6 +166,152 @@ def api_acl_update():
     return jsonout
 
 
+@API.route('/package/acl/bulk/', methods=['POST'])
+@pkgdb2.packager_login_required
+def api_acl_bulk_update():
+    '''
+    Update ACLs in bulk
+    -------------------
+    Update several ACLs, of one or more packages, at once.
+
+    ::
+
+        /api/package/acl/bulk/
+
+    Accepts POST queries only.
+
+    :arg changes: JSON list of the ACLs to change/update, either sent as
+        the body of the request (``{"changes": [...]}``) or as a form
+        field. Each change is a dictionnary with the keys: ``namespace``
+        (defaults to ``rpms``), ``pkgname``, ``branch``, ``user``, ``acl``
+        and ``acl_status``, or a list of these six values in this order.
+        The possible acl and status are the same as for
+        ``/api/package/acl/``.
+
+    All the changes are applied in one transaction, the changes which
+    could not be applied, including the ones on a branch which is not
+    active or in an unknown namespace, are reported in the results without
+    preventing the others.
+
+    Sample response:
+
+    ::
+
+        {
+          "output": "ok",
+          "results": [
+            {
+              "output": "ok",
+              "message": "user: $USER set for $USER acl: $ACL of package: "
+                         "$PACKAGE from: $PREVIOUS_STATUS to: $NEW_STATUS "
+                         "on branch: $BRANCH"
+            },
+            {
+              "output": "notok",
+              "error": "No package found by this name"
+            }
+          ]
+        }
+
+        {
+          "output": "notok",
+          "error": "Invalid input submitted"
+        }
+
+    '''
+    httpcode = 200
+    output = {}
+
+    data = flask.request.get_json(silent=True) or {}
+    changes = data.get('changes')
+    if changes is None and 'changes' in flask.request.form:
+        try:
+            changes = json.loads(flask.request.form['changes'])
+        except ValueError:
+            changes = None
+
+    keys = ('namespace', 'pkgname', 'branch', 'user', 'acl', 'acl_status')
+    try:
+        changes = [
+            change if isinstance(change, list) else [
+                change.get(key, 'rpms' if key == 'namespace' else None)
+                for key in keys
+            ]
+            for change in changes
+        ]
+    except (AttributeError, TypeError):
+        changes = None
+
+    if not changes or any(
+            len(change) != len(keys)
+            or not all(isinstance(val, basestring) for val in change)
+            for change in changes):
+        output['output'] = 'notok'
+        output['error'] = 'Invalid input submitted'
+        httpcode = 500
+
+    else:
+        namespaces = pkgdblib.get_status(
+            SESSION, 'namespaces')['namespaces']
+        branches = set(
+            col.branchname
+            for col in pkgdblib.get_collection_registry(SESSION).active())
+
+        # The checks of the SetAclPackageForm used by /package/acl/
+        invalid = {}
+        for idx, change in enumerate(changes):
+            if change[5] == 'Awaiting Review' \
+                    and change[4] in APP.config['AUTO_APPROVE']:
+                change[5] = 'Approved'
+
+            if change[0] not in namespaces:
+                invalid[idx] = pkgdblib.PkgdbException(
+                    'Invalid namespace: %s' % change[0])
+            elif change[2] not in branches:
+                invalid[idx] = pkgdblib.PkgdbException(
+                    'Invalid branch: %s' % change[2])
+
+        try:
+            results = iter(pkgdblib.set_acl_packages(
+                SESSION,
+                [change for idx, change in enumerate(changes)
+                 if idx not in invalid],
+                user=flask.g.fas_user))
+            results = [
+                invalid[idx] if idx in invalid else next(results)
+                for idx in range(len(changes))
+            ]
+            SESSION.commit()
+        except SQLAlchemyError, err:
+            SESSION.rollback()
+            APP.logger.exception(err)
+            output['output'] = 'notok'
+            output['error'] = 'Could not save the ACLs to the database'
+            httpcode = 500
+        else:
+            output['results'] = []
+            for (change, result) in zip(changes, results):
+                if isinstance(result, pkgdblib.PkgdbException):
+                    output['results'].append(
+                        {'output': 'notok', 'error': str(result)})
+                else:
+                    output['results'].append({
+                        'output': 'ok',
+                        'message': result or
+                        'Nothing to update on branch: %s for acl: %s' % (
+                            change[2], change[4]),
+                    })
+
+            output['output'] = 'ok'
+            if all(res['output'] == 'notok' for res in output['results']):
+                output['output'] = 'notok'
+                httpcode = 500
+
+    jsonout = flask.jsonify(output)
+    jsonout.status_code = httpcode
+    return jsonout
+
+
 @API.route('/package/acl/reassign/', methods=['POST'])
 @pkgdb2.packager_login_required
 def api_acl_reassign():
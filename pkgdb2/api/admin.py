@@ -57,6 +57,10 @@ List admin actions
     :kwarg limit: An integer to limit the number of results, defaults to
         250, maximum is 500.
     :kwarg page: The page number to return (useful in combination to limit).
+    :kwarg cursor: The ``next_cursor`` returned with the previous page of
+        results. Provide it empty to retrieve the first page, the results
+        are then returned with a ``next_cursor`` instead of ``page`` and
+        ``page_total``. ``next_cursor`` is null on the last page.
 
     Sample response:
 
@@ -120,6 +124,7 @@ List admin actions
     action = flask.request.args.get('action', None)
     status = flask.request.args.get('status', None)
     page = flask.request.args.get('page', 1)
+    cursor = flask.request.args.get('cursor', None)
     limit = get_limit()
 
     httpcode = 200
@@ -140,38 +145,45 @@ List admin actions
             action=action,
             status=status,
             limit=limit,
-            page=page
+            page=page,
+            cursor=cursor,
         )
 
-        cnt_actions += pkgdblib.search_actions(
-            SESSION,
-            package=package or None,
-            packager=packager or None,
-            action=action,
-            status=status,
-            count=True,
-        )
-    except pkgdblib.PkgdbException, err:  # pragma: no cover
+        if cursor is None:
+            cnt_actions += pkgdblib.search_actions(
+                SESSION,
+                package=package or None,
+                packager=packager or None,
+                action=action,
+                status=status,
+                count=True,
+            )
+    except pkgdblib.PkgdbException, err:
         SESSION.rollback()
         output['output'] = 'notok'
         output['error'] = str(err)
         httpcode = 500
 
-    if not actions:
+    if not actions and httpcode == 200:
         output['output'] = 'notok'
         output['actions'] = []
         output['error'] = 'No actions found for these parameters'
         httpcode = 404
-    else:
+    elif actions:
         output['actions'] = [
             act.to_json()
             for act in actions
         ]
         output['output'] = 'ok'
-        output['page'] = int(page)
-        output['page_total'] = int(ceil(cnt_actions / float(limit)))
+        if cursor is not None:
+            output['next_cursor'] = None
+            if len(actions) == limit:
+                output['next_cursor'] = actions[-1].cursor
+        else:
+            output['page'] = int(page)
+            output['page_total'] = int(ceil(cnt_actions / float(limit)))
 
-    if 'page_total' not in output:
+    if 'page_total' not in output and 'next_cursor' not in output:
         output['page'] = 1
         output['page_total'] = 1
 
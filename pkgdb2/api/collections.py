@@ -30,7 +30,7 @@ import flask
 
 import pkgdb2.lib as pkgdblib
 from pkgdb2 import SESSION, forms, is_admin
-from pkgdb2.api import API
+from pkgdb2.api import API, conditional_get
 from pkgdb2.lib import model
 
 
@@ -225,6 +225,7 @@ def api_collection_status(collection):
 @API.route('/collections')
 @API.route('/collections/<pattern>/')
 @API.route('/collections/<pattern>')
+@conditional_get
 def api_collection_list(pattern=None):
     '''
     List collections
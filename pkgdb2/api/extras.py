@@ -23,13 +23,26 @@
 Extras API endpoints for the Flask application.
 '''
 
+import cPickle
+import gzip
+import hashlib
+import itertools
+import os
+import tempfile
+
+from cStringIO import StringIO
+
 import flask
 import requests
 
+from dogpile.cache.api import NO_VALUE
+from werkzeug.wsgi import wrap_file
+
+import pkgdb2
 import pkgdb2.lib as pkgdblib
 import pkgdb2.lib.utils
 from pkgdb2 import SESSION, APP
-from pkgdb2.api import API
+from pkgdb2.api import API, conditional_get, get_limit
 
 
 def request_wants_json():
@@ -41,6 +54,293 @@ def request_wants_json():
         flask.request.accept_mimetypes['text/html']
 
 
+def _load_snapshot(key):
+    ''' Return the snapshot stored under the specified key or None if there
+    are none.
+
+    The snapshots are stored in the ``PKGDB2_SNAPSHOT_DIR`` folder if it is
+    set in the configuration, in the cache otherwise.
+
+    '''
+    folder = APP.config.get('PKGDB2_SNAPSHOT_DIR')
+    if not folder:
+        snapshot = pkgdb2.CACHE.get(key)
+        if snapshot is NO_VALUE:
+            snapshot = None
+        return snapshot
+
+    filename = os.path.join(folder, key)
+    try:
+        with open(filename, 'rb') as stream:
+            return cPickle.load(stream)
+    except (IOError, EOFError, cPickle.UnpicklingError):
+        return None
+
+
+class _SnapshotWriter(object):
+    ''' Write the content of a snapshot as it is generated and store it
+    once complete, see ``_load_snapshot``.
+
+    When the snapshots are stored on disk, the content, as is and gzip
+    compressed, is written to temporary files which are renamed into
+    ``<key>-<etag>`` and ``<key>-<etag>.gz`` when the snapshot is stored,
+    the file ``<key>`` then only contains its version, content type and
+    ETag. Otherwise the content is kept in memory and stored in the cache
+    with the rest of the snapshot.
+
+    '''
+
+    def __init__(self, key, version, content_type):
+        ''' Constructor.
+
+        :arg key: the key under which the snapshot is stored.
+        :arg version: the version of the data the snapshot is made from.
+        :arg content_type: the content type of the snapshot.
+
+        '''
+        self.key = key
+        self.folder = APP.config.get('PKGDB2_SNAPSHOT_DIR')
+        self.snapshot = {
+            'version': version,
+            'content_type': content_type,
+        }
+        self.sha1 = hashlib.sha1()
+        self.plain = self.compressed = self.gzip = None
+
+    def _open(self):
+        ''' Open the files, or buffers, the content is written to. This is
+        only done once there is content to write so a response which is
+        never sent leaves nothing behind.
+        '''
+        if self.folder:
+            if not os.path.exists(self.folder):
+                os.makedirs(self.folder)
+            self.plain = tempfile.NamedTemporaryFile(
+                dir=self.folder, delete=False)
+            self.compressed = tempfile.NamedTemporaryFile(
+                dir=self.folder, delete=False)
+        else:
+            self.plain = StringIO()
+            self.compressed = StringIO()
+        self.gzip = gzip.GzipFile(
+            filename='', fileobj=self.compressed, mode='wb', mtime=0)
+
+    def write(self, chunk):
+        ''' Add the provided chunk to the content of the snapshot. '''
+        if isinstance(chunk, unicode):
+            chunk = chunk.encode('utf-8')
+        if self.gzip is None:
+            self._open()
+        self.sha1.update(chunk)
+        self.plain.write(chunk)
+        self.gzip.write(chunk)
+
+    def close(self):
+        ''' Store the snapshot and return it. '''
+        if self.gzip is None:
+            self._open()
+        self.gzip.close()
+        self.snapshot['etag'] = self.sha1.hexdigest()
+
+        if not self.folder:
+            self.snapshot['plain'] = self.plain.getvalue()
+            self.snapshot['gzip'] = self.compressed.getvalue()
+            pkgdb2.CACHE.set(self.key, self.snapshot)
+            return self.snapshot
+
+        self.plain.close()
+        self.compressed.close()
+        filename = os.path.join(
+            self.folder, '%s-%s' % (self.key, self.snapshot['etag']))
+        os.rename(self.plain.name, filename)
+        os.rename(self.compressed.name, filename + '.gz')
+
+        # Write to a temporary file first so the snapshot is replaced
+        # atomically
+        previous = _load_snapshot(self.key)
+        fd, tmpfile = tempfile.mkstemp(dir=self.folder)
+        with os.fdopen(fd, 'wb') as stream:
+            cPickle.dump(self.snapshot, stream, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmpfile, os.path.join(self.folder, self.key))
+
+        if previous and previous.get('etag') != self.snapshot['etag']:
+            for ext in ('', '.gz'):
+                try:
+                    os.unlink(os.path.join(self.folder, '%s-%s%s' % (
+                        self.key, previous['etag'], ext)))
+                except OSError:
+                    pass
+        return self.snapshot
+
+    def abort(self):
+        ''' Drop the content written so far, nothing is stored. '''
+        if self.gzip is None:
+            return
+        self.gzip.close()
+        self.plain.close()
+        self.compressed.close()
+        if self.folder:
+            for stream in (self.plain, self.compressed):
+                try:
+                    os.unlink(stream.name)
+                except OSError:
+                    pass
+
+
+def _stream_snapshot(writer, chunks, size=32768):
+    ''' Generator yielding the content of an export to the client while
+    writing it to its snapshot, the snapshot is only stored once the whole
+    content has been generated.
+
+    :arg writer: the ``_SnapshotWriter`` of the snapshot.
+    :arg chunks: an iterator over the content of the export.
+    :kwarg size: the chunks smaller than this size are grouped together
+        before being sent.
+
+    '''
+    complete = False
+    try:
+        buf = []
+        buf_size = 0
+        for chunk in chunks:
+            if isinstance(chunk, unicode):
+                chunk = chunk.encode('utf-8')
+            buf.append(chunk)
+            buf_size += len(chunk)
+            if buf_size >= size:
+                chunk = ''.join(buf)
+                buf = []
+                buf_size = 0
+                writer.write(chunk)
+                yield chunk
+        if buf:
+            chunk = ''.join(buf)
+            writer.write(chunk)
+            yield chunk
+        complete = True
+    finally:
+        if complete:
+            writer.close()
+        else:
+            writer.abort()
+
+
+def _export_response(name, generate, *args):
+    ''' Return the response serving the output of an export for the
+    specified arguments.
+
+    The output is served from a snapshot if the data did not change since
+    it was made. Otherwise the export is generated and stored as the new
+    snapshot of the export. Exports generated as an iterator are streamed
+    to the client as they are generated, without ETag, the following
+    requests are served from their snapshot.
+
+    A snapshot is a dict containing the version of the data it was made
+    from, its content type, its ETag and its content, both as is and
+    gzip compressed.
+
+    :arg name: the name of the export.
+    :arg generate: a function returning the content of the export as a
+        tuple ``(content, content_type)``, the content being either a
+        string or an iterator over the chunks of the content.
+    :arg args: the arguments of the export, each combination of arguments
+        has its own snapshot.
+
+    '''
+    version = pkgdblib.get_data_version(SESSION)
+    key = 'snapshot-%s-%s' % (
+        name, hashlib.sha1(repr(args)).hexdigest())
+
+    snapshot = _load_snapshot(key)
+    if snapshot is not None and snapshot['version'] == version:
+        response = _snapshot_response(key, snapshot)
+        if response is not None:
+            return response
+
+    content, content_type = generate()
+    writer = _SnapshotWriter(key, version, content_type)
+    if not isinstance(content, basestring):
+        return flask.Response(
+            flask.stream_with_context(_stream_snapshot(writer, content)),
+            content_type=content_type)
+
+    writer.write(content)
+    response = _snapshot_response(key, writer.close())
+    if response is None:  # pragma: no cover
+        response = flask.Response(content, content_type=content_type)
+    return response
+
+
+def _snapshot_response(key, snapshot):
+    ''' Return the response serving the provided snapshot, compressed if
+    the client accepts it, or None if its content could not be found.
+
+    '''
+    compressed = 'gzip' in flask.request.accept_encodings
+    callback = flask.request.args.get('callback', None)
+    if callback and snapshot['content_type'] == 'application/json':
+        compressed = False
+
+    folder = APP.config.get('PKGDB2_SNAPSHOT_DIR')
+    if not folder:
+        content = snapshot['gzip' if compressed else 'plain']
+    else:
+        filename = os.path.join(
+            folder, '%s-%s' % (key, snapshot['etag']))
+        if compressed:
+            filename += '.gz'
+        try:
+            stream = open(filename, 'rb')
+        except IOError:
+            return None
+
+    if callback and snapshot['content_type'] == 'application/json':
+        # JSONP, the content needs to be wrapped
+        if folder:
+            with stream:
+                content = stream.read()
+        return flask.Response(
+            '%s(%s);' % (callback, content),
+            content_type='application/javascript')
+
+    if folder:
+        response = flask.Response(
+            wrap_file(flask.request.environ, stream),
+            content_type=snapshot['content_type'],
+            direct_passthrough=True)
+        response.content_length = os.fstat(stream.fileno()).st_size
+    else:
+        response = flask.Response(
+            content, content_type=snapshot['content_type'])
+
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag('%s-gzip' % snapshot['etag'])
+    else:
+        response.set_etag(snapshot['etag'])
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _render(output, out_format, intro=''):
+    ''' Return the content and content type of the output of an export
+    in the specified format.
+
+    :arg output: the output of the export, a dict for the JSON format and
+        an iterable over the lines for the text format.
+    :arg out_format: the format of the export, ``json`` or ``text``.
+    :kwarg intro: the header of the text format.
+
+    The text format is returned as an iterator so it can be streamed.
+
+    '''
+    if out_format == 'json':
+        return (flask.json.dumps(output, indent=2), 'application/json')
+    else:
+        return (
+            itertools.chain([intro], output), 'text/plain;charset=UTF-8')
+
+
 #@pkgdb.CACHE.cache_on_arguments(expiration_time=3600)
 def _bz_acls_cached(name=None, out_format='text'):
     '''Return the package attributes used by bugzilla.
@@ -62,51 +362,64 @@ def _bz_acls_cached(name=None, out_format='text'):
             is listed here
         :summary: Short description of the package
         :cclist: list of FAS userids that are watching the package
+
+    The text output is returned as an iterator over its lines, see
+    ``_bz_acls_text``.
     '''
+    if out_format != 'json':
+        return _bz_acls_text(name)
 
     packages = pkgdblib.bugzilla(
         session=SESSION,
         name=name)
 
-    output = []
-    if out_format == 'json':
-        output = {'bugzillaAcls': {},
-                  'title': 'Fedora Package Database -- Bugzilla ACLs'}
+    output = {'bugzillaAcls': {},
+              'title': 'Fedora Package Database -- Bugzilla ACLs'}
 
     for clt in sorted(packages):
         for pkg in sorted(packages[clt]):
-            if out_format == 'json':
-                user = []
-                group = []
-                for ppl in packages[clt][pkg]['cc'].split(','):
-                    if ppl.startswith('group::'):
-                        group.append(ppl.replace('group::', '@').encode('UTF-8'))
-                    elif ppl:
-                        user.append(ppl.encode('UTF-8'))
-                poc = packages[clt][pkg]['poc']
-                if poc.startswith('group::'):
-                    poc = poc.replace('group::', '@')
-
-                if clt not in output['bugzillaAcls']:
-                    output['bugzillaAcls'][clt.encode('UTF-8')] = {}
-
-                output['bugzillaAcls'][clt][pkg.encode('UTF-8')] = {
-                    'owner': poc.encode('UTF-8'),
-                    'cclist': {
-                        'groups': group,
-                        'people': user,
-                    },
-                    'qacontact': None,
-                    'summary': packages[clt][pkg]['summary'].encode('UTF-8')
-                }
-            else:
-                output.append(
-                    '%(collection)s|%(name)s|%(summary)s|%(poc)s|%(qa)s'
-                    '|%(cc)s' % (packages[clt][pkg])
-                )
+            user = []
+            group = []
+            for ppl in packages[clt][pkg]['cc'].split(','):
+                if ppl.startswith('group::'):
+                    group.append(
+                        ppl.replace('group::', '@').encode('UTF-8'))
+                elif ppl:
+                    user.append(ppl.encode('UTF-8'))
+            poc = packages[clt][pkg]['poc']
+            if poc.startswith('group::'):
+                poc = poc.replace('group::', '@')
+
+            if clt not in output['bugzillaAcls']:
+                output['bugzillaAcls'][clt.encode('UTF-8')] = {}
+
+            output['bugzillaAcls'][clt][pkg.encode('UTF-8')] = {
+                'owner': poc.encode('UTF-8'),
+                'cclist': {
+                    'groups': group,
+                    'people': user,
+                },
+                'qacontact': None,
+                'summary': packages[clt][pkg]['summary'].encode('UTF-8')
+            }
     return output
 
 
+def _bz_acls_text(name=None):
+    ''' Generator yielding the lines of the text output of
+    ``_bz_acls_cached`` as the packages are retrieved from the database.
+
+    :kwarg name: Name of the bugzilla collection to gather data on.
+
+    '''
+    sep = ''
+    for pkg in pkgdblib.iter_bugzilla(session=SESSION, name=name):
+        yield sep + (
+            '%(collection)s|%(name)s|%(summary)s|%(poc)s|%(qa)s'
+            '|%(cc)s' % pkg)
+        sep = '\n'
+
+
 #@pkgdb.CACHE.cache_on_arguments(expiration_time=3600)
 def _bz_notify_cache(
         name=None, version=None, eol=False, out_format='text', acls=None):
@@ -121,25 +434,34 @@ def _bz_notify_cache(
     :kwarg eol: Set to True if you want to include end of life
         distributions
     :kwarg out_format: Specify if the output if text or json.
+
+    The text output is returned as an iterator over its lines, generated
+    as the users are retrieved from the database.
     '''
+    if out_format != 'json':
+        return (
+            '%s|%s\n' % (package, users)
+            for package, users in pkgdblib.iter_notify(
+                session=SESSION,
+                eol=eol,
+                name=name,
+                version=version,
+                acls=acls)
+        )
+
     packages = pkgdblib.notify(
         session=SESSION,
         eol=eol,
         name=name,
         version=version,
         acls=acls)
-    output = []
-    if out_format == 'json':
-        output = {'packages': {},
-                  'eol': eol,
-                  'name': name,
-                  'version': version,
-                  'title': 'Fedora Package Database -- Notification List'}
+    output = {'packages': {},
+              'eol': eol,
+              'name': name,
+              'version': version,
+              'title': 'Fedora Package Database -- Notification List'}
     for package in sorted(packages):
-        if out_format == 'json':
-            output['packages'][package] = packages[package].split(',')
-        else:
-            output.append('%s|%s\n' % (package, packages[package]))
+        output['packages'][package] = packages[package].split(',')
     return output
 
 
@@ -154,32 +476,96 @@ def _vcs_acls_cache(out_format='text', eol=False, collection=None,
     :kwarg collection: Restrict the VCS info to a specific collection.
     :kwarg namespace: Restrict the VCS info to a specific namespace.
 
+    The text output is returned as an iterator over its lines, see
+    ``_vcs_acls_text``.
+
     '''
-    packages = pkgdblib.vcs_acls(
+    if out_format != 'json':
+        return _vcs_acls_text(
+            eol=eol, collection=collection, namespace=namespace)
+
+    output = dict(pkgdblib.vcs_acls(
         session=SESSION,
         eol=eol,
         collection=collection,
         oformat=out_format,
         skip_pp=APP.config.get('PKGS_NOT_PROVENPACKAGER', None),
-        namespace=namespace)
-    output = []
-    if out_format == 'json':
-        output = packages
-        output['title'] = 'Fedora Package Database -- VCS ACLs'
-    else:
-        for package in sorted(packages):
-            for branch in sorted(packages[package]):
-                if packages[package][branch]['group']:
-                    packages[package][branch]['group'] += ','
-                output.append(
-                    'avail | %(group)s%(user)s | '
-                    '%(namespace)s/%(name)s/%(branch)s'
-                    % (packages[package][branch]))
+        namespace=namespace))
+    output['title'] = 'Fedora Package Database -- VCS ACLs'
     return output
 
 
+def _vcs_acls_text(eol=False, collection=None, namespace=None):
+    ''' Generator yielding the lines of the text output of
+    ``_vcs_acls_cache`` as the ACLs are retrieved from the database.
+
+    :kwarg eol: A boolean specifying whether to include information about
+        End Of Life collections or not. Defaults to ``False``.
+    :kwarg collection: Restrict the VCS info to a specific collection.
+    :kwarg namespace: Restrict the VCS info to a specific namespace.
+
+    '''
+    sep = ''
+    for branch in pkgdblib.iter_vcs_acls_text(
+            session=SESSION,
+            eol=eol,
+            collection=collection,
+            skip_pp=APP.config.get('PKGS_NOT_PROVENPACKAGER', None),
+            namespace=namespace):
+        if branch['group']:
+            branch['group'] += ','
+        yield sep + (
+            'avail | %(group)s%(user)s | '
+            '%(namespace)s/%(name)s/%(branch)s' % branch)
+        sep = '\n'
+
+
+def _critpath_cache(branches=None, out_format='text'):
+    '''Return the list of package marked as critpath for some or all active
+    releases of fedora.
+
+    :kwarg branches: Restrict the list of packages to the specified
+        branch(es).
+    :kwarg out_format: Specify if the output if text or json.
+
+    '''
+    output = {}
+
+    if not branches:
+        active_collections = pkgdblib.get_collection_registry(
+            SESSION).active()
+    else:
+        active_collections = []
+        for branch in branches:
+            active_collections.extend(
+                pkgdblib.search_collection(SESSION, branch)
+            )
+
+    for collection in active_collections:
+        if collection.name != 'Fedora':
+            continue
+        pkgs = pkgdblib.get_critpath_packages(
+            SESSION, branch=collection.branchname)
+        if not pkgs:
+            continue
+        output[collection.branchname] = [pkg.package.name for pkg in pkgs]
+
+    if out_format == 'json':
+        return {"pkgs": output}
+
+    output_str = []
+    keys = output.keys()
+    keys.reverse()
+    for key in keys:
+        output_str.append("== %s ==\n" % key)
+        for pkg in output[key]:
+            output_str.append("* %s\n" % pkg)
+    return output_str
+
+
 @API.route('/bugzilla/')
 @API.route('/bugzilla')
+@conditional_get
 def api_bugzilla():
     '''
 Bugzilla information
@@ -227,19 +613,16 @@ Bugzilla information
 
 """
 
-    acls = _bz_acls_cached(name, out_format)
+    def _generate():
+        ''' Generate the content of the snapshot. '''
+        return _render(_bz_acls_cached(name, out_format), out_format, intro)
 
-    if out_format == 'json':
-        return flask.jsonify(acls)
-    else:
-        return flask.Response(
-            intro + "\n".join(acls),
-            content_type="text/plain;charset=UTF-8"
-        )
+    return _export_response('bugzilla', _generate, name, out_format)
 
 
 @API.route('/notify/')
 @API.route('/notify')
+@conditional_get
 def api_notify():
     '''
     Notification information
@@ -271,21 +654,21 @@ def api_notify():
     if request_wants_json():
         out_format = 'json'
 
-    output = _bz_notify_cache(
-        name, version, eol, out_format,
-        acls=['commit', 'approveacls', 'watchcommits'])
+    def _generate():
+        ''' Generate the content of the snapshot. '''
+        return _render(
+            _bz_notify_cache(
+                name, version, eol, out_format,
+                acls=['commit', 'approveacls', 'watchcommits']),
+            out_format)
 
-    if out_format == 'json':
-        return flask.jsonify(output)
-    else:
-        return flask.Response(
-            output,
-            content_type="text/plain;charset=UTF-8"
-        )
+    return _export_response(
+        'notify', _generate, name, version, eol, out_format)
 
 
 @API.route('/notify/all/')
 @API.route('/notify/all')
+@conditional_get
 def api_notify_all():
     '''
     Notification information 2
@@ -317,19 +700,19 @@ def api_notify_all():
     if request_wants_json():
         out_format = 'json'
 
-    output = _bz_notify_cache(name, version, eol, out_format, acls='all')
+    def _generate():
+        ''' Generate the content of the snapshot. '''
+        return _render(
+            _bz_notify_cache(name, version, eol, out_format, acls='all'),
+            out_format)
 
-    if out_format == 'json':
-        return flask.jsonify(output)
-    else:
-        return flask.Response(
-            output,
-            content_type="text/plain;charset=UTF-8"
-        )
+    return _export_response(
+        'notify_all', _generate, name, version, eol, out_format)
 
 
 @API.route('/vcs/')
 @API.route('/vcs')
+@conditional_get
 def api_vcs():
     '''
     Version Control System ACLs
@@ -363,20 +746,19 @@ def api_vcs():
     if request_wants_json():
         out_format = 'json'
 
-    acls = _vcs_acls_cache(
-        out_format, eol=eol, collection=collection, namespace=namespace)
+    def _generate():
+        ''' Generate the content of the snapshot. '''
+        acls = _vcs_acls_cache(
+            out_format, eol=eol, collection=collection, namespace=namespace)
+        return _render(acls, out_format, intro)
 
-    if out_format == 'json':
-        return flask.jsonify(acls)
-    else:
-        return flask.Response(
-            intro + "\n".join(acls),
-            content_type="text/plain;charset=UTF-8"
-        )
+    return _export_response(
+        'vcs', _generate, out_format, eol, collection, namespace)
 
 
 @API.route('/critpath/')
 @API.route('/critpath')
+@conditional_get
 def api_critpath():
     '''
     Critical path packages
@@ -403,44 +785,110 @@ def api_critpath():
     if request_wants_json():
         out_format = 'json'
 
-    output = {}
+    def _generate():
+        ''' Generate the content of the snapshot. '''
+        return _render(_critpath_cache(branches, out_format), out_format)
 
-    if not branches:
-        active_collections = pkgdblib.search_collection(
-            SESSION, '*', status='Under Development')
-        active_collections.extend(
-            pkgdblib.search_collection(SESSION, '*', status='Active'))
-    else:
-        active_collections = []
-        for branch in branches:
-            active_collections.extend(
-                pkgdblib.search_collection(SESSION, branch)
-            )
+    return _export_response('critpath', _generate, branches, out_format)
 
-    for collection in active_collections:
-        if collection.name != 'Fedora':
-            continue
-        pkgs = pkgdblib.get_critpath_packages(
-            SESSION, branch=collection.branchname)
-        if not pkgs:
-            continue
-        output[collection.branchname] = [pkg.package.name for pkg in pkgs]
 
-    if out_format == 'json':
-        output = {"pkgs": output}
-        return flask.jsonify(output)
-    else:
-        output_str = []
-        keys = output.keys()
-        keys.reverse()
-        for key in keys:
-            output_str.append("== %s ==\n" % key)
-            for pkg in output[key]:
-                output_str.append("* %s\n" % pkg)
-        return flask.Response(
-            ''.join(output_str),
-            content_type="text/plain;charset=UTF-8"
+@API.route('/changes/')
+@API.route('/changes')
+@conditional_get
+def api_changes():
+    '''
+    Changes feed
+    ------------
+    Return the changes made to the packages, collections and ACLs after a
+    given cursor, in the order they were made.
+
+    ::
+
+        /api/changes/?since=<cursor>
+
+    Accept GET queries only.
+
+    :kwarg since: The ``next_cursor`` returned by the previous query, if
+        not provided the changes are returned from the first one.
+    :kwarg namespace: The namespace of the package to restrict the changes
+        to (default: rpms).
+    :kwarg package: Restrict the changes to a specific package.
+    :kwarg topic: Restrict the changes to one or more fedmsg topics (ie:
+        ``acl.update``, ``owner.update``, ``package.update.status``...),
+        can be specified multiple times.
+    :kwarg limit: An integer to limit the number of results, defaults to
+        250, maximum is 500.
+
+    Sample response:
+
+    ::
+
+        /api/changes/?since=WzEyMzQ1LCA2Nzg5MF0=
+
+        {
+          "output": "ok",
+          "changes": [
+            {
+              "acl": "commit",
+              "branch": "master",
+              "cursor": "WzEyMzQ2LCA2Nzg5MV0=",
+              "date": 1402470695.0,
+              "description": "user: pingou set for ralph acl: commit of
+                  package: guake from: Awaiting Review to: Approved on
+                  branch: master",
+              "namespace": "rpms",
+              "new_value": "Approved",
+              "old_value": "Awaiting Review",
+              "package": "guake",
+              "topic": "acl.update",
+              "user": "pingou",
+              "username": "ralph"
+            }
+          ],
+          "next_cursor": "WzEyMzQ2LCA2Nzg5MV0="
+        }
+
+    Keep ``next_cursor`` and provide it as ``since`` to the next query to
+    retrieve the changes made in the meantime, it is the one provided if
+    there were no changes. The changes are listed in the order they were
+    committed, thus no change is skipped by moving to ``next_cursor``.
+
+    .. note:: the ``date`` field is a timestamp expressed in
+            `Unix TIME <https://en.wikipedia.org/wiki/Unix_time>`_
+
+    '''
+    since = flask.request.args.get('since', None)
+    namespace = flask.request.args.get('namespace', 'rpms')
+    package = flask.request.args.get('package', None)
+    topics = flask.request.args.getlist('topic')
+    limit = get_limit()
+
+    httpcode = 200
+    output = {}
+
+    try:
+        changes = pkgdblib.search_changes(
+            SESSION,
+            namespace=namespace,
+            package=package or None,
+            topics=topics or None,
+            limit=limit,
+            cursor=since,
         )
+        output['output'] = 'ok'
+        output['changes'] = [change.to_json() for change in changes]
+        output['next_cursor'] = since or None
+        if changes:
+            output['next_cursor'] = changes[-1].change_cursor
+    except pkgdblib.PkgdbException, err:
+        SESSION.rollback()
+        output['output'] = 'notok'
+        output['error'] = str(err)
+        httpcode = 500
+
+    jsonout = flask.jsonify(output)
+    jsonout.status_code = httpcode
+    return jsonout
 
 
 @API.route('/pendingacls/')
@@ -83,6 +83,10 @@ def api_packager_acl(packagername=None):
         If ``None`` it will not filter the ACLs returned based on the point
         of contact of the package (thus every packages is returned).
     :kwarg page: The page number to return (useful in combination to limit).
+    :kwarg cursor: The ``next_cursor`` returned with the previous page of
+        results. Provide it empty to retrieve the first page, the results
+        are then returned with a ``next_cursor`` instead of ``page`` and
+        ``page_total``. ``next_cursor`` is null on the last page.
     :kwarg limit: An integer to limit the number of results, defaults to
         250, maximum is 500 (acls).
     :kwarg count: A boolean to return the number of packages instead of the
@@ -187,43 +191,54 @@ def api_packager_acl(packagername=None):
             return jsonout
 
     page = flask.request.args.get('page', 1)
+    cursor = flask.request.args.get('cursor', None)
     limit = get_limit()
     count = flask.request.args.get('count', False)
 
     if packagername:
-        packagers = pkgdblib.get_acl_packager(
-            SESSION,
-            packager=packagername,
-            acls=acls,
-            eol=eol,
-            poc=poc,
-            page=page,
-            limit=limit,
-            count=count)
-        if packagers:
-            output['output'] = 'ok'
-            if count:
-                output['acls_count'] = packagers
-            else:
-                tmp = []
-                for pkg in packagers:
-                    dic = pkg[0].to_json(pkglist=False)
-                    dic['packagelist'] = pkg[1].to_json(acls=False)
-                    tmp.append(dic)
-                output['acls'] = tmp
-
-            total_acl = pkgdblib.get_acl_packager(
+        try:
+            packagers = pkgdblib.get_acl_packager(
                 SESSION,
                 packager=packagername,
                 acls=acls,
                 eol=eol,
                 poc=poc,
-                count=True)
+                page=page,
+                limit=limit,
+                count=count,
+                cursor=cursor)
+        except pkgdblib.PkgdbException, err:
+            output = {'output': 'notok', 'error': str(err)}
+            jsonout = flask.jsonify(output)
+            jsonout.status_code = 500
+            return jsonout
 
+        if packagers:
+            output['output'] = 'ok'
             if count:
+                output['acls_count'] = packagers
                 output['page_total'] = 1
             else:
-                output['page_total'] = int(ceil(total_acl / float(limit)))
+                output['acls'] = []
+                for pkg in packagers:
+                    dic = pkg[0].to_json(pkglist=False)
+                    dic['packagelist'] = pkg[1].to_json(acls=False)
+                    output['acls'].append(dic)
+
+                if cursor is not None:
+                    output['next_cursor'] = None
+                    if len(packagers) == limit:
+                        output['next_cursor'] = packagers[-1][0].cursor
+                else:
+                    total_acl = pkgdblib.get_acl_packager(
+                        SESSION,
+                        packager=packagername,
+                        acls=acls,
+                        eol=eol,
+                        poc=poc,
+                        count=True)
+                    output['page_total'] = int(
+                        ceil(total_acl / float(limit)))
         else:
             output = {'output': 'notok', 'error': 'No ACL found for this user'}
             httpcode = 404
@@ -231,9 +246,10 @@ def api_packager_acl(packagername=None):
         output = {'output': 'notok', 'error': 'Invalid request'}
         httpcode = 500
 
-    output['page'] = page
-    if 'page_total' not in output:
-        output['page_total'] = 1
+    if 'next_cursor' not in output:
+        output['page'] = page
+        if 'page_total' not in output:
+            output['page_total'] = 1
 
     jsonout = flask.jsonify(output)
     jsonout.status_code = httpcode
@@ -461,13 +477,12 @@ def api_packager_stats(packagername=None):
     eol = flask.request.args.get('eol', False)
 
     if packagername:
+        registry = pkgdblib.get_collection_registry(SESSION)
         if not eol:
-            collections = pkgdblib.search_collection(
-                SESSION, '*', status='Active')
-            collections.extend(pkgdblib.search_collection(
-                SESSION, '*', status='Under Development'))
+            collections = registry.search(
+                status=['Active', 'Under Development'])
         else:
-            collections = pkgdblib.search_collection(SESSION, '*')
+            collections = registry.search()
 
         for collection in collections:
             packages_co = pkgdblib.get_package_maintained(
@@ -521,6 +536,12 @@ def api_packager_list(pattern=None):
 
     :kwarg pattern: String of the pattern to use to list find packagers.
         If no pattern is provided, it returns the list of all packagers.
+    :kwarg cursor: The ``next_cursor`` returned with the previous page of
+        results. Provide it empty to retrieve the first page, the results
+        are then paginated and returned with a ``next_cursor``, null on
+        the last page. If not provided, all the packagers are returned.
+    :kwarg limit: An integer to limit the number of results when paginated,
+        defaults to 250, maximum is 500.
 
 
     Sample response:
@@ -545,18 +566,45 @@ def api_packager_list(pattern=None):
             "pingou"
           ]
         }
+
+        /api/packagers/?cursor=&limit=2
+
+        {
+          "output": "ok",
+          "packagers": [
+            "aalam",
+            "abbot"
+          ],
+          "next_cursor": "WyJhYmJvdCJd"
+        }
     '''
     httpcode = 200
     output = {}
 
     pattern = flask.request.args.get('pattern', pattern) or '*'
+    cursor = flask.request.args.get('cursor', None)
+    limit = None
+    if cursor is not None:
+        limit = get_limit()
+
     if pattern:
-        packagers = pkgdblib.search_packagers(
-            SESSION, pattern=pattern, eol=False)
-        packagers = [pkg[0] for pkg in packagers]
-        SESSION.commit()
-        output['output'] = 'ok'
-        output['packagers'] = packagers
+        try:
+            packagers = pkgdblib.search_packagers(
+                SESSION, pattern=pattern, eol=False, limit=limit,
+                cursor=cursor)
+            packagers = [pkg[0] for pkg in packagers]
+            SESSION.commit()
+            output['output'] = 'ok'
+            output['packagers'] = packagers
+            if cursor is not None:
+                output['next_cursor'] = None
+                if len(packagers) == limit:
+                    output['next_cursor'] = pkgdblib.get_packager_cursor(
+                        packagers[-1])
+        except pkgdblib.PkgdbException, err:
+            SESSION.rollback()
+            output = {'output': 'notok', 'error': str(err)}
+            httpcode = 500
     else:  # pragma: no cover # In theory we can never get here
         output = {'output': 'notok', 'error': 'Invalid request'}
         httpcode = 500
@@ -35,7 +35,7 @@ from sqlalchemy.orm.exc import NoResultFound
 
 import pkgdb2.lib as pkgdblib
 from pkgdb2 import APP, SESSION, forms, is_admin, packager_login_required
-from pkgdb2.api import API, get_limit
+from pkgdb2.api import API, conditional_get, get_limit
 
 
 ## Some of the object we use here have inherited methods which apparently
@@ -93,9 +93,7 @@ def api_package_new():
     httpcode = 200
     output = {}
 
-    collections = pkgdblib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.extend(pkgdblib.search_collection(SESSION, '*', 'Active'))
+    collections = pkgdblib.get_collection_registry(SESSION).active()
     pkg_status = pkgdblib.get_status(SESSION, 'pkg_status')['pkg_status']
     namespaces = pkgdblib.get_status(SESSION, 'namespaces')['namespaces']
 
@@ -674,6 +672,7 @@ def api_package_unretire():
 @API.route('/package/<pkgname>')
 @API.route('/package/<namespace>/<pkgname>/')
 @API.route('/package/<namespace>/<pkgname>')
+@conditional_get
 def api_package_info(namespace=None, pkgname=None):
     '''
     Package information
@@ -792,6 +791,7 @@ def api_package_info(namespace=None, pkgname=None):
             namespace=namespace,
             pkg_clt=branches,
             eol=eol,
+            eager=True,
         )
         if not packages:
             output['output'] = 'notok'
@@ -820,6 +820,7 @@ def api_package_info(namespace=None, pkgname=None):
 @API.route('/packages/<pattern>')
 @API.route('/package/<namespace>/<pattern>/')
 @API.route('/package/<namespace>/<pattern>')
+@conditional_get
 def api_package_list(namespace=None, pattern=None):
     '''
     List packages
@@ -856,6 +857,11 @@ def api_package_list(namespace=None, pattern=None):
     :kwarg limit: An integer to limit the number of results, defaults to
         250, maximum is 500.
     :kwarg page: The page number to return (useful in combination to limit).
+    :kwarg cursor: The ``next_cursor`` returned with the previous page of
+        results. Provide it empty to retrieve the first page, the results
+        are then returned with a ``next_cursor`` instead of ``page`` and
+        ``page_total``, which allows to go through all the pages in
+        constant time. ``next_cursor`` is null on the last page.
     :kwarg count: A boolean to return the number of packages instead of the
         list. Defaults to False.
 
@@ -957,74 +963,47 @@ def api_package_list(namespace=None, pattern=None):
     statuses = flask.request.args.getlist('status', None)
     eol = flask.request.args.get('eol', False)
     page = flask.request.args.get('page', 1)
+    cursor = flask.request.args.get('cursor', None)
     limit = get_limit()
     count = flask.request.args.get('count', False)
     try:
-        tmp_branches = branches
-        if not branches:
-            tmp_branches = [None]
-        tmp_statuses = statuses
-        if not statuses:
-            tmp_statuses = [None]
-
         if count:
-            packages = 0
-            for status, branch in itertools.product(
-                    tmp_statuses, tmp_branches):
-                packages += pkgdblib.search_package(
-                    SESSION,
-                    namespace=namespace,
-                    pkg_name=pattern,
-                    pkg_branch=branch,
-                    pkg_poc=poc,
-                    orphaned=orphaned,
-                    critpath=critpath,
-                    status=status,
-                    eol=eol,
-                    page=page,
-                    limit=limit,
-                    count=count,
-                )
+            packages = pkgdblib.search_package(
+                SESSION,
+                namespace=namespace,
+                pkg_name=pattern,
+                pkg_branch=branches or None,
+                pkg_poc=poc,
+                orphaned=orphaned,
+                critpath=critpath,
+                status=statuses or None,
+                eol=eol,
+                count=count,
+            )
 
             output['output'] = 'ok'
             output['packages'] = packages
             output['page'] = 1
             output['page_total'] = 1
         else:
-            packages = set()
-            packages_count = 0
-            for status, branch in itertools.product(
-                    tmp_statuses, tmp_branches):
-                packages.update(
-                    pkgdblib.search_package(
-                        SESSION,
-                        namespace=namespace,
-                        pkg_name=pattern,
-                        pkg_branch=branch,
-                        pkg_poc=poc,
-                        orphaned=orphaned,
-                        critpath=critpath,
-                        status=status,
-                        eol=eol,
-                        page=page,
-                        limit=limit,
-                        count=count,
-                    )
-                )
-                packages_count += pkgdblib.search_package(
-                    SESSION,
-                    namespace=namespace,
-                    pkg_name=pattern,
-                    pkg_branch=branch,
-                    pkg_poc=poc,
-                    orphaned=orphaned,
-                    critpath=critpath,
-                    status=status,
-                    eol=eol,
-                    page=page,
-                    limit=limit,
-                    count=True,
-                )
+            packages = pkgdblib.search_package(
+                SESSION,
+                namespace=namespace,
+                pkg_name=pattern,
+                pkg_branch=branches or None,
+                pkg_poc=poc,
+                orphaned=orphaned,
+                critpath=critpath,
+                status=statuses or None,
+                eol=eol,
+                page=page,
+                limit=limit,
+                eager=acls,
+                cursor=cursor,
+                total=cursor is None,
+            )
+            if cursor is None:
+                packages, packages_count = packages
 
             if not packages:
                 output['output'] = 'notok'
@@ -1037,8 +1016,14 @@ def api_package_list(namespace=None, pattern=None):
                     for pkg in packages
                 ]
                 output['output'] = 'ok'
-                output['page'] = int(page)
-                output['page_total'] = int(ceil(packages_count / float(limit)))
+                if cursor is not None:
+                    output['next_cursor'] = None
+                    if len(packages) == limit:
+                        output['next_cursor'] = packages[-1].cursor
+                else:
+                    output['page'] = int(page)
+                    output['page_total'] = int(
+                        ceil(packages_count / float(limit)))
 
     except pkgdblib.PkgdbException, err:
         SESSION.rollback()
@@ -1046,7 +1031,7 @@ def api_package_list(namespace=None, pattern=None):
         output['error'] = str(err)
         httpcode = 500
 
-    if 'page_total' not in output:
+    if 'page_total' not in output and 'next_cursor' not in output:
         output['page'] = 1
         output['page_total'] = 1
 
@@ -1336,11 +1321,9 @@ def api_package_request():
     '''
     httpcode = 200
     output = {}
-    collections = pkgdblib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.reverse()
-    active_collections = pkgdblib.search_collection(SESSION, '*', 'Active')
-    active_collections.reverse()
+    registry = pkgdblib.get_collection_registry(SESSION)
+    collections = registry.search('Under Development', reverse=True)
+    active_collections = registry.search('Active', reverse=True)
     # We want all the branch `Under Development` as well as all the `Active`
     # branch but we can only have at max 2 Fedora branch active at the same
     # time. In other words, when Fedora n+1 is released one can no longer
@@ -1499,10 +1482,7 @@ def api_branch_request(package, namespace='rpms'):
             if pkg.collection.status != 'EOL'
         ]
 
-        collections = pkgdblib.search_collection(
-            SESSION, '*', 'Under Development')
-        collections.extend(pkgdblib.search_collection(
-            SESSION, '*', 'Active'))
+        collections = pkgdblib.get_collection_registry(SESSION).active()
         branches_possible = [
             collec.branchname
             for collec in collections
@@ -70,6 +70,16 @@ PKGDB2_CACHE_KWARGS = {
     }
 }
 
+# Number of seconds during which the statuses, namespaces and collections
+# kept in memory by each process are used without checking if they changed in
+# the database.
+PKGDB2_STATUS_CHECK_INTERVAL = 60
+
+# Folder in which the snapshots of the exports (/api/vcs, /api/bugzilla,
+# /api/notify and /api/critpath) are stored. If not set, they are stored in
+# the cache, beware that memcached limits the size of the objects it stores.
+PKGDB2_SNAPSHOT_DIR = None
+
 # Information regarding where the application is deployed
 SITE_ROOT = 'https://admin.fedoraproject.org'
 SITE_URL = '%s/pkgdb' % SITE_ROOT
@@ -80,6 +90,13 @@ PKGDB2_BUGZILLA_NOTIFICATION = False
 PKGDB2_BUGZILLA_URL = 'https://bugzilla.redhat.com'
 PKGDB2_BUGZILLA_USER = None
 PKGDB2_BUGZILLA_PASSWORD = None
+# Record the reassignments of bugs as jobs run by the pkgdb2_bugzilla_jobs.py
+# script rather than updating bugzilla while processing the request
+PKGDB2_BUGZILLA_JOBS = False
+# Number of times a job is attempted and number of seconds before the first
+# retry, doubled at each attempt
+PKGDB2_BUGZILLA_JOBS_MAX_ATTEMPTS = 5
+PKGDB2_BUGZILLA_JOBS_BACKOFF = 60
 
 # Settings specific to the ``pkgdb-sync-bugzilla`` script/cron
 PKGDB2_BUGZILLA_NOTIFY_EMAIL = [
@@ -89,12 +106,17 @@ BUGZILLA_COMPONENT_API = "component.get"
 PKGDB2_BUGZILLA_NOTIFY_USER = None
 PKGDB2_BUGZILLA_NOTIFY_PASSWORD = None
 PKGDB2_BUGZILLA_DRY_RUN = False
+PKGDB2_BUGZILLA_WORKERS = 4
+PKGDB2_BUGZILLA_RATE = 10
 
 # FAS information
 PKGDB2_FAS_URL = None
 PKGDB2_FAS_USER = None
 PKGDB2_FAS_PASSWORD = None
 PKGDB2_FAS_INSECURE = False
+# Number of seconds after which the packagers and groups retrieved from FAS
+# are refreshed, in the background.
+PKGDB2_FAS_CACHE_TIME = 3600
 
 # pkgdb notifications
 PKGDB2_FEDMSG_NOTIFICATION = True
@@ -103,6 +125,20 @@ PKGDB2_EMAIL_TO = '{pkg_name}-owner@fedoraproject.org'
 PKGDB2_EMAIL_FROM = 'nobody@fedoraproject.org'
 PKGDB2_EMAIL_SMTP_SERVER = 'localhost'
 PKGDB2_EMAIL_CC = None
+# Queue the notifications in the database, to be sent once committed by the
+# pkgdb2_dispatch_notifications.py script, rather than sending them while
+# processing the request
+PKGDB2_NOTIFICATION_OUTBOX = False
+# Number of times the sending of a queued notification is attempted and
+# number of seconds before the first retry, doubled at each attempt
+PKGDB2_OUTBOX_MAX_ATTEMPTS = 8
+PKGDB2_OUTBOX_BACKOFF = 30
+# Number of seconds a dispatcher claims the queued notifications it sends
+# for, they are sent again if it does not record their outcome in time
+PKGDB2_OUTBOX_LEASE = 300
+# Number of seconds the queued email notifications are held to be sent in a
+# single digest per address, 0 sends them as soon as possible
+PKGDB2_EMAIL_DIGEST_WINDOW = 0
 
 MAIL_ADMIN = 'pingou@pingoured.fr'
 
@@ -23,15 +23,19 @@
 PkgDB internal API to interact with the database.
 '''
 
+import itertools
 import operator
 import json
+import threading
+import time
 
 import sqlalchemy
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.exc import SQLAlchemyError
 
 from fedora.client.fas2 import FASError
@@ -103,7 +107,8 @@ def _validate_pkg(session, rhel_ver, pkg_name):
     """
     rhel_vers = [
         item.version
-        for item in search_collection(session, pattern='*el*')
+        for item in get_collection_registry(session).collections
+        if 'el' in item.branchname
     ]
     rhel_pkgs = pkgdb2.lib.utils.get_rhel_pkg(rhel_vers)
 
@@ -139,16 +144,27 @@ def _validate_pkg(session, rhel_ver, pkg_name):
                         pkg_name, rhel_ver))
 
 
-def _validate_fas_user(username):
+def _validate_fas_user(session, username, people=None):
     """ Validate that the provided ``username`` is associated to a valid FAS
     account.
 
+    The local mirror of FAS is looked up first, FAS itself is only queried
+    for the users not mirrored (yet).
+
+    :arg session: the session to connect to the database with.
     :arg username: the username of the user to search in FAS.
+    :kwarg people: the mirrored accounts of the users being validated, as
+        returned by ``get_fas_people``, retrieved if not specified.
 
     """
     if username == 'orphan':
         return
 
+    if people is None:
+        people = get_fas_people(session, [username])
+    if username in people:
+        return
+
     user = pkgdb2.lib.utils.get_bz_email_user(username)
 
     if not user:
@@ -156,6 +172,60 @@ def _validate_fas_user(username):
             'User "%s" could not be found in FAS' % username)
 
 
+def _reassign_bugs(session, username, prev_poc, package, collection):
+    """ Reassign the open bugs of the package in the collection from their
+    previous point of contact to the new one.
+
+    If ``PKGDB2_BUGZILLA_JOBS`` is set, this is recorded as a job to be run
+    by the ``pkgdb2_bugzilla_jobs.py`` script, see ``run_bugzilla_jobs``,
+    otherwise bugzilla is updated right away.
+
+    :arg session: the session to connect to the database with.
+    :arg username: the new point of contact.
+    :arg prev_poc: the previous point of contact.
+    :arg package: the package whose bugs are reassigned.
+    :arg collection: the collection whose bugs are reassigned.
+
+    """
+    if pkgdb2.APP.config.get('PKGDB2_BUGZILLA_JOBS', False):
+        model.BugzillaJob.enqueue(
+            session, username, prev_poc, package.name, collection.name,
+            collection.version)
+    else:
+        pkgdb2.lib.utils.set_bugzilla_owner(
+            username, prev_poc, package.name, collection.name,
+            collection.version, session=session)
+
+
+def _decode_cursor(cursor, types):
+    """ Return the sort key stored in the provided ``cursor``, or None if
+    no cursor is provided.
+
+    :arg cursor: the opaque cursor as returned in the ``cursor`` property
+        of the objects paginated.
+    :arg types: the list of the types of the values of the sort key of
+        the query paginated, a cursor returned for another query does not
+        match them.
+    :raises PkgdbException: if the cursor is invalid or does not match
+        the types provided.
+
+    """
+    if not cursor:
+        return None
+    try:
+        after = model.decode_cursor(cursor)
+    except ValueError:
+        raise PkgdbException('Wrong cursor provided')
+
+    if len(after) != len(types):
+        raise PkgdbException('Wrong cursor provided')
+    for value, type_ in zip(after, types):
+        # bool is a subclass of int
+        if not isinstance(value, type_) or isinstance(value, bool):
+            raise PkgdbException('Wrong cursor provided')
+    return after
+
+
 def create_session(db_url, debug=False, pool_recycle=3600):
     """ Create the Session object to use to query the database.
 
@@ -175,6 +245,123 @@ def create_session(db_url, debug=False, pool_recycle=3600):
     return scopedsession
 
 
+def _lookup(session, key, function, *args):
+    """ Return the object returned by ``function(session, *args)``, keeping
+    it in the lookup cache of the session under the specified ``key`` so
+    that looking it up again does not query the database.
+
+    Nothing is kept if no object is found.
+
+    """
+    lookups = session.info.setdefault('pkgdb2_lookups', {})
+    obj = lookups.get(key)
+    if obj is None:
+        obj = function(session, *args)
+        if obj is not None:
+            lookups[key] = obj
+    return obj
+
+
+def get_package(session, namespace, pkg_name):
+    """ Return the package with the specified name in the specified
+    namespace, looked up at most once in the lifetime of the session
+    (usually a request).
+
+    :arg session: session with which to connect to the database.
+    :arg namespace: the namespace of the package.
+    :arg pkg_name: the name of the package.
+    :rtype: Package
+    :raises sqlalchemy.orm.exc.NoResultFound: if no package is found.
+
+    """
+    return _lookup(
+        session, ('package', namespace, pkg_name),
+        model.Package.by_name, namespace, pkg_name)
+
+
+def get_collection(session, branchname):
+    """ Return the collection with the specified branch name, looked up at
+    most once in the lifetime of the session (usually a request).
+
+    :arg session: session with which to connect to the database.
+    :arg branchname: the branch name of the collection.
+    :rtype: Collection
+    :raises sqlalchemy.orm.exc.NoResultFound: if no collection is found.
+
+    """
+    return _lookup(
+        session, ('collection', branchname),
+        model.Collection.by_name, branchname)
+
+
+def get_package_listing(session, package_id, collection_id):
+    """ Return the listing of the specified package in the specified
+    collection, looked up at most once in the lifetime of the session
+    (usually a request).
+
+    :arg session: session with which to connect to the database.
+    :arg package_id: the identifier of the package.
+    :arg collection_id: the identifier of the collection.
+    :returns: the package listing or None if the package is not in the
+        collection.
+    :rtype: PackageListing
+
+    """
+    return _lookup(
+        session, ('packagelisting', package_id, collection_id),
+        model.PackageListing.by_pkgid_collectionid,
+        package_id, collection_id)
+
+
+def clear_lookups(session):
+    """ Empty the lookup cache and the cache of permissions (see
+    ``has_acls``) of the specified session.
+
+    This is done at the end of each request, whenever the changes made in
+    the session are committed or rolled back and whenever a package, a
+    collection or a package listing is flushed, since its name or its
+    package or collection might have changed.
+
+    :arg session: session with which to connect to the database.
+
+    """
+    session.info.pop('pkgdb2_lookups', None)
+    clear_permissions(session)
+
+
+def clear_permissions(session):
+    """ Empty the cache of permissions (see ``has_acls``) of the specified
+    session.
+
+    Besides the cases listed in ``clear_lookups``, this is done whenever
+    ACLs are flushed, or inserted in bulk.
+
+    :arg session: session with which to connect to the database.
+
+    """
+    session.info.pop('pkgdb2_permissions', None)
+
+
+def _clear_lookups_on_flush(session, flush_context):
+    """ Empty the lookup cache of the session if a package, a collection
+    or a package listing has just been flushed and its cache of permissions
+    if an ACL has.
+    """
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(
+                obj, (model.Package, model.Collection, model.PackageListing)):
+            clear_lookups(session)
+            return
+        elif isinstance(obj, model.PackageListingAcl):
+            clear_permissions(session)
+
+sqlalchemy.event.listen(
+    sqlalchemy.orm.Session, 'after_flush', _clear_lookups_on_flush)
+sqlalchemy.event.listen(sqlalchemy.orm.Session, 'after_commit', clear_lookups)
+sqlalchemy.event.listen(
+    sqlalchemy.orm.Session, 'after_rollback', clear_lookups)
+
+
 def add_package(
         session, namespace, pkg_name, pkg_summary, pkg_description,
         pkg_status, pkg_collection, pkg_poc, user, pkg_review_url=None,
@@ -214,6 +401,15 @@ def add_package(
         raise PkgdbException("You're not allowed to add a package")
 
     _validate_poc(pkg_poc)
+    if not pkg_poc.startswith('group::'):
+        _validate_fas_user(session, pkg_poc)
+
+    # Add all new ACLs to the owner
+    acls = ACLS
+    if pkg_poc.startswith('group::'):
+        acls = ['commit', 'watchbugzilla', 'watchcommits']
+    elif pkg_poc in pkgdb2.APP.config.get('AUTOAPPROVE_PKGERS', []):
+        raise PkgdbException('Groups cannot have "approveacls".')
 
     if isinstance(pkg_collection, (str, unicode)):
         if ',' in pkg_collection:
@@ -222,6 +418,15 @@ def add_package(
         else:
             pkg_collection = [pkg_collection]
 
+    collections = dict(
+        (collection.branchname, collection)
+        for collection in model.Collection.by_names(session, pkg_collection)
+    )
+    for collec in pkg_collection:
+        if collec not in collections:
+            raise NoResultFound(
+                'No collection found by the name of %s' % collec)
+
     package = model.Package(
         namespace=namespace,
         name=pkg_name,
@@ -239,52 +444,64 @@ def add_package(
         session.rollback()
         raise PkgdbException('Could not create package')
 
+    pkglistings = []
     for collec in pkg_collection:
-        collection = model.Collection.by_name(session, collec)
         pkglisting = package.create_listing(point_of_contact=pkg_poc,
-                                            collection=collection,
+                                            collection=collections[collec],
                                             statusname=pkg_status,
                                             critpath=pkg_critpath)
         session.add(pkglisting)
-        try:
-            session.flush()
-        except SQLAlchemyError, err:  # pragma: no cover
-            pkgdb2.LOG.exception(err)
-            session.rollback()
-            raise PkgdbException('Could not add packages to collections')
-        else:
-            pkgdb2.lib.utils.log(session, package, 'package.new', dict(
-                agent=user.username,
-                package_name=package.name,
-                package_listing=pkglisting.to_json(),
-            ))
+        pkglistings.append(pkglisting)
+    try:
+        session.flush()
+    except SQLAlchemyError, err:  # pragma: no cover
+        pkgdb2.LOG.exception(err)
+        session.rollback()
+        raise PkgdbException('Could not add packages to collections')
 
-    # Add all new ACLs to the owner
-    acls = ACLS
-    if pkg_poc.startswith('group::'):
-        acls = ['commit', 'watchbugzilla', 'watchcommits']
+    for pkglisting in pkglistings:
+        pkgdb2.lib.utils.log(session, package, 'package.new', dict(
+            agent=user.username,
+            package_name=package.name,
+            package_listing=pkglisting.to_json(),
+        ))
 
-    for collec in pkg_collection:
-        for acl in acls:
-            set_acl_package(
-                session=session,
-                namespace=namespace,
-                pkg_name=pkg_name,
-                pkg_branch=collec,
-                pkg_user=pkg_poc,
-                acl=acl,
-                status='Approved',
-                user=user)
     try:
-        session.flush()
-        return 'Package created'
+        model.PackageListingAcl.create_many(
+            session,
+            [
+                (pkg_poc, pkglisting.id, acl, 'Approved')
+                for pkglisting in pkglistings
+                for acl in acls
+            ]
+        )
+        clear_permissions(session)
     except SQLAlchemyError, err:  # pragma: no cover
         pkgdb2.LOG.exception(err)
         raise PkgdbException('Could not add ACLs')
 
+    for pkglisting in pkglistings:
+        session.expire(pkglisting, ['acls'])
+        pkglisting_json = pkglisting.to_json()
+        pkglisting_acls = pkglisting_json.pop('acls', [])
+        for cnt, acl in enumerate(acls):
+            # Each message lists the ACLs set so far on the branch
+            pkglisting_json['acls'] = pkglisting_acls[:cnt + 1]
+            pkgdb2.lib.utils.log(session, package, 'acl.update', dict(
+                agent=user.username,
+                username=pkg_poc,
+                acl=acl,
+                previous_status='',
+                status='Approved',
+                package_name=package.name,
+                package_listing=dict(pkglisting_json),
+            ))
+
+    return 'Package created'
+
 
 def get_acl_package(
-        session, namespace, pkg_name, pkg_clt=None, eol=False):
+        session, namespace, pkg_name, pkg_clt=None, eol=False, eager=False):
     """ Return the ACLs for the specified package.
 
     :arg session: session with which to connect to the database.
@@ -296,14 +513,18 @@ def get_acl_package(
         EOL collections or not. Defaults to False.
         If True, it will return results for all collections (including EOL).
         If False, it will return results only for non-EOL collections.
+    :kwarg eager: a boolean specifying whether to load the package,
+        collection and ACLs of the listings returned in the same go, this
+        is useful when these listings are to be serialized.
     :returns: a list of ``PackageListing``.
     :rtype: list(PackageListing)
     :raises sqlalchemy.orm.exc.NoResultFound: when there is no package
         found in the database with the name ``pkg_name``.
 
     """
-    package = model.Package.by_name(session, namespace, pkg_name)
-    pkglisting = model.PackageListing.by_package_id(session, package.id)
+    package = get_package(session, namespace, pkg_name)
+    pkglisting = model.PackageListing.by_package_id(
+        session, package.id, eager=eager)
 
     if pkg_clt:
         if isinstance(pkg_clt, basestring):
@@ -359,15 +580,15 @@ def set_acl_package(session, namespace, pkg_name, pkg_branch, pkg_user,
     if pkg_user.startswith('group:'):
         _validate_poc(pkg_user)
     else:
-        _validate_fas_user(pkg_user)
+        _validate_fas_user(session, pkg_user)
 
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException('No package found by this name')
 
     try:
-        collection = model.Collection.by_name(session, pkg_branch)
+        collection = get_collection(session, pkg_branch)
     except NoResultFound:
         raise PkgdbException('No collection found by the name of %s'
                              % pkg_branch)
@@ -390,7 +611,7 @@ def set_acl_package(session, namespace, pkg_name, pkg_branch, pkg_user,
         raise PkgdbException(
             'Groups cannot have "approveacls".')
 
-    pkglisting = model.PackageListing.by_pkgid_collectionid(
+    pkglisting = get_package_listing(
         session, package.id, collection.id)
     if not pkglisting:
         pkglisting = package.create_listing(point_of_contact=pkg_user,
@@ -441,6 +662,192 @@ def set_acl_package(session, namespace, pkg_name, pkg_branch, pkg_user,
     ))
 
 
+def set_acl_packages(session, changes, user, force=False):
+    """ Set the specified ACLs on several packages at once.
+
+    This applies the same checks as ``set_acl_package`` but retrieves the
+    packages, collections, package listings and ACLs concerned, as well as
+    the rights of the user making the action, in a few queries for all the
+    changes, and validates each user in FAS only once.
+
+    :arg session: session with which to connect to the database.
+    :arg changes: a list of (namespace, pkg_name, pkg_branch, pkg_user,
+        acl, status) tuples describing the ACLs to set.
+    :arg user: the user making the action.
+    :kwarg force: a boolean to force creating the ACLs w/o checking if the
+        user is an admin or not
+    :returns: a list containing, for each change and in the same order,
+        the message logged, ``None`` if there was nothing to update or the
+        ``PkgdbException`` which prevented the change.
+    :rtype: list
+
+    """
+    changes = [tuple(change) for change in changes]
+    status = get_status(session, ['pkg_acl', 'acl_status'])
+
+    packages = dict(
+        ((package.namespace, package.name), package)
+        for package in model.Package.by_names(
+            session, [(change[0], change[1]) for change in changes])
+    )
+    collections = dict(
+        (collection.branchname, collection)
+        for collection in model.Collection.by_names(
+            session, list(set([change[2] for change in changes])))
+    )
+    pkg_ids = [package.id for package in packages.values()]
+    pkglistings = dict(
+        ((pkglisting.package_id, pkglisting.collection_id), pkglisting)
+        for pkglisting in model.PackageListing.by_pkgids_collectionids(
+            session, pkg_ids,
+            [collection.id for collection in collections.values()])
+    )
+    personpkgs = dict(
+        ((personpkg.packagelisting_id, personpkg.fas_name, personpkg.acl),
+         personpkg)
+        for personpkg in model.PackageListingAcl.get_many(
+            session, list(set([change[3] for change in changes])),
+            [pkglisting.id for pkglisting in pkglistings.values()])
+    )
+
+    admin = force or pkgdb2.is_pkgdb_admin(user)
+    approver_of = set()
+    if not admin:
+        approver_of = set(
+            pkglisting.id
+            for pkglisting in model.PackageListing.with_acl(
+                session, user.username, 'approveacls', pkg_ids)
+        )
+
+    people = get_fas_people(
+        session,
+        [change[3] for change in changes if not change[3].startswith('group:')]
+    )
+    validated = {}
+
+    def _validate_user(pkg_user, poc):
+        """ Validate the user the ACL is set for, caching the outcome. """
+        if (pkg_user, poc) not in validated:
+            validated[(pkg_user, poc)] = None
+            try:
+                if poc:
+                    _validate_poc(pkg_user)
+                if pkg_user.startswith('group:'):
+                    _validate_poc(pkg_user)
+                else:
+                    _validate_fas_user(session, pkg_user, people)
+            except PkgdbException, err:
+                validated[(pkg_user, poc)] = err
+        if validated[(pkg_user, poc)]:
+            raise validated[(pkg_user, poc)]
+
+    output = []
+    for (namespace, pkg_name, pkg_branch, pkg_user, acl, acl_status) \
+            in changes:
+        try:
+            if acl not in status['pkg_acl']:
+                raise PkgdbException('Invalid ACL: %s' % acl)
+            if acl_status and acl_status not in status['acl_status']:
+                raise PkgdbException('Invalid ACL status: %s' % acl_status)
+
+            _validate_user(
+                pkg_user,
+                acl not in pkgdb2.APP.config['AUTO_APPROVE']
+                and acl_status not in ('Removed', 'Obsolete'))
+
+            package = packages.get((namespace, pkg_name))
+            if package is None:
+                raise PkgdbException('No package found by this name')
+
+            collection = collections.get(pkg_branch)
+            if collection is None:
+                raise PkgdbException(
+                    'No collection found by the name of %s' % pkg_branch)
+
+            pkglisting = pkglistings.get((package.id, collection.id))
+            if not admin and (
+                    pkglisting is None or pkglisting.id not in approver_of):
+                if user.username != pkg_user \
+                        and not pkg_user.startswith('group::'):
+                    raise PkgdbException(
+                        'You are not allowed to update ACLs of '
+                        'someone else.')
+                elif user.username == pkg_user and acl_status not in \
+                        ('Awaiting Review', 'Removed', 'Obsolete', '') \
+                        and acl not in pkgdb2.APP.config['AUTO_APPROVE']:
+                    raise PkgdbException(
+                        'You are not allowed to approve or deny '
+                        'ACLs for yourself.')
+
+            if acl == 'approveacls' and (
+                    pkg_user.startswith('group::')
+                    or pkg_user in pkgdb2.APP.config.get(
+                        'AUTOAPPROVE_PKGERS', [])):
+                raise PkgdbException(
+                    'Groups cannot have "approveacls".')
+
+            if not pkglisting:
+                pkglisting = package.create_listing(
+                    point_of_contact=pkg_user,
+                    collection=collection,
+                    statusname='Approved')
+                session.add(pkglisting)
+                session.flush()
+                pkgdb2.lib.utils.log(
+                    session, package, 'package.branch.new', dict(
+                        agent=user.username,
+                        package=package.to_json(acls=False),
+                        package_listing=pkglisting.to_json(),
+                    ))
+                pkglistings[(package.id, collection.id)] = pkglisting
+
+            if pkglisting.point_of_contact == pkg_user \
+                    and acl_status != 'Approved' \
+                    and acl.startswith('watch'):
+                raise PkgdbException(
+                    'You cannot remove `Watch*` ACLs from the Point of '
+                    'Contact.')
+
+            key = (pkglisting.id, pkg_user, acl)
+            personpkg = personpkgs.get(key)
+            if personpkg is None and not acl_status:
+                output.append(None)
+                continue
+            if personpkg is not None and personpkg.status == acl_status:
+                output.append(None)
+                continue
+
+            prev_status = ''
+            if personpkg is None:
+                personpkg = model.PackageListingAcl.create(
+                    session, pkg_user, pkglisting.id, acl=acl,
+                    status=acl_status)
+                personpkgs[key] = personpkg
+            else:
+                prev_status = personpkg.status
+
+            if not acl_status:
+                session.delete(personpkg)
+                del personpkgs[key]
+            else:
+                personpkg.status = acl_status
+            session.flush()
+            output.append(pkgdb2.lib.utils.log(
+                session, package, 'acl.update', dict(
+                    agent=user.username,
+                    username=pkg_user,
+                    acl=acl,
+                    previous_status=prev_status,
+                    status=acl_status,
+                    package_name=package.name,
+                    package_listing=pkglisting.to_json(),
+                )))
+        except PkgdbException, err:
+            output.append(err)
+
+    return output
+
+
 def update_pkg_poc(session, namespace, pkg_name, pkg_branch, pkg_poc, user,
                    former_poc=None):
     """ Change the point of contact of a package.
@@ -473,19 +880,18 @@ def update_pkg_poc(session, namespace, pkg_name, pkg_branch, pkg_poc, user,
     _validate_poc(pkg_poc)
 
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException('No package found by this name')
 
     try:
-        collection = model.Collection.by_name(session, pkg_branch)
+        collection = get_collection(session, pkg_branch)
     except NoResultFound:
         raise PkgdbException('No collection found by the name of %s'
                              % pkg_branch)
 
-    pkglisting = model.PackageListing.by_pkgid_collectionid(session,
-                                                            package.id,
-                                                            collection.id)
+    pkglisting = get_package_listing(
+        session, package.id, collection.id)
     if not pkglisting:
         raise PkgdbException(
             'The package %s/%s could not be found in the collection %s.' %
@@ -562,9 +968,7 @@ def update_pkg_poc(session, namespace, pkg_name, pkg_branch, pkg_poc, user,
     )
     if namespace == 'rpms':
         # Update Bugzilla about new owner
-        pkgdb2.lib.utils.set_bugzilla_owner(
-            pkg_poc, prev_poc, package.name, collection.name,
-            collection.version)
+        _reassign_bugs(session, pkg_poc, prev_poc, package, collection)
 
     return output
 
@@ -599,12 +1003,12 @@ def update_pkg_status(
 
     """
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException('No package found by this name')
 
     try:
-        collection = model.Collection.by_name(session, pkg_branch)
+        collection = get_collection(session, pkg_branch)
     except NoResultFound:
         raise PkgdbException('No collection found by this name')
 
@@ -612,9 +1016,8 @@ def update_pkg_status(
         raise PkgdbException('Status not allowed for a package : %s' %
                              status)
 
-    pkglisting = model.PackageListing.by_pkgid_collectionid(session,
-                                                            package.id,
-                                                            collection.id)
+    pkglisting = get_package_listing(
+        session, package.id, collection.id)
 
     if not pkglisting:
         raise PkgdbException('No package %s/%s found in collection %s' % (
@@ -653,9 +1056,7 @@ def update_pkg_status(
                 session.flush()
             if prev_status != 'Orphaned':
                 # Update Bugzilla about new owner
-                pkgdb2.lib.utils.set_bugzilla_owner(
-                    poc, prev_poc, package.name, collection.name,
-                    collection.version)
+                _reassign_bugs(session, poc, prev_poc, package, collection)
         else:
             raise PkgdbException(
                 'You are not allowed to retire the '
@@ -682,9 +1083,7 @@ def update_pkg_status(
         session.add(pkglisting)
         session.flush()
         # Update Bugzilla about new owner
-        pkgdb2.lib.utils.set_bugzilla_owner(
-            poc, prev_poc, package.name, collection.name,
-            collection.version)
+        _reassign_bugs(session, poc, prev_poc, package, collection)
 
     else:
         raise PkgdbException(
@@ -711,16 +1110,17 @@ def update_pkg_status(
 def search_package(
         session, namespace, pkg_name, pkg_branch=None, pkg_poc=None,
         orphaned=None, critpath=None, status=None, eol=False,
-        page=None, limit=None, count=False, case_sensitive=True):
+        page=None, limit=None, count=False, case_sensitive=True,
+        eager=False, cursor=None, total=False):
     """ Return the list of packages matching the given criteria.
 
     :arg session: session with which to connect to the database.
     :arg pkg_name: the name of the package.
-    :kwarg pkg_branch: branchname of the collection to search.
+    :kwarg pkg_branch: one or more branchname of the collection to search.
     :kwarg pkg_poc: point of contact of the packages searched.
     :kwarg orphaned: boolean to restrict search to orphaned packages.
     :kwarg critpath: Boolean to retrict the search to critpath packages.
-    :kwarg status: allows filtering the packages by their status:
+    :kwarg status: allows filtering the packages by one or more status:
         Approved, Retired, Removed, Orphaned.
     :kwarg eol: a boolean to specify whether to include results for
         EOL collections or not. Defaults to False.
@@ -733,13 +1133,23 @@ def search_package(
        if true, returns the data if false (default).
     :kwarg case_sensitive: a boolean to specify doing a case insensitive
         search. Defaults to True.
+    :kwarg eager: a boolean specifying whether to load the listings,
+        collections and ACLs of the packages returned in the same go, this
+        is useful when these packages are to be serialized with their ACLs.
+    :kwarg cursor: the cursor of the last package of the previous page, if
+        provided it is used instead of ``page`` to fetch the next page.
+    :kwarg total: a boolean specifying whether to return as well the total
+        number of packages matching these criterias, retrieved in the same
+        query as the packages.
     :returns: a list of ``Package`` entry corresponding to the given
-        criterias.
-    :rtype: list(Package)
+        criterias, or if ``total`` is True a tuple made of this list and
+        the total number of packages matching the criterias.
+    :rtype: list(Package) or tuple(list(Package), int)
     :raises pkgdb2.lib.PkgdbException: There are few conditions leading to
         this exception beeing raised:
             - The provided ``limit`` is not an integer.
             - The provided ``page`` is not an integer.
+            - The provided ``cursor`` is invalid.
 
     """
     if '*' in pkg_name:
@@ -763,6 +1173,10 @@ def search_package(
     if page is not None and page > 0 and limit is not None and limit > 0:
         page = (page - 1) * limit
 
+    after = _decode_cursor(cursor, [basestring, int])
+    if after:
+        page = None
+
     return model.Package.search(
         session,
         namespace=namespace,
@@ -777,6 +1191,9 @@ def search_package(
         limit=limit,
         count=count,
         case_sensitive=case_sensitive,
+        eager=eager,
+        after=after,
+        total=total,
     )
 
 
@@ -827,7 +1244,7 @@ def search_collection(session, pattern, status=None, page=None,
 
 
 def search_packagers(session, pattern, eol=False, page=None, limit=None,
-                     count=False):
+                     count=False, cursor=None):
     """ Return the list of Packagers maching the given pattern.
 
     :arg session: session with which to connect to the database.
@@ -840,6 +1257,9 @@ def search_packagers(session, pattern, eol=False, page=None, limit=None,
     :kwarg limit: the number of results to return.
     :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+    :kwarg cursor: the cursor of the last packager of the previous page, as
+        returned by ``get_packager_cursor``, if provided it is used instead
+        of ``page`` to fetch the next page.
     :returns: a list of ``PackageListing`` entry corresponding to the given
         criterias.
     :rtype: list(PackageListing)
@@ -847,6 +1267,7 @@ def search_packagers(session, pattern, eol=False, page=None, limit=None,
         this exception beeing raised:
             - The provided ``limit`` is not an integer.
             - The provided ``page`` is not an integer.
+            - The provided ``cursor`` is invalid.
 
     """
     if '*' in pattern:
@@ -867,21 +1288,36 @@ def search_packagers(session, pattern, eol=False, page=None, limit=None,
     if page is not None and page > 0 and limit is not None and limit > 0:
         page = (page - 1) * limit
 
+    after = _decode_cursor(cursor, [basestring])
+    if after:
+        page = None
+
     packagers = model.PackageListing.search_packagers(
         session,
         pattern=pattern,
         eol=eol,
         offset=page,
         limit=limit,
-        count=count)
+        count=count,
+        after=after)
 
     return packagers
 
 
+def get_packager_cursor(packager):
+    """ Return the cursor pointing after the provided packager in the
+    results of ``search_packagers``.
+
+    :arg packager: the name of the packager.
+
+    """
+    return model.encode_cursor([packager])
+
+
 def search_actions(
         session, namespace='rpms', package=None, packager=None,
         action=None, status='Awaiting Review', page=None,
-        limit=None, count=False):
+        limit=None, count=False, cursor=None):
     """ Return the list of actions requiring an admin and matching the
     given criteria.
 
@@ -895,12 +1331,15 @@ def search_actions(
     :kwarg limit: the number of results to return.
     :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+    :kwarg cursor: the cursor of the last action of the previous page, if
+        provided it is used instead of ``page`` to fetch the next page.
     :returns: a list of ``Log`` entry corresponding to the given criterias.
     :rtype: list(Log)
     :raises pkgdb2.lib.PkgdbException: There are few conditions leading to
         this exception beeing raised:
             - The provided ``limit`` is not an integer.
             - The provided ``page`` is not an integer.
+            - The provided ``cursor`` is invalid.
             - The ``package`` name specified does not correspond to any
                 package.
 
@@ -931,6 +1370,10 @@ def search_actions(
     if status and status.lower() == 'all':
         status = None
 
+    after = _decode_cursor(cursor, [datetime, int])
+    if after:
+        page = None
+
     return model.AdminAction.search(
         session,
         package_id=package_id,
@@ -939,11 +1382,13 @@ def search_actions(
         status=status,
         offset=page,
         limit=limit,
-        count=count)
+        count=count,
+        after=after)
 
 
 def search_logs(session,namespace=None, package=None, packager=None,
-                from_date=None, page=None, limit=None, count=False):
+                from_date=None, page=None, limit=None, count=False,
+                cursor=None):
     """ Return the list of Collection matching the given criteria.
 
     :arg session: session with which to connect to the database.
@@ -955,12 +1400,15 @@ def search_logs(session,namespace=None, package=None, packager=None,
     :kwarg limit: the number of results to return.
     :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+    :kwarg cursor: the cursor of the last log entry of the previous page, if
+        provided it is used instead of ``page`` to fetch the next page.
     :returns: a list of ``Log`` entry corresponding to the given criterias.
     :rtype: list(Log)
     :raises pkgdb2.lib.PkgdbException: There are few conditions leading to
         this exception beeing raised:
             - The provided ``limit`` is not an integer.
             - The provided ``page`` is not an integer.
+            - The provided ``cursor`` is invalid.
             - The ``package`` name specified does not correspond to any
                 package.
 
@@ -993,18 +1441,74 @@ def search_logs(session,namespace=None, package=None, packager=None,
         # Make sure we get all the events of the day asked
         from_date = from_date + timedelta(days=1)
 
+    after = _decode_cursor(cursor, [datetime, int])
+    if after:
+        page = None
+
     return model.Log.search(session,
                             package_id=package_id,
                             packager=packager,
                             from_date=from_date,
                             offset=page,
                             limit=limit,
-                            count=count)
+                            count=count,
+                            after=after)
+
+
+def search_changes(session, namespace=None, package=None, topics=None,
+                   limit=None, cursor=None):
+    """ Return the changes made after the given cursor, in the order they
+    were made.
+
+    :arg session: session with which to connect to the database.
+    :kwarg namespace: the namespace of a package.
+    :kwarg package: retrict the changes to a certain package.
+    :kwarg topics: restrict the changes to a list of fedmsg topics.
+    :kwarg limit: the number of results to return.
+    :kwarg cursor: the cursor of the last change already seen, as returned
+        in the ``cursor`` of the changes, if not provided the changes are
+        returned from the first one.
+    :returns: a list of ``Log`` entry corresponding to the given criterias.
+    :rtype: list(Log)
+    :raises pkgdb2.lib.PkgdbException: There are few conditions leading to
+        this exception beeing raised:
+            - The provided ``limit`` is not an integer.
+            - The provided ``cursor`` is invalid.
+            - The ``package`` name specified does not correspond to any
+                package.
+
+    """
+    if limit is not None:
+        try:
+            limit = abs(int(limit))
+        except ValueError:
+            raise PkgdbException('Wrong limit provided')
+
+    package_id = None
+    if package is not None:
+        package = search_package(
+            session, namespace, package, limit=1)
+        if not package:
+            raise PkgdbException('No package exists')
+        else:
+            package_id = package[0].id
+
+    if isinstance(topics, basestring):
+        topics = [topics]
+
+    after = _decode_cursor(cursor, [int, int])
+
+    return model.Log.get_changes(
+        session,
+        package_id=package_id,
+        topics=topics,
+        limit=limit,
+        after=after)
 
 
 def get_acl_packager(
         session, packager, acls=None, eol=False, poc=None,
-        page=1, limit=100, count=False):
+        page=1, limit=100, count=False, cursor=None):
     """ Return the list of ACL associated with a packager.
 
     :arg session: session with which to connect to the database.
@@ -1027,6 +1531,8 @@ def get_acl_packager(
     :kwarg limit: the number of results to return.
     :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+    :kwarg cursor: the cursor of the last ACL of the previous page, if
+        provided it is used instead of ``page`` to fetch the next page.
     :returns: a list of ``PackageListingAcl`` associated to the specified
         user.
     :rtype: list(PackageListingAcl)
@@ -1042,6 +1548,10 @@ def get_acl_packager(
     if page is not None and page > 0 and limit is not None and limit > 0:
         page = (page - 1) * limit
 
+    after = _decode_cursor(cursor, [int])
+    if after:
+        page = None
+
     return model.PackageListingAcl.get_acl_packager(
         session,
         packager=packager,
@@ -1050,7 +1560,8 @@ def get_acl_packager(
         poc=poc,
         offset=page,
         limit=limit,
-        count=count)
+        count=count,
+        after=after)
 
 
 def get_critpath_packages(session, branch=None):
@@ -1183,6 +1694,7 @@ def add_collection(session, clt_name, clt_version, clt_status,
     try:
         session.add(collection)
         session.flush()
+        _snapshot_written(session, 'collections')
         pkgdb2.lib.utils.log(session, None, 'collection.new', dict(
             agent=user.username,
             collection=collection.to_json(),
@@ -1255,6 +1767,7 @@ def edit_collection(session, collection, clt_name=None, clt_version=None,
         try:
             session.add(collection)
             session.flush()
+            _snapshot_written(session, 'collections')
             pkgdb2.lib.utils.log(
                 session,
                 None,
@@ -1365,7 +1878,7 @@ def update_collection_status(session, clt_branchname, clt_status, user):
         raise PkgdbException('You are not allowed to edit collections')
 
     try:
-        collection = model.Collection.by_name(session, clt_branchname)
+        collection = get_collection(session, clt_branchname)
 
         if collection.status != clt_status:
             prev_status = collection.status
@@ -1374,6 +1887,7 @@ def update_collection_status(session, clt_branchname, clt_status, user):
                 prev_status, clt_status)
             session.add(collection)
             session.flush()
+            _snapshot_written(session, 'collections')
             pkgdb2.lib.utils.log(session, None, 'collection.update', dict(
                 agent=user.username,
                 fields=['status'],
@@ -1480,28 +1994,129 @@ def has_acls(session, user, namespace, package, acl, branch=None):
     if package is None or acl is None:
         return False
 
-    acls = get_acl_user_package(
-        session, user=user, namespace=namespace,
-        package=package, status='Approved')
-
     if isinstance(acl, basestring):
         acl = [acl]
 
-    user_has_acls = False
-    for user_acl in acls:
-        if not branch and user_acl['acl'] in acl:
-            user_has_acls = True
-            break
-        elif branch and user_acl['collection'] == branch \
-                and user_acl['acl'] in acl:
-            user_has_acls = True
-            break
-    return user_has_acls
+    # The answers are kept for the lifetime of the session (usually the
+    # request), see ``clear_permissions``
+    permissions = session.info.setdefault('pkgdb2_permissions', {})
+    key = (user, namespace, package, branch, frozenset(acl))
+    if key not in permissions:
+        permissions[key] = model.PackageListingAcl.has_acls(
+            session, user, namespace, package, acl, branch=branch)
+    return permissions[key]
+
+
+_SNAPSHOTS = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def _get_snapshot(session, name, get_version, load):
+    """ Return the snapshot of some data kept in memory by this process,
+    loading it if there is none yet.
+
+    Every ``PKGDB2_STATUS_CHECK_INTERVAL`` seconds, the version of the data
+    is checked against the one the snapshot was loaded from and the
+    snapshot is reloaded if it changed, this way the changes made by other
+    processes, or by migrations, are noticed as well.
+
+    :arg session: session with which to connnect to the database.
+    :arg name: the name of the snapshot.
+    :arg get_version: a function returning, with a cheap query, the
+        current version of the data.
+    :arg load: a function loading the snapshot from the database.
+
+    """
+    snapshot = _SNAPSHOTS.get(name, {})
+    engine = session.get_bind()
+    interval = pkgdb2.APP.config.get('PKGDB2_STATUS_CHECK_INTERVAL', 60)
+    if snapshot.get('engine') is engine \
+            and time.time() - snapshot['checked'] < interval:
+        return snapshot['data']
+
+    with _SNAPSHOTS_LOCK:
+        version = get_version(session)
+        if snapshot.get('engine') is engine \
+                and snapshot['version'] == version:
+            data = snapshot['data']
+        else:
+            data = load(session)
+        _SNAPSHOTS[name] = {
+            'engine': engine,
+            'version': version,
+            'checked': time.time(),
+            'data': data,
+        }
+    return data
+
+
+def _snapshot_written(session, name):
+    """ Flag the data behind the specified snapshot as changed in the
+    session: until these changes are committed, the session reads the data
+    from the database and once they are, the snapshot is dropped.
+    """
+    session.info.setdefault('pkgdb2_snapshots_written', set()).add(name)
+
+
+def _is_snapshot_written(session, name):
+    """ Return whether the data behind the specified snapshot was changed
+    in the session and these changes are not committed yet.
+    """
+    return name in session.info.get('pkgdb2_snapshots_written', ())
+
+
+def clear_snapshots(*names):
+    """ Drop the specified snapshots kept in memory by this process, or all
+    of them if none is specified, they are loaded again the next time they
+    are used.
+    """
+    if not names:
+        _SNAPSHOTS.clear()
+    for name in names:
+        _SNAPSHOTS.pop(name, None)
+
+
+def _clear_snapshots_on_commit(session):
+    """ Drop the snapshots whose data was changed in the session once these
+    changes are committed.
+    """
+    names = session.info.pop('pkgdb2_snapshots_written', None)
+    if names:
+        clear_snapshots(*names)
+
+
+def _forget_snapshots_written(session):
+    """ Forget about the changes made to the data behind the snapshots in
+    the session once they are rolled back.
+    """
+    session.info.pop('pkgdb2_snapshots_written', None)
+
+sqlalchemy.event.listen(
+    sqlalchemy.orm.Session, 'after_commit', _clear_snapshots_on_commit)
+sqlalchemy.event.listen(
+    sqlalchemy.orm.Session, 'after_rollback', _forget_snapshots_written)
+
+
+def _load_status(session):
+    """ Load the content of all the status tables.
+
+    :returns: a dictionnary associating each kind of status to the tuple
+        of these statuses.
+
+    """
+    return dict(
+        (key, tuple(cls.all_txt(session)))
+        for key, cls in model.STATUS_TABLES
+    )
 
 
 def get_status(session, status='all'):
     """ Return a dictionnary containing all the status and acls.
 
+    The statuses are served from a snapshot of the status tables kept in
+    memory by this process (see ``_get_snapshot``), unless they were
+    changed in the session and these changes are not committed yet.
+
     :arg session: session with which to connnect to the database.
     :kwarg status: single keyword or multiple keywords used to retrict
         querying only for some of the status rather than all.
@@ -1512,30 +2127,162 @@ def get_status(session, status='all'):
     :rtype: dict(str():list())
 
     """
-    output = {}
-
     if status == 'all':
-        status = [
-            'clt_status', 'pkg_status', 'pkg_acl', 'acl_status',
-            'admin_status', 'namespaces',
-        ]
+        status = [key for key, _ in model.STATUS_TABLES]
     elif isinstance(status, basestring):
         status = [status]
 
-    if 'clt_status' in status:
-        output['clt_status'] = model.CollecStatus.all_txt(session)
-    if 'pkg_status' in status:
-        output['pkg_status'] = model.PkgStatus.all_txt(session)
-    if 'pkg_acl' in status:
-        output['pkg_acl'] = model.PkgAcls.all_txt(session)
-    if 'acl_status' in status:
-        output['acl_status'] = model.AclStatus.all_txt(session)
-    if 'admin_status' in status:
-        output['admin_status'] = model.ActionStatus.all_txt(session)
-    if 'namespaces' in status:
-        output['namespaces'] = model.Namespace.all_txt(session)
+    if _is_snapshot_written(session, 'status'):
+        snapshot = _load_status(session)
+    else:
+        snapshot = _get_snapshot(
+            session, 'status', model.status_version, _load_status)
+    return dict(
+        (key, list(snapshot[key]))
+        for key, _ in model.STATUS_TABLES
+        if key in status
+    )
+
 
-    return output
+class CollectionEntry(object):
+    """ Read-only copy of a ``Collection``, kept by the
+    ``CollectionRegistry``.
+
+    It has the same attributes as the collection it was copied from, but
+    is not attached to any session.
+    """
+
+    def __init__(self, collection):
+        """ Constructor.
+
+        :arg collection: the ``Collection`` to copy.
+
+        """
+        for column in model.Collection.__table__.columns:
+            self.__dict__[column.key] = getattr(collection, column.key)
+        self.__dict__['_json'] = collection.to_json()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CollectionEntry objects are read-only')
+
+    def __repr__(self):
+        """ The string representation of this object. """
+        return 'CollectionEntry(%r, %r, %r, owner:%r)' % (
+            self.name, self.version, self.status, self.owner)
+
+    def to_json(self, _seen=None):
+        """ Return the same dictionnary as ``Collection.to_json``. """
+        return dict(self._json)
+
+
+def _version_key(version):
+    """ Sort key ordering the numeric versions numerically, before the
+    others (such as `devel`).
+    """
+    if version.isdigit():
+        return (0, int(version), version)
+    return (1, 0, version)
+
+
+class CollectionRegistry(object):
+    """ All the collections, indexed in memory.
+
+    The collections are ``CollectionEntry`` objects and can be found:
+        - by identifier in ``by_id``,
+        - by branch name in ``by_branchname``,
+        - by (name, version) in ``by_name_version``,
+        - by status in ``by_status``, sorted by branch name.
+    """
+
+    def __init__(self, collections):
+        """ Constructor.
+
+        :arg collections: the ``Collection`` objects to register.
+
+        """
+        self.collections = tuple(sorted(
+            [CollectionEntry(collection) for collection in collections],
+            key=operator.attrgetter('branchname')))
+        self.by_id = {}
+        self.by_branchname = {}
+        self.by_name_version = {}
+        by_status = {}
+        for collection in self.collections:
+            self.by_id[collection.id] = collection
+            self.by_branchname[collection.branchname] = collection
+            self.by_name_version[
+                (collection.name, collection.version)] = collection
+            by_status.setdefault(collection.status, []).append(collection)
+        self.by_status = dict(
+            (status, tuple(collections))
+            for status, collections in by_status.items()
+        )
+
+    def search(self, status=None, name=None, order_by='branchname',
+               reverse=False):
+        """ Return the collections matching the given criteria.
+
+        :kwarg status: one or more status of the collections to return.
+            The collections are returned grouped by status, in the order
+            these status are given.
+        :kwarg name: the name of the collections to return, ie: `Fedora`.
+        :kwarg order_by: `branchname` or `version`, how to sort the
+            collections having the same status.
+        :kwarg reverse: a boolean to sort the collections in descending
+            order.
+        :returns: a new list of ``CollectionEntry``.
+
+        """
+        if order_by == 'version':
+            key = lambda collection: _version_key(collection.version)
+        elif order_by == 'branchname':
+            key = operator.attrgetter('branchname')
+        else:
+            raise PkgdbException('Invalid order: %s' % order_by)
+
+        if status is None:
+            groups = [self.collections]
+        else:
+            if isinstance(status, basestring):
+                status = [status]
+            groups = [self.by_status.get(stat, ()) for stat in status]
+
+        output = []
+        for group in groups:
+            output.extend(sorted(
+                [
+                    collection
+                    for collection in group
+                    if name is None or collection.name == name
+                ],
+                key=key, reverse=reverse))
+        return output
+
+    def active(self, name=None, order_by='branchname', reverse=False):
+        """ Return the collections `Under Development` then the `Active`
+        ones, see ``search``.
+        """
+        return self.search(
+            status=['Under Development', 'Active'], name=name,
+            order_by=order_by, reverse=reverse)
+
+
+def get_collection_registry(session):
+    """ Return the ``CollectionRegistry`` of all the collections.
+
+    It is served from a snapshot kept in memory by this process (see
+    ``_get_snapshot``), unless the collections were changed in the session
+    and these changes are not committed yet.
+
+    :arg session: session with which to connnect to the database.
+    :rtype: CollectionRegistry
+
+    """
+    load = lambda session: CollectionRegistry(model.Collection.all(session))
+    if _is_snapshot_written(session, 'collections'):
+        return load(session)
+    return _get_snapshot(
+        session, 'collections', model.Collection.data_version, load)
 
 
 def get_top_maintainers(session, top=10):
@@ -1590,12 +2337,12 @@ def unorphan_package(
     _validate_poc(pkg_user)
 
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException('No package found by this name')
 
     try:
-        collection = model.Collection.by_name(session, pkg_branch)
+        collection = get_collection(session, pkg_branch)
     except NoResultFound:
         raise PkgdbException('No collection found by this name')
 
@@ -1634,9 +2381,7 @@ def unorphan_package(
         package_listing=pkg_listing.to_json(),
     ))
     if namespace == 'rpms':
-        pkgdb2.lib.utils.set_bugzilla_owner(
-            pkg_user, None, package.name, collection.name,
-            collection.version)
+        _reassign_bugs(session, pkg_user, None, package, collection)
 
     acls = ['commit', 'watchbugzilla', 'watchcommits', 'approveacls']
 
@@ -1667,19 +2412,29 @@ def unorphan_package(
     )
 
 
-def add_branch(session, clt_from, clt_to, user):
+def add_branch(session, clt_from, clt_to, user, chunk_size=1000,
+               dry_run=False, progress=None):
     """ Clone a the permission from a branch to another.
 
-    This method only flushes the new objects, the only thing committed is
-    the log message when the branching starts.
+    The package listings are branched in chunks of ``chunk_size`` using
+    INSERT ... SELECT statements, each chunk being committed on its own.
+    The packages already present in the collection branched to are
+    skipped, so branching again after a failure resumes where it stopped.
+    If a chunk fails, its package listings are branched one by one to
+    find out which of them fail.
 
     :arg session: session with which to connect to the database.
     :arg clt_from: the ``branchname`` of the collection to branch from.
     :arg clt_to: the ``branchname`` of the collection to branch to.
     :arg user: the user making the action.
-    :returns: a list of errors generated while branching, these errors
-        might be the results of trying to create a PackageListing object
-        already existing.
+    :kwarg chunk_size: the number of package listings branched at once.
+    :kwarg dry_run: a boolean to roll back each chunk instead of committing
+        it, nothing is logged then.
+    :kwarg progress: a function called after each chunk with the number of
+        package listings processed so far and the number of package
+        listings to branch.
+    :returns: a list of messages about the package listings branched, or
+        that failed to branch.
     :rtype: list(str)
     :raises pkgdb2.lib.PkgdbException: There are three conditions leading to
         this exception beeing raised:
@@ -1693,48 +2448,81 @@ def add_branch(session, clt_from, clt_to, user):
             clt_from, clt_to))
 
     try:
-        clt_from = model.Collection.by_name(session, clt_from)
+        clt_from = get_collection(session, clt_from)
     except NoResultFound:
         raise PkgdbException('Branch %s not found' % clt_from)
 
     try:
-        clt_to = model.Collection.by_name(session, clt_to)
+        clt_to = get_collection(session, clt_to)
     except NoResultFound:
         raise PkgdbException('Branch %s not found' % clt_to)
 
-    pkgdb2.lib.utils.log(session, None, 'branch.start', dict(
-        agent=user.username,
-        collection_from=clt_from.to_json(),
-        collection_to=clt_to.to_json(),
-    ))
-    session.commit()
+    if not dry_run:
+        pkgdb2.lib.utils.log(session, None, 'branch.start', dict(
+            agent=user.username,
+            collection_from=clt_from.to_json(),
+            collection_to=clt_to.to_json(),
+        ))
+        session.commit()
+
+    clt_names = (clt_from.name, clt_to.name, clt_to.version)
+    success = '%s/%s branched successfully from %s to %s %s'
+    if dry_run:
+        success = '%s/%s would be branched from %s to %s %s'
+
+    def _branch(chunk):
+        """ Branch the specified package listings at once, committing or
+        rolling back the changes. """
+        model.PackageListing.branch_many(
+            session, [listing[0] for listing in chunk], clt_to)
+        if dry_run:
+            session.rollback()
+        else:
+            session.commit()
 
+    total = model.PackageListing.to_branch(
+        session, clt_from, clt_to, count=True)
     messages = []
-    for pkglist in model.PackageListing.by_collectionid(
-            session, clt_from.id):
-        if pkglist.status in ('Approved','Orphaned'):
-            try:
-                pkglist.branch(session, clt_to)
-                # Should not fail since the flush() passed
-                session.commit()
-                messages.append(
-                    '%s/%s branched successfully from %s to %s %s' % (
-                        pkglist.package.namespace, pkglist.package.name,
-                        clt_from.name, clt_to.name, clt_to.version))
-            except SQLAlchemyError, err:  # pragma: no cover
-                session.rollback()
-                pkgdb2.LOG.debug(err)
-                messages.append(
-                    'FAILED: %s/%s failed to branch from %s to %s %s' % (
-                        pkglist.package.namespace, pkglist.package.name,
-                        clt_from.name, clt_to.name, clt_to.version))
-                messages.append(str(err))
-
-    pkgdb2.lib.utils.log(session, None, 'branch.complete', dict(
-        agent=user.username,
-        collection_from=clt_from.to_json(),
-        collection_to=clt_to.to_json(),
-    ))
+    done = 0
+    after = None
+    while True:
+        chunk = model.PackageListing.to_branch(
+            session, clt_from, clt_to, after=after, limit=chunk_size)
+        if not chunk:
+            break
+        after = chunk[-1][0]
+
+        try:
+            _branch(chunk)
+            messages.extend([
+                success % ((namespace, name) + clt_names)
+                for (_, namespace, name) in chunk
+            ])
+        except SQLAlchemyError, err:  # pragma: no cover
+            session.rollback()
+            pkgdb2.LOG.debug(err)
+            for listing in chunk:
+                try:
+                    _branch([listing])
+                    messages.append(success % (listing[1:] + clt_names))
+                except SQLAlchemyError, err:
+                    session.rollback()
+                    pkgdb2.LOG.debug(err)
+                    messages.append(
+                        'FAILED: %s/%s failed to branch from %s to %s %s'
+                        % (listing[1:] + clt_names))
+                    messages.append(str(err))
+
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+
+    if not dry_run:
+        pkgdb2.lib.utils.log(session, None, 'branch.complete', dict(
+            agent=user.username,
+            collection_from=clt_from.to_json(),
+            collection_to=clt_to.to_json(),
+        ))
 
     return messages
 
@@ -1755,13 +2543,13 @@ def add_new_branch_request(session, namespace, pkg_name, clt_to, user):
 
     """
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException(
             'Package %s/%s not found' % (namespace, pkg_name))
 
     try:
-        clt_to = model.Collection.by_name(session, clt_to)
+        clt_to = get_collection(session, clt_to)
     except NoResultFound:
         raise PkgdbException('Branch %s not found' % clt_to)
 
@@ -1873,14 +2661,14 @@ def add_new_package_request(
     _validate_poc(pkg_poc)
 
     try:
-        clt = model.Collection.by_name(session, pkg_collection)
+        clt = get_collection(session, pkg_collection)
     except NoResultFound:
         raise PkgdbException('Branch %s not found' % pkg_collection)
 
     # Prevent asking for an existing package
     package = None
     try:
-        package = model.Package.by_name(session, pkg_namespace, pkg_name)
+        package = get_package(session, pkg_namespace, pkg_name)
     except NoResultFound:
         pass
     if package:
@@ -1943,13 +2731,13 @@ def add_unretire_request(
 
     """
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException(
             'Package %s/%s not found' % (namespace, pkg_name))
 
     try:
-        pkg_branch = model.Collection.by_name(session, pkg_branch)
+        pkg_branch = get_collection(session, pkg_branch)
     except NoResultFound:
         raise PkgdbException('Branch %s not found' % pkg_branch)
 
@@ -1975,15 +2763,18 @@ def add_unretire_request(
     )
 
 
+@pkgdb2.cache_on_data_version
 def count_collection(session):
     """ Return the number of package 'Approved' for each collection.
 
     :arg session: the session to connect to the database with.
 
     """
-    return model.Package.count_collection(session)
+    return [
+        tuple(row) for row in model.Package.count_collection(session)]
 
 
+@pkgdb2.cache_on_data_version
 def count_fedora_collection(session):
     """ Return the number of package 'Approved' for each Fedora collection.
 
@@ -1994,7 +2785,7 @@ def count_fedora_collection(session):
 
     if collections_fedora:
         # We need to get devel out to sort the releases correctly
-        devel = collections_fedora.pop()
+        devel = tuple(collections_fedora.pop())
         collections_fedora = [[int(item[0]), item[1]]
                               for item in collections_fedora]
 
@@ -2004,6 +2795,32 @@ def count_fedora_collection(session):
     return collections_fedora
 
 
+def get_data_version(session):
+    """ Return the current version of the data in the database.
+
+    Every change made through pkgdb is logged and every transaction
+    logging changes increases the version when it commits (see
+    ``pkgdb2.lib.model.DataVersion``), thus the version changes every time
+    the data does, whatever the order in which the transactions commit.
+
+    :arg session: the session to connect to the database with.
+
+    """
+    return model.DataVersion.get(session)[0]
+
+
+def get_last_change(session):
+    """ Return the current version of the data (see ``get_data_version``)
+    and the time the last change made to the data was committed.
+
+    :arg session: the session to connect to the database with.
+    :returns: a tuple ``(version, date)``, ``(0, None)`` if no change was
+        ever made.
+
+    """
+    return model.DataVersion.get(session)
+
+
 def get_groups(session):
     """ Return the list of FAS groups involved in maintaining packages in
     the database
@@ -2014,6 +2831,158 @@ def get_groups(session):
     return model.get_groups(session)
 
 
+def get_fas_people(session, usernames):
+    """ Return the accounts of the specified users found in the local
+    mirror of FAS, as a dict keyed on their username.
+
+    :arg session: the session to connect to the database with.
+    :arg usernames: the usernames of the accounts to retrieve.
+
+    """
+    return model.FasPerson.get_many(session, usernames)
+
+
+def sync_fas_people(session, fas, search='*'):
+    """ Refresh the local mirror of the FAS accounts whose username
+    matches the specified pattern.
+
+    Only the differences are written: the accounts new in FAS are added,
+    the ones whose bugzilla email, groups or status changed are updated
+    and the ones no longer in FAS are removed.
+
+    :arg session: the session to connect to the database with.
+    :arg fas: the connection to FAS, see ``pkgdb2.lib.utils.get_fas``.
+    :kwarg search: the pattern the usernames should match, using ``*`` as
+        wildcard, defaults to every account.
+    :returns: a dict with the number of accounts ``added``, ``updated``
+        and ``removed``.
+
+    """
+    people = fas.people_by_key(
+        key='username', search=search,
+        fields=['bugzilla_email', 'status', 'memberships'])
+    mirrored = model.FasPerson.search(session, search)
+
+    output = {'added': 0, 'updated': 0, 'removed': 0}
+    for username, person in people.items():
+        groups = sorted(
+            group['name'] for group in person.get('memberships') or [])
+        entry = mirrored.pop(username, None)
+        if entry is None:
+            session.add(model.FasPerson(
+                username=username,
+                bugzilla_email=person.get('bugzilla_email'),
+                groups=groups,
+                status=person['status'],
+            ))
+            output['added'] += 1
+        elif (entry.bugzilla_email, entry.group_list, entry.status) != (
+                person.get('bugzilla_email'), groups, person['status']):
+            entry.bugzilla_email = person.get('bugzilla_email')
+            entry.groups = ' '.join(groups)
+            entry.status = person['status']
+            output['updated'] += 1
+
+    for entry in mirrored.values():
+        session.delete(entry)
+        output['removed'] += 1
+
+    session.flush()
+    return output
+
+
+def run_bugzilla_jobs(session, limit=10, max_attempts=None, backoff=None,
+                      now=None):
+    """ Run the oldest bugzilla jobs due, see ``model.BugzillaJob``.
+
+    Each job is committed once run. Jobs which failed are retried after
+    ``backoff`` seconds, doubled at each attempt, until they have been
+    attempted ``max_attempts`` times.
+
+    :arg session: the session to connect to the database with.
+    :kwarg limit: the maximum number of jobs to run.
+    :kwarg max_attempts: the number of attempts after which a job is
+        given up, defaults to ``PKGDB2_BUGZILLA_JOBS_MAX_ATTEMPTS``.
+    :kwarg backoff: the number of seconds to wait before the first retry,
+        defaults to ``PKGDB2_BUGZILLA_JOBS_BACKOFF``.
+    :kwarg now: the current time, defaults to ``datetime.utcnow()``.
+    :returns: a dict with the number of jobs ``done``, ``retried`` and
+        ``failed`` (given up). The jobs updated while they were running
+        are not counted, they are run again, from the point of contact the
+        bugs were just reassigned to if the run succeeded.
+
+    """
+    ## We catch Exception if we want :-p
+    # pylint: disable=W0703
+    if max_attempts is None:
+        max_attempts = pkgdb2.APP.config.get(
+            'PKGDB2_BUGZILLA_JOBS_MAX_ATTEMPTS', 5)
+    if backoff is None:
+        backoff = pkgdb2.APP.config.get('PKGDB2_BUGZILLA_JOBS_BACKOFF', 60)
+
+    output = {'done': 0, 'retried': 0, 'failed': 0}
+    for job in model.BugzillaJob.pending(session, limit=limit, now=now):
+        job_id, username = job.id, job.username
+        try:
+            pkgdb2.lib.utils.set_bugzilla_owner(
+                job.username, job.prev_poc, job.package_name,
+                job.collection_name, job.collection_version,
+                session=session)
+        except Exception, err:
+            if pkgdb2.lib.utils.schedule_retry(
+                    job, err, max_attempts, backoff,
+                    now or datetime.utcnow()):
+                result = 'retried'
+            else:
+                job.status = 'Failed'
+                result = 'failed'
+        else:
+            job.status = 'Done'
+            job.next_attempt = None
+            job.last_error = None
+            result = 'done'
+
+        try:
+            session.commit()
+        except StaleDataError:
+            # The job was updated while it was running, it will run again
+            session.rollback()
+            if result == 'done':
+                model.BugzillaJob.reassigned(session, job_id, username)
+                session.commit()
+        else:
+            output[result] += 1
+
+    return output
+
+
+def search_bugzilla_jobs(session, status=None, page=None, limit=None):
+    """ Return the bugzilla jobs with the specified status, the most
+    recently updated first.
+
+    :arg session: the session to connect to the database with.
+    :kwarg status: the status of the jobs to return.
+    :kwarg page: the page number to apply to the results.
+    :kwarg limit: the number of results to return.
+
+    """
+    offset = None
+    if page is not None and limit is not None:
+        offset = (page - 1) * limit
+    return model.BugzillaJob.search(
+        session, status=status, offset=offset, limit=limit)
+
+
+def count_bugzilla_jobs(session):
+    """ Return the number of bugzilla jobs in each status as a dict.
+
+    :arg session: the session to connect to the database with.
+
+    """
+    return model.BugzillaJob.count_by_status(session)
+
+
+@pkgdb2.cache_on_data_version
 def notify(session, eol=False, name=None, version=None, acls=None):
     """ Return the user that should be notify for each package.
 
@@ -2041,6 +3010,7 @@ def notify(session, eol=False, name=None, version=None, acls=None):
     return output
 
 
+@pkgdb2.cache_on_data_version
 def bugzilla(session, name=None):
     """ Return the information to sync ACLs with bugzilla.
 
@@ -2048,8 +3018,17 @@ def bugzilla(session, name=None):
     :kwarg name: restricts the output to a specific collection name.
 
     """
-    output = {}
     pkgs = model.bugzilla(session=session, name=name)
+    return _bugzilla_merge(pkgs)
+
+
+def _bugzilla_merge(pkgs):
+    """ For a given list of collection/package/point of contact/user
+    build a dict of dict listing for each collection, for each package the
+    information to sync with bugzilla.
+
+    """
+    output = {}
 
     # 0  Collection.name
     # 1  Collection.version
@@ -2117,6 +3096,25 @@ def bugzilla(session, name=None):
     return output
 
 
+def iter_bugzilla(session, name=None, yield_per=1000):
+    """ Iterate over the information to sync ACLs with bugzilla, one
+    package at a time, ordered by collection and package name.
+
+    The rows are fetched from the database in batches so only the
+    information of the package being processed is kept in memory.
+
+    :arg session: the session to connect to the database with.
+    :kwarg name: restricts the output to a specific collection name.
+    :kwarg yield_per: the number of rows fetched at once from the
+        database.
+
+    """
+    pkgs = model.bugzilla(session=session, name=name, yield_per=yield_per)
+    for (clt, pkg), rows in itertools.groupby(
+            pkgs, key=operator.itemgetter(0, 2)):
+        yield _bugzilla_merge(rows)[clt][pkg]
+
+
 def _vcs_acls_json(packages, skip_pp=None):
     """ For a given list of package/user/branch build a dict of dict
     representating of who has commit access to which package.
@@ -2253,6 +3251,65 @@ def _vcs_acls_text(packages, skip_pp=None):
     return output
 
 
+def iter_notify(
+        session, eol=False, name=None, version=None, acls=None,
+        yield_per=1000):
+    """ Iterate over the users that should be notified for each package,
+    yielding tuples ``(package, 'user1,user2')`` ordered by package name.
+
+    The rows are fetched from the database in batches so only the users
+    of the package being processed are kept in memory.
+
+    :arg session: the session to connect to the database with.
+    :kwarg eol: a boolean to specify wether the output should include End
+        Of Life releases or not.
+    :kwarg name: restricts the output to a specific collection name.
+    :kwarg version: restricts the output to a specific collection version.
+    :kwarg acls: a list of ACLs to filter the package/user to retrieve,
+        see ``notify``.
+    :kwarg yield_per: the number of rows fetched at once from the
+        database.
+
+    """
+    pkgs = model.notify(
+        session=session, eol=eol, name=name, version=version, acls=acls,
+        yield_per=yield_per)
+    for pkgname, rows in itertools.groupby(
+            pkgs, key=operator.itemgetter(0)):
+        yield (pkgname, ','.join(row[1] for row in rows))
+
+
+def iter_vcs_acls_text(
+        session, eol=False, collection=None, skip_pp=None, namespace=None,
+        yield_per=1000):
+    """ Iterate over the information to sync ACLs with gitolite, one
+    branch of a package at a time, ordered by package name and branch.
+
+    Each item is a dict as the ones returned by ``vcs_acls`` in its text
+    format. The rows are fetched from the database in batches so only the
+    ACLs of the branch being processed are kept in memory.
+
+    :arg session: the session to connect to the database with.
+    :kwarg eol: A boolean specifying whether to include information about
+        End Of Life collections or not. Defaults to ``False``.
+    :kwarg collection: Restrict the VCS info to a specific collection.
+    :kwarg skip_pp: A boolean to specify if we want to skip provenpackager
+        for some packages
+    :kwarg namespace: Restrict the ACLs returned to a given namespace
+
+    """
+    pkgs = model.vcs_acls(
+        session=session, eol=eol, collection=collection,
+        namespace=namespace, yield_per=yield_per)
+    for (pkgname, branchname), rows in itertools.groupby(
+            pkgs, key=operator.itemgetter(0, 2)):
+        rows = list(rows)
+        # The row without user is only kept if no-one has commit
+        data = [row for row in rows if row[1] is not None] or rows[:1]
+        yield _vcs_acls_text(data, skip_pp)[pkgname][branchname]
+
+
+@pkgdb2.cache_on_data_version
 def vcs_acls(
         session, eol=False, collection=None, oformat='text', skip_pp=None,
         namespace=None):
@@ -2310,20 +3367,19 @@ def set_critpath_packages(
         raise PkgdbException('You are not allowed to edit packages')
 
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException(
             'No package found by this name: %s/%s' % (namespace, pkg_name))
 
     try:
-        collection = model.Collection.by_name(session, pkg_branch)
+        collection = get_collection(session, pkg_branch)
     except NoResultFound:
         raise PkgdbException('No collection found by the name of %s'
                              % pkg_branch)
 
-    pkglisting = model.PackageListing.by_pkgid_collectionid(session,
-                                                            package.id,
-                                                            collection.id)
+    pkglisting = get_package_listing(
+        session, package.id, collection.id)
 
     if not pkglisting:
         raise PkgdbException(
@@ -2404,7 +3460,7 @@ def set_monitor_package(session, namespace, pkg_name, status, user):
 
     package = None
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException('No package found by this name')
 
@@ -2463,7 +3519,7 @@ def set_koschei_monitor_package(session, namespace, pkg_name, status, user):
 
     package = None
     try:
-        package = model.Package.by_name(session, namespace, pkg_name)
+        package = get_package(session, namespace, pkg_name)
     except NoResultFound:
         raise PkgdbException('No package found by this name')
 
@@ -2602,21 +3658,28 @@ def edit_action_status(
                 requests.extend(search_actions(
                     session, package=pkg, action='request.branch',
                     status='Awaiting Review'))
+                requests = [
+                    req for req in requests
+                    if req.collection.name.lower() == 'fedora'
+                ]
+                namespace = admin_action.info_data.get(
+                    'pkg_namespace', 'rpms')
+                results = set_acl_packages(
+                    session,
+                    [
+                        (namespace, pkg, req.collection.branchname,
+                         user.username, acl, 'Approved')
+                        for req in requests
+                        for acl in ['commit', 'watchbugzilla',
+                                    'watchcommits', 'approveacls']
+                    ],
+                    user=user,
+                    force=True,
+                )
+                for result in results:
+                    if isinstance(result, PkgdbException):
+                        raise result
                 for req in requests:
-                    if req.collection.name.lower() != 'fedora':
-                        continue
-                    for acl in ['commit', 'watchbugzilla',
-                                'watchcommits', 'approveacls']:
-                        set_acl_package(
-                            session,
-                            pkg_name=pkg,
-                            pkg_branch=req.collection.branchname,
-                            pkg_user=user.username,
-                            acl=acl,
-                            status='Approved',
-                            user=user,
-                            force=True,
-                        )
                     edit_action_status(session, req, 'Approved', user=user)
 
     else:
@@ -2667,6 +3730,7 @@ def add_namespace(session, namespace, user):
     try:
         session.add(ns)
         session.flush()
+        _snapshot_written(session, 'status')
         pkgdb2.lib.utils.log(session, None, 'namespace.new', dict(
             agent=user.username,
             namespace=namespace,
@@ -2712,6 +3776,7 @@ def drop_namespace(session, namespace, user):
     try:
         session.delete(ns)
         session.flush()
+        _snapshot_written(session, 'status')
         pkgdb2.lib.utils.log(session, None, 'namespace.drop', dict(
             agent=user.username,
             namespace=namespace,
@@ -26,21 +26,26 @@ Mapping of python classes to Database Tables.
 __requires__ = ['SQLAlchemy >= 0.7', 'jinja2 >= 2.4']
 import pkg_resources
 
+import base64
 import datetime
+import hashlib
 import json
 import logging
 import time
 
 import sqlalchemy as sa
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import backref
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm import relation
-from sqlalchemy.orm import backref
+from sqlalchemy.orm import subqueryload
 from sqlalchemy.sql import or_
 from sqlalchemy.sql import and_
 from sqlalchemy.sql import not_
@@ -122,6 +127,78 @@ def drop_tables(db_url, engine):  # pragma: no cover
     BASE.metadata.drop_all(engine)
 
 
+def encode_cursor(values):
+    ''' Return the opaque cursor pointing after a row whose sort key has
+    the provided values.
+
+    :arg values: the list of the values of the sort key of a row, these
+        can be strings, integers or datetimes.
+
+    '''
+    data = []
+    for value in values:
+        if isinstance(value, datetime.datetime):
+            value = {'datetime': value.strftime('%Y-%m-%dT%H:%M:%S.%f')}
+        data.append(value)
+    return base64.urlsafe_b64encode(json.dumps(data))
+
+
+def decode_cursor(cursor):
+    ''' Return the list of values of the sort key stored in the provided
+    cursor.
+
+    :arg cursor: a cursor as returned by ``encode_cursor``.
+    :raises ValueError: if the cursor provided is invalid.
+
+    '''
+    try:
+        data = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor: %s' % cursor)
+
+    if not isinstance(data, list):
+        raise ValueError('Invalid cursor: %s' % cursor)
+
+    values = []
+    for value in data:
+        if isinstance(value, dict):
+            value = datetime.datetime.strptime(
+                value.get('datetime', ''), '%Y-%m-%dT%H:%M:%S.%f')
+        values.append(value)
+    return values
+
+
+def _after_cursor(columns, values, descending=False):
+    ''' Return the filter restricting a query to the rows coming after
+    the one whose sort key has the provided values, when ordering on the
+    provided columns.
+
+    :arg columns: the list of columns the query is ordered by.
+    :arg values: the values of these columns for the last row seen.
+    :kwarg descending: a boolean specifying whether the query is sorted
+        in descending order rather than ascending.
+
+    '''
+    if len(columns) != len(values):
+        raise ValueError('Invalid cursor for this query')
+
+    column, value = columns[0], values[0]
+    if descending:
+        clause = column < value
+    else:
+        clause = column > value
+
+    if len(columns) > 1:
+        clause = or_(
+            clause,
+            and_(
+                column == value,
+                _after_cursor(columns[1:], values[1:], descending)
+            )
+        )
+    return clause
+
+
 def create_status(session):
     """ Fill in the status tables. """
     for acl in ['commit', 'watchbugzilla', 'watchcommits', 'approveacls']:
@@ -295,6 +372,38 @@ class Namespace(BASE):
         return query.first()
 
 
+STATUS_TABLES = [
+    ('clt_status', CollecStatus),
+    ('pkg_status', PkgStatus),
+    ('pkg_acl', PkgAcls),
+    ('acl_status', AclStatus),
+    ('admin_status', ActionStatus),
+    ('namespaces', Namespace),
+]
+
+
+def status_version(session):
+    """ Return a hash of the content of all the status tables, retrieved
+    in a single query.
+
+    These tables only hold a few dozen rows, the hash changes whenever
+    any of them is added, removed or renamed.
+
+    :arg session: the session to connect to the database with.
+    :rtype: str
+
+    """
+    query = sa.union_all(*[
+        sa.select([
+            sa.literal(key).label('name'),
+            list(cls.__table__.primary_key)[0].label('value'),
+        ])
+        for key, cls in STATUS_TABLES
+    ])
+    rows = sorted(tuple(row) for row in session.execute(query))
+    return hashlib.sha1(json.dumps(rows)).hexdigest()
+
+
 class PackageListingAcl(BASE):
     """Give a person or a group ACLs on a specific PackageListing.
 
@@ -328,6 +437,12 @@ class PackageListingAcl(BASE):
 
     __table_args__ = (
         sa.UniqueConstraint('fas_name', 'packagelisting_id', 'acl'),
+        sa.Index(
+            'ix_packagelistingacl_packagelisting_id_acl_status',
+            'packagelisting_id', 'acl', 'status'),
+        sa.Index(
+            'ix_packagelistingacl_fas_name_acl_status',
+            'fas_name', 'acl', 'status'),
     )
 
     @classmethod
@@ -381,7 +496,7 @@ class PackageListingAcl(BASE):
     @classmethod
     def get_acl_packager(
             cls, session, packager, acls=None, eol=False, poc=None,
-            offset=None, limit=None, count=False):
+            offset=None, limit=None, count=False, after=None):
         """ Retrieve the ACLs associated with a packager.
 
         :arg session: the database session used to connect to the
@@ -408,6 +523,9 @@ class PackageListingAcl(BASE):
         :kwarg limit: the number of results to return
         :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+        :kwarg after: the sort key, as returned by ``decode_cursor``, of
+            the last ACL already seen, only the ACLs coming after it are
+            returned.
 
         """
 
@@ -453,6 +571,10 @@ class PackageListingAcl(BASE):
 
         query = query.order_by(PackageListingAcl.id)
 
+        if after:
+            query = query.filter(
+                _after_cursor([PackageListingAcl.id], after))
+
         if offset:
             query = query.offset(offset)
         if limit:
@@ -460,6 +582,46 @@ class PackageListingAcl(BASE):
 
         return query.all()
 
+    @classmethod
+    def has_acls(cls, session, user, namespace, package, acls, branch=None):
+        """ Return whether the specified user has one of the specified ACLs
+        approved on the specified package, using a single EXISTS query.
+
+        :arg session: the database session used to connect to the
+            database.
+        :arg user: the username of the packager.
+        :arg namespace: the namespace of the package.
+        :arg package: the name of the package.
+        :arg acls: the list of ACLs to check for.
+        :kwarg branch: the branchname of the collection to restrict the
+            check to.
+
+        """
+        query = session.query(cls.id).filter(
+            PackageListingAcl.fas_name == user
+        ).filter(
+            PackageListingAcl.acl.in_(acls)
+        ).filter(
+            PackageListingAcl.status == 'Approved'
+        ).filter(
+            PackageListingAcl.packagelisting_id == PackageListing.id
+        ).filter(
+            PackageListing.package_id == Package.id
+        ).filter(
+            Package.name == package
+        ).filter(
+            Package.namespace == namespace
+        )
+
+        if branch:
+            query = query.filter(
+                PackageListing.collection_id == Collection.id
+            ).filter(
+                Collection.branchname == branch
+            )
+
+        return session.query(query.exists()).scalar()
+
     @classmethod
     def get_acl_package(cls, session, user, namespace, package,
                         status="Awaiting Review"):
@@ -526,6 +688,28 @@ class PackageListingAcl(BASE):
             PackageListingAcl.acl == acl
         ).first()
 
+    @classmethod
+    def get_many(cls, session, users, packagelisting_ids):
+        """ Retrieve all the ACLs the specified persons have on the
+        specified PackageListings.
+
+        :arg session: the database session used to connect to the
+            database
+        :arg users: the usernames
+        :arg packagelisting_ids: the identifiers of the PackageListing
+            entries.
+
+        """
+        if not users or not packagelisting_ids:
+            return []
+        return session.query(
+            PackageListingAcl
+        ).filter(
+            PackageListingAcl.fas_name.in_(users)
+        ).filter(
+            PackageListingAcl.packagelisting_id.in_(packagelisting_ids)
+        ).all()
+
     @classmethod
     def create(cls, session, user, packagelisting_id, acl, status):
         """ Creates the PersonPackageListing which associates a person
@@ -550,6 +734,39 @@ class PackageListingAcl(BASE):
 
         return personpkg
 
+    @classmethod
+    def create_many(cls, session, acls):
+        """ Creates at once, in a single INSERT statement, the
+        PersonPackageListings associating persons with packages in certain
+        collections.
+
+        As these are not created through the ORM, the ``effective_acls`` of
+        the PackageListings concerned are refreshed here.
+
+        :arg session: the database session used to connect to the
+            database
+        :arg acls: a list of (user, packagelisting_id, acl, status) tuples
+
+        """
+        if not acls:
+            return
+
+        session.execute(
+            cls.__table__.insert(),
+            [
+                dict(
+                    fas_name=user,
+                    packagelisting_id=packagelisting_id,
+                    acl=acl,
+                    status=status,
+                )
+                for (user, packagelisting_id, acl, status) in acls
+            ]
+        )
+        EffectiveAcl.refresh(
+            session,
+            listing_ids=list(set([item[1] for item in acls])))
+
     @classmethod
     def get_pending_acl(cls, session, user=None):
         """ Return for all the packages of which `user` is point of
@@ -609,6 +826,11 @@ class PackageListingAcl(BASE):
 
         return query.all()
 
+    @property
+    def cursor(self):
+        """ Return the cursor pointing after this ACL. """
+        return encode_cursor([self.id])
+
     def __init__(self, fas_name, packagelisting_id, acl, status):
         """ Constructor.
 
@@ -732,6 +954,35 @@ class Collection(BASE):
             Collection.branchname == branch_name).one()
         return collection
 
+    @classmethod
+    def data_version(cls, session):
+        """ Return the number of collections, their highest identifier and
+        the last time one of them was updated, retrieved in a single query.
+        These change whenever a collection is added, removed or updated.
+
+        :arg session: the session to connect to the database with.
+        :rtype: tuple
+
+        """
+        return tuple(session.query(
+            sa.func.count(cls.id),
+            sa.func.max(cls.id),
+            sa.func.max(cls.date_updated),
+        ).one())
+
+    @classmethod
+    def by_names(cls, session, branch_names):
+        """Return the Collections matching the given branch names.
+
+        :arg branch_names: list of branch names of Collections
+        :returns: The Collections found, in no particular order
+
+        """
+        if not branch_names:
+            return []
+        return session.query(cls).filter(
+            Collection.branchname.in_(branch_names)).all()
+
     @classmethod
     def all(cls, session):
         """ Return the list of all Collections present in the database.
@@ -813,6 +1064,12 @@ class PackageListing(BASE):
                               onupdate=sa.func.now())
     __table_args__ = (
         sa.UniqueConstraint('package_id', 'collection_id'),
+        sa.Index(
+            'ix_packagelisting_collection_id_status',
+            'collection_id', 'status'),
+        sa.Index(
+            'ix_packagelisting_package_id_collection_id_status',
+            'package_id', 'collection_id', 'status'),
     )
 
     package = relation("Package")
@@ -820,6 +1077,7 @@ class PackageListing(BASE):
     acls = relation(
         PackageListingAcl,
         backref=backref('packagelisting'),
+        order_by=PackageListingAcl.id,
     )
 
     def __init__(self, point_of_contact, status, package_id=None,
@@ -905,19 +1163,172 @@ class PackageListing(BASE):
         session.flush()
 
     @classmethod
-    def by_package_id(cls, session, pkgid):
+    def to_branch(cls, session, clt_from, clt_to, after=None, limit=None,
+                  count=False):
+        """Return the PackageListings of a collection which are not yet
+        branched to another, ordered by identifier.
+
+        Only the PackageListings which are `Approved` or `Orphaned` are
+        branched.
+
+        :arg clt_from: the Collection object to branch from.
+        :arg clt_to: the Collection object to branch to.
+        :kwarg after: only return the PackageListings whose identifier is
+            greater than this one.
+        :kwarg limit: the maximum number of PackageListings to return.
+        :kwarg count: a boolean to return the number of PackageListings
+            to branch instead of the list.
+        :returns: a list of (identifier, package namespace, package name)
+            tuples, or their number if ``count`` is True.
+
+        """
+        branched = sa.orm.aliased(PackageListing)
+        query = session.query(
+            PackageListing.id, Package.namespace, Package.name
+        ).filter(
+            PackageListing.package_id == Package.id
+        ).filter(
+            PackageListing.collection_id == clt_from.id
+        ).filter(
+            PackageListing.status.in_(['Approved', 'Orphaned'])
+        ).filter(
+            ~session.query(
+                branched.id
+            ).filter(
+                branched.package_id == PackageListing.package_id
+            ).filter(
+                branched.collection_id == clt_to.id
+            ).exists()
+        )
+
+        if after:
+            query = query.filter(PackageListing.id > after)
+
+        if count:
+            return query.count()
+
+        query = query.order_by(PackageListing.id)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    @classmethod
+    def branch_many(cls, session, listing_ids, clt_to):
+        """Clone at once the permissions of several PackageListings to
+        another `Branch`, using INSERT ... SELECT statements.
+
+        As these are not created through the ORM, the ``effective_acls`` of
+        the new PackageListings are refreshed here.
+
+        :arg listing_ids: the identifiers of the PackageListings to branch.
+        :arg clt_to: the Collection object to branch to (ie: new Fedora or
+            new EPEL).
+        :returns: the number of ACLs branched.
+
+        """
+        if not listing_ids:
+            return 0
+
+        listings = cls.__table__
+        acls = PackageListingAcl.__table__
+        now = datetime.datetime.utcnow()
+
+        session.execute(listings.insert().from_select(
+            ['point_of_contact', 'status', 'package_id', 'collection_id',
+             'critpath', 'status_change'],
+            sa.select([
+                listings.c.point_of_contact,
+                listings.c.status,
+                listings.c.package_id,
+                sa.literal(clt_to.id, sa.Integer),
+                listings.c.critpath,
+                sa.literal(now, sa.DateTime),
+            ]).where(
+                listings.c.id.in_(listing_ids)
+            ).order_by(
+                listings.c.id
+            )
+        ))
+
+        source = listings.alias('source')
+        branched = listings.alias('branched')
+        result = session.execute(acls.insert().from_select(
+            ['fas_name', 'packagelisting_id', 'acl', 'status',
+             'date_created'],
+            sa.select([
+                acls.c.fas_name,
+                branched.c.id,
+                acls.c.acl,
+                acls.c.status,
+                sa.literal(now, sa.DateTime),
+            ]).where(
+                acls.c.packagelisting_id == source.c.id
+            ).where(
+                branched.c.package_id == source.c.package_id
+            ).where(
+                branched.c.collection_id == clt_to.id
+            ).where(
+                source.c.id.in_(listing_ids)
+            ).order_by(
+                acls.c.id
+            )
+        ))
+
+        new_ids = [
+            row[0] for row in session.execute(
+                sa.select([branched.c.id]).where(
+                    branched.c.collection_id == clt_to.id
+                ).where(
+                    branched.c.package_id.in_(
+                        sa.select([source.c.package_id]).where(
+                            source.c.id.in_(listing_ids)))
+                )
+            )
+        ]
+        EffectiveAcl.refresh(session, listing_ids=new_ids)
+
+        return result.rowcount
+
+    @classmethod
+    def serialization_options(cls, acls=True):
+        """ Return the loader options to apply to a query returning
+        PackageListing so that everything ``to_json`` relies on is loaded
+        in a fixed number of queries instead of one query per listing.
+
+        :kwarg acls: a boolean specifying whether the ACLs of the listings
+            should be loaded as well.
+
+        """
+        options = [
+            joinedload(cls.package),
+            joinedload(cls.collection),
+        ]
+        if acls:
+            options.append(subqueryload(cls.acls))
+        return options
+
+    @classmethod
+    def by_package_id(cls, session, pkgid, eager=False):
         """ Return the PackageListing object based on the Package ID.
 
         :arg pkgid: Integer, identifier of the package in the Package
             table
+        :kwarg eager: a boolean specifying whether to load the package,
+            collection and ACLs of the listings along with them, in order
+            to serialize them.
 
         """
 
-        return session.query(cls).filter(
+        query = session.query(cls).filter(
             PackageListing.package_id == pkgid
         ).order_by(
             PackageListing.collection_id
-        ).all()
+        )
+
+        if eager:
+            query = query.options(*cls.serialization_options())
+
+        return query.all()
 
     @classmethod
     def by_pkgid_collectionid(cls, session, pkgid, collectionid):
@@ -939,6 +1350,51 @@ class PackageListing(BASE):
             PackageListing.collection_id == collectionid
         ).first()
 
+    @classmethod
+    def by_pkgids_collectionids(cls, session, pkgids, collectionids):
+        """Return the PackageListings of the provided packages in the
+        specified collections.
+
+        :arg pkgids: list of identifiers of packages in the Package table
+        :arg collectionids: list of identifiers of collections in the
+            Collection table
+        :returns: The PackageListings found, in no particular order
+
+        """
+        if not pkgids or not collectionids:
+            return []
+        return session.query(cls).filter(
+            PackageListing.package_id.in_(pkgids)
+        ).filter(
+            PackageListing.collection_id.in_(collectionids)
+        ).all()
+
+    @classmethod
+    def with_acl(cls, session, user, acl, pkgids, status='Approved'):
+        """Return the PackageListings of the provided packages on which
+        the specified user has the specified ACL.
+
+        :arg user: the username
+        :arg acl: the ACL the user should have
+        :arg pkgids: list of identifiers of packages in the Package table
+        :kwarg status: the status of the ACL
+        :returns: The PackageListings found, in no particular order
+
+        """
+        if not pkgids:
+            return []
+        return session.query(cls).filter(
+            PackageListing.package_id.in_(pkgids)
+        ).filter(
+            PackageListing.id == PackageListingAcl.packagelisting_id
+        ).filter(
+            PackageListingAcl.fas_name == user
+        ).filter(
+            PackageListingAcl.acl == acl
+        ).filter(
+            PackageListingAcl.status == status
+        ).all()
+
     @classmethod
     def by_collectionid(cls, session, collectionid):
         """Return all the PackageListing for the specified collection.
@@ -1009,7 +1465,7 @@ class PackageListing(BASE):
 
     @classmethod
     def search_packagers(cls, session, pattern, eol=False, offset=None,
-                         limit=None, count=False):
+                         limit=None, count=False, after=None):
         """ Return all the packagers whose name match the pattern.
         Are packagers user having at least one commit ACL on one package.
 
@@ -1025,6 +1481,9 @@ class PackageListing(BASE):
         :kwarg limit: the number of results to return
         :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+        :kwarg after: the sort key, as returned by ``decode_cursor``, of
+            the last packager already seen, only the packagers coming after
+            it are returned.
 
         """
         query = session.query(
@@ -1052,6 +1511,10 @@ class PackageListing(BASE):
         if count:
             return query.count()
 
+        if after:
+            query = query.filter(
+                _after_cursor([PackageListingAcl.fas_name], after))
+
         if offset:
             query = query.offset(offset)
         if limit:
@@ -1186,6 +1649,30 @@ class Package(BASE):
             Package.namespace == namespace
         ).one()
 
+    @classmethod
+    def by_names(cls, session, names):
+        """ Return the packages associated to the given names.
+
+        :arg names: list of (namespace, name) tuples
+        :returns: The packages found, in no particular order
+
+        """
+        per_namespace = {}
+        for namespace, pkgname in names:
+            per_namespace.setdefault(namespace, set()).add(pkgname)
+        if not per_namespace:
+            return []
+
+        return session.query(cls).filter(
+            or_(*[
+                and_(
+                    Package.namespace == namespace,
+                    Package.name.in_(sorted(pkgnames)),
+                )
+                for namespace, pkgnames in per_namespace.items()
+            ])
+        ).all()
+
     @property
     def requests_open(self):
         """ Returns the list of open requests (Pending or Awaiting Review)
@@ -1242,6 +1729,11 @@ class Package(BASE):
             monitor = False
         return monitor
 
+    @property
+    def cursor(self):
+        """ Return the cursor pointing after this package. """
+        return encode_cursor([self.name, self.id])
+
     def __hash__(self):
         """ Returns the name of the package as hash. """
         ord3 = lambda arg: '%.3d' % ord(arg)
@@ -1342,18 +1834,39 @@ class Package(BASE):
 
         return query.all()
 
+    @classmethod
+    def serialization_options(cls, acls=True):
+        """ Return the loader options to apply to a query returning
+        Package so that the listings, their collection and, if asked, their
+        ACLs are loaded in a fixed number of queries whatever the number of
+        packages returned.
+
+        :kwarg acls: a boolean specifying whether the ACLs of the listings
+            should be loaded as well.
+
+        """
+        options = [
+            subqueryload(cls.listings).joinedload(PackageListing.collection),
+        ]
+        if acls:
+            options.append(
+                subqueryload(cls.listings).subqueryload(PackageListing.acls))
+        return options
+
     @classmethod
     def search(
             cls, session, namespace, pkg_name, pkg_poc=None, pkg_status=None,
             pkg_branch=None, orphaned=None, critpath=None, eol=False,
-            offset=None, limit=None, count=False, case_sensitive=True):
+            offset=None, limit=None, count=False, case_sensitive=True,
+            eager=False, after=None, total=False):
         """ Search the Packages for the one fitting the given pattern.
 
         :arg session: session with which to connect to the database
         :arg pkg_name: the name of the package
         :kwarg pkg_poc: name of the new point of contact for the package
-        :kwarg pkg_status: status of the package
-        :kwarg pkg_branch: branchname of the collection to search.
+        :kwarg pkg_status: one or more status of the package
+        :kwarg pkg_branch: one or more branchname of the collection to
+            search.
         :kwarg orphaned: a boolean specifying if the search should be
             restricted to only orphaned or not-orphaned packages.
         :kwarg critpath: Boolean to retrict the search to critpath packages.
@@ -1369,8 +1882,22 @@ class Package(BASE):
             if true, returns the data if false (default).
         :kwarg case_sensitive: a boolean to specify doing a case insensitive
             search. Defaults to True.
+        :kwarg eager: a boolean specifying whether to load the listings,
+            collections and ACLs of the packages returned, in order to
+            serialize them with their ACLs.
+        :kwarg after: the sort key, as returned by ``decode_cursor``, of
+            the last package already seen, only the packages coming after
+            it are returned.
+        :kwarg total: a boolean specifying whether to return, in addition
+            to the packages, the total number of packages matching the
+            criterias regardless of ``offset`` and ``limit``. If True the
+            method returns a tuple ``(packages, total)``.
 
         """
+        if isinstance(pkg_status, basestring):
+            pkg_status = [pkg_status]
+        if isinstance(pkg_branch, basestring):
+            pkg_branch = [pkg_branch]
 
         query = session.query(
             sa.func.distinct(Package.id)
@@ -1410,7 +1937,7 @@ class Package(BASE):
             query = query.filter(
                 PackageListing.package_id == Package.id
             ).filter(
-                PackageListing.status == pkg_status
+                PackageListing.status.in_(pkg_status)
             ).filter(
                 PackageListing.collection_id == Collection.id
             ).filter(
@@ -1423,7 +1950,7 @@ class Package(BASE):
             ).filter(
                 PackageListing.collection_id == Collection.id
             ).filter(
-                Collection.branchname == pkg_branch
+                Collection.branchname.in_(pkg_branch)
             )
 
         if orphaned is not None:
@@ -1461,18 +1988,45 @@ class Package(BASE):
         ).filter(
             Package.id.in_(query.subquery())
         ).order_by(
-            Package.name
+            Package.name, Package.id
         )
 
         if count:
             return final_query.count()
 
+        if after:
+            final_query = final_query.filter(
+                _after_cursor([Package.name, Package.id], after))
+
+        if total:
+            # Retrieve the number of packages in the same query as the
+            # packages themselves
+            paged_query = final_query.add_columns(
+                sa.func.count(Package.id).over())
+        else:
+            paged_query = final_query
+
         if offset:
-            final_query = final_query.offset(offset)
+            paged_query = paged_query.offset(offset)
         if limit:
-            final_query = final_query.limit(limit)
+            paged_query = paged_query.limit(limit)
 
-        return final_query.all()
+        if eager:
+            paged_query = paged_query.options(*cls.serialization_options())
+
+        if not total:
+            return paged_query.all()
+
+        rows = paged_query.all()
+        packages = [row[0] for row in rows]
+        if rows:
+            cnt = rows[0][1]
+        elif offset:
+            # Asked for a page after the last one
+            cnt = final_query.count()
+        else:
+            cnt = 0
+        return (packages, cnt)
 
     @classmethod
     def count_collection(cls, session):
@@ -1713,6 +2267,10 @@ class Package(BASE):
         return result
 
 
+# Used by the case insensitive searches of Package.search()
+sa.Index('ix_package_lower_name', sa.func.lower(Package.name))
+
+
 class Log(BASE):
     """Base Log record.
 
@@ -1733,11 +2291,21 @@ class Log(BASE):
         nullable=True,
         index=True)
     description = sa.Column(sa.Text, nullable=False)
+    topic = sa.Column(sa.String(50), nullable=True)
+    details = sa.Column(sa.Text, nullable=True)
+    commit_seq = sa.Column(sa.Integer, nullable=True, index=True)
+
+    __table_args__ = (
+        sa.Index('ix_log_package_id_change_time', 'package_id', 'change_time'),
+    )
 
-    def __init__(self, user, package_id, description):
+    def __init__(self, user, package_id, description, topic=None,
+                 details=None):
         self.user = user
         self.package_id = package_id
         self.description = description
+        self.topic = topic
+        self.details = details
 
     def __repr__(self):
         """ The string representation of this object.
@@ -1747,10 +2315,90 @@ class Log(BASE):
             self.user, self.description,
             self.change_time.strftime('%Y-%m-%d %H:%M:%S'))
 
+    @property
+    def cursor(self):
+        """ Return the cursor pointing after this log entry. """
+        return encode_cursor([self.change_time, self.id])
+
+    @property
+    def change_cursor(self):
+        """ Return the cursor pointing after this log entry in the feed of
+        changes, see ``get_changes``. """
+        return encode_cursor([self.commit_seq, self.id])
+
+    def to_json(self, _seen=None):
+        """ Return a dictionnary representation of this log entry as a
+        change, with the structured information logged with it.
+
+        The entries logged before the structured information was recorded
+        only have their user, date and description set.
+
+        """
+        details = {}
+        if self.details:
+            details = json.loads(self.details)
+
+        return dict(
+            topic=self.topic,
+            user=self.user,
+            date=time.mktime(self.change_time.timetuple()),
+            description=self.description,
+            namespace=details.get('namespace'),
+            package=details.get('package'),
+            branch=details.get('branch'),
+            username=details.get('username'),
+            acl=details.get('acl'),
+            old_value=details.get('old_value'),
+            new_value=details.get('new_value'),
+            cursor=self.change_cursor,
+        )
+
+    @classmethod
+    def get_changes(cls, session, package_id=None, topics=None, limit=None,
+                    after=None):
+        """ Return the log entries in the order they were committed.
+
+        The identifiers of the log entries are handed out when they are
+        inserted, not when they are committed, a transaction may thus
+        commit an entry after another transaction committed an entry with
+        a higher identifier. The entries are instead sorted on the version
+        of the data (see ``DataVersion``) their transaction committed,
+        which is assigned in the order the transactions commit. The
+        entries not committed yet have none and are not returned.
+
+        :arg cls: the class object
+        :arg session: the database session used to query the information.
+        :kwarg package_id: retrict the entries to a certain package.
+        :kwarg topics: restrict the entries to a list of topics.
+        :kwarg limit: limit the result to X row
+        :kwarg after: the sort key, as returned by ``decode_cursor``, of
+            the last entry already seen, only the entries committed after it
+            are returned.
+
+        """
+        query = session.query(cls).filter(
+            cls.commit_seq != None
+        ).order_by(cls.commit_seq, cls.id)
+
+        if package_id:
+            query = query.filter(cls.package_id == package_id)
+
+        if topics:
+            query = query.filter(cls.topic.in_(topics))
+
+        if after:
+            query = query.filter(
+                _after_cursor([cls.commit_seq, cls.id], after))
+
+        if limit:
+            query = query.limit(limit)
+
+        return query.all()
+
     @classmethod
     def search(cls, session, package_id=None, packager=None,
                from_date=None, limit=None,
-               offset=None, count=False):
+               offset=None, count=False, after=None):
         """ Return the list of the last Log entries present in the database.
 
         :arg cls: the class object
@@ -1762,6 +2410,9 @@ class Log(BASE):
         :kwarg offset: start the result at row X
         :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+        :kwarg after: the sort key, as returned by ``decode_cursor``, of
+            the last log entry already seen, only the entries older than it
+            are returned.
 
         """
         query = session.query(
@@ -1777,11 +2428,15 @@ class Log(BASE):
         if from_date:
             query = query.filter(cls.change_time <= from_date)
 
-        query = query.order_by(cls.change_time.desc())
+        query = query.order_by(cls.change_time.desc(), cls.id.desc())
 
         if count:
             return query.count()
 
+        if after:
+            query = query.filter(_after_cursor(
+                [cls.change_time, cls.id], after, descending=True))
+
         if offset:
             query = query.offset(offset)
         if limit:
@@ -1790,7 +2445,8 @@ class Log(BASE):
         return query.all()
 
     @classmethod
-    def insert(cls, session, user, package, description):
+    def insert(cls, session, user, package, description, topic=None,
+               details=None):
         """ Insert the given log entry into the database.
 
         :arg session: the session to connect to the database with
@@ -1798,16 +2454,78 @@ class Log(BASE):
         :arg package: the `Package` object of the package changed
         :arg description: a short textual description of the action
             performed
+        :kwarg topic: the fedmsg topic of the action performed
+        :kwarg details: a dict of the structured information about the
+            action performed, see ``to_json``
 
         """
+        if details is not None:
+            details = json.dumps(details)
         if package:
-            log = Log(user, package.id, description)
+            log = Log(user, package.id, description, topic, details)
         else:
-            log = Log(user, None, description)
+            log = Log(user, None, description, topic, details)
         session.add(log)
         session.flush()
 
 
+class DataVersion(BASE):
+    """ Single row table holding the version of the data, increased by
+    every transaction logging a change when it commits, see
+    ``_assign_commit_seq``.
+
+    The row stays locked from the time it is increased until the
+    transaction commits, the versions are thus assigned in the order the
+    transactions commit and the version read is always the one of the last
+    transaction committed.
+
+    Table -- data_version
+    """
+
+    __tablename__ = 'data_version'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    version = sa.Column(sa.Integer, nullable=False, default=0)
+    date_updated = sa.Column(
+        sa.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    @classmethod
+    def get(cls, session):
+        """ Return the current version of the data and the time it was
+        committed, as a tuple, ``(0, None)`` if no change was committed.
+
+        :arg session: the session to connect to the database with
+
+        """
+        table = cls.__table__
+        row = session.execute(
+            sa.select([table.c.version, table.c.date_updated]).where(
+                table.c.id == 1)
+        ).first()
+        if row is None:
+            return (0, None)
+        return tuple(row)
+
+    @classmethod
+    def bump(cls, session):
+        """ Increase the version of the data and return the new version.
+
+        :arg session: the session to connect to the database with
+
+        """
+        table = cls.__table__
+        now = datetime.datetime.utcnow()
+        result = session.execute(table.update().where(
+            table.c.id == 1
+        ).values(version=table.c.version + 1, date_updated=now))
+        if not result.rowcount:
+            session.execute(table.insert().values(
+                id=1, version=1, date_updated=now))
+        return session.execute(
+            sa.select([table.c.version]).where(table.c.id == 1)
+        ).scalar()
+
+
 class AdminAction(BASE):
     """This table stores the actions asked by user and requiring an
     intervention from an admin (often a rel-eng person).
@@ -1847,6 +2565,8 @@ class AdminAction(BASE):
     __table_args__ = (
         sa.UniqueConstraint(
             'user', 'action', 'package_id', 'collection_id'),
+        sa.Index(
+            'ix_admin_actions_status_date_created', 'status', 'date_created'),
     )
 
     package = relation(
@@ -1879,6 +2599,11 @@ class AdminAction(BASE):
                 return 'Awaiting Review'
         return self._status
 
+    @property
+    def cursor(self):
+        """ Return the cursor pointing after this action. """
+        return encode_cursor([self.date_created, self.id])
+
     def to_json(self, _seen=None, acls=True, package=True, collection=None):
         """ Return a dictionnary representation of the object.
 
@@ -1910,7 +2635,8 @@ class AdminAction(BASE):
     @classmethod
     def search(cls, session, package_id=None, collection_id=None,
                packager=None, action=None, user=None,
-               status=None, offset=None, limit=None, count=False):
+               status=None, offset=None, limit=None, count=False,
+               after=None):
         """ Return the list of actions present in the database and
         matching these criterias.
 
@@ -1925,6 +2651,9 @@ class AdminAction(BASE):
         :kwarg offset: start the result at row X
         :kwarg count: a boolean to return the result of a COUNT query
             if true, returns the data if false (default).
+        :kwarg after: the sort key, as returned by ``decode_cursor``, of
+            the last action already seen, only the actions coming after it
+            are returned.
 
         """
         query = session.query(
@@ -1979,11 +2708,15 @@ class AdminAction(BASE):
                     )
                 )
 
-        query = query.order_by(cls.date_created.asc())
+        query = query.order_by(cls.date_created.asc(), cls.id.asc())
 
         if count:
             return query.count()
 
+        if after:
+            query = query.filter(
+                _after_cursor([cls.date_created, cls.id], after))
+
         if offset:
             query = query.offset(offset)
         if limit:
@@ -2006,7 +2739,712 @@ class AdminAction(BASE):
         return query.first()
 
 
-def notify(session, eol=False, name=None, version=None, acls=None):
+class EffectiveAcl(BASE):
+    """Denormalized view of the approved ACLs of every package listing,
+    used to build the bulk exports (vcs, bugzilla, notify) without joining
+    the Package, PackageListing, PackageListingAcl and Collection tables.
+
+    Every package listing has one row with no ``acl`` nor ``fas_name`` and
+    one row per approved ACL set on it.
+
+    This table is kept up to date when the session is flushed, see
+    ``_refresh_effective_acls_on_flush``.
+
+    Table -- effective_acls
+    """
+
+    __tablename__ = 'effective_acls'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    packagelisting_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey(
+            'PackageListing.id', ondelete='CASCADE', onupdate='CASCADE'),
+        nullable=False,
+        index=True)
+    packagelistingacl_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey(
+            'PackageListingAcl.id', ondelete='CASCADE', onupdate='CASCADE'),
+        nullable=True)
+    fas_name = sa.Column(sa.String(32), nullable=True)
+    acl = sa.Column(sa.String(50), nullable=True)
+    package_id = sa.Column(sa.Integer, nullable=False, index=True)
+    package_name = sa.Column(sa.Text, nullable=False)
+    package_namespace = sa.Column(sa.String(50), nullable=False)
+    package_summary = sa.Column(sa.Text, nullable=False)
+    package_status = sa.Column(sa.String(50), nullable=False)
+    collection_id = sa.Column(sa.Integer, nullable=False, index=True)
+    collection_name = sa.Column(sa.Text, nullable=False)
+    collection_version = sa.Column(sa.Text, nullable=False)
+    collection_branchname = sa.Column(sa.String(32), nullable=False)
+    collection_status = sa.Column(sa.String(50), nullable=False)
+    status = sa.Column(sa.String(50), nullable=False)
+    point_of_contact = sa.Column(sa.Text, nullable=False)
+
+    __table_args__ = (
+        sa.Index(
+            'ix_effective_acls_acl_collection_status_package_name',
+            'acl', 'collection_status', 'package_name'),
+    )
+
+    @classmethod
+    def refresh(cls, session, listing_ids=None, package_ids=None,
+                collection_ids=None):
+        """ Rebuild the rows of the specified package listings, packages and
+        collections. If none are specified, the entire table is rebuilt.
+
+        :arg session: the session to connect to the database with.
+        :kwarg listing_ids: the identifiers of the package listings to
+            refresh.
+        :kwarg package_ids: the identifiers of the packages whose listings
+            should be refreshed.
+        :kwarg collection_ids: the identifiers of the collections whose
+            listings should be refreshed.
+
+        """
+        table = cls.__table__
+
+        delete = table.delete()
+        clauses = []
+        if listing_ids:
+            clauses.append(table.c.packagelisting_id.in_(listing_ids))
+        if package_ids:
+            clauses.append(table.c.package_id.in_(package_ids))
+        if collection_ids:
+            clauses.append(table.c.collection_id.in_(collection_ids))
+        if clauses:
+            delete = delete.where(or_(*clauses))
+        elif listing_ids is not None or package_ids is not None \
+                or collection_ids is not None:
+            # Empty lists, nothing to refresh
+            return
+        session.execute(delete)
+
+        clauses = []
+        if listing_ids:
+            clauses.append(PackageListing.id.in_(listing_ids))
+        if package_ids:
+            clauses.append(PackageListing.package_id.in_(package_ids))
+        if collection_ids:
+            clauses.append(PackageListing.collection_id.in_(collection_ids))
+
+        columns = [
+            'packagelisting_id', 'packagelistingacl_id', 'fas_name', 'acl',
+            'package_id', 'package_name', 'package_namespace',
+            'package_summary', 'package_status', 'collection_id',
+            'collection_name', 'collection_version', 'collection_branchname',
+            'collection_status', 'status', 'point_of_contact',
+        ]
+        common = [
+            Package.id, Package.name, Package.namespace, Package.summary,
+            Package.status, Collection.id, Collection.name,
+            Collection.version, Collection.branchname, Collection.status,
+            PackageListing.status, PackageListing.point_of_contact,
+        ]
+
+        listings = sa.select(
+            [PackageListing.id, sa.null(), sa.null(), sa.null()] + common
+        ).where(
+            PackageListing.package_id == Package.id
+        ).where(
+            PackageListing.collection_id == Collection.id
+        )
+
+        acls = sa.select(
+            [
+                PackageListing.id, PackageListingAcl.id,
+                PackageListingAcl.fas_name, PackageListingAcl.acl,
+            ] + common
+        ).where(
+            PackageListing.package_id == Package.id
+        ).where(
+            PackageListing.collection_id == Collection.id
+        ).where(
+            PackageListingAcl.packagelisting_id == PackageListing.id
+        ).where(
+            PackageListingAcl.status == 'Approved'
+        ).order_by(
+            PackageListingAcl.id
+        )
+
+        if clauses:
+            listings = listings.where(or_(*clauses))
+            acls = acls.where(or_(*clauses))
+
+        session.execute(table.insert().from_select(columns, listings))
+        session.execute(table.insert().from_select(columns, acls))
+
+
+def _refresh_effective_acls_on_flush(session, flush_context):
+    """ Refresh the rows of the ``effective_acls`` table corresponding to
+    the packages, package listings, ACLs and collections which have just
+    been flushed to the database.
+    """
+    listing_ids = set()
+    package_ids = set()
+    collection_ids = set()
+
+    for obj in list(session.new) + list(session.dirty) \
+            + list(session.deleted):
+        if isinstance(obj, PackageListingAcl):
+            listing_ids.add(obj.packagelisting_id)
+        elif isinstance(obj, PackageListing):
+            listing_ids.add(obj.id)
+        elif isinstance(obj, Package) and obj not in session.new:
+            package_ids.add(obj.id)
+        elif isinstance(obj, Collection) and obj not in session.new:
+            collection_ids.add(obj.id)
+
+    listing_ids.discard(None)
+    if listing_ids or package_ids or collection_ids:
+        EffectiveAcl.refresh(
+            session,
+            listing_ids=list(listing_ids),
+            package_ids=list(package_ids),
+            collection_ids=list(collection_ids))
+
+sa.event.listen(
+    sa.orm.Session, 'after_flush', _refresh_effective_acls_on_flush)
+
+
+def _mark_session_written(session, flush_context):
+    """ Flag the session as holding changes not yet committed, see
+    ``pkgdb2.cache_on_data_version``.
+    """
+    session.info['pkgdb2_written'] = True
+
+
+def _clear_session_written(session):
+    """ Clear the flag set by ``_mark_session_written`` once the changes
+    are either committed or rolled back.
+    """
+    session.info.pop('pkgdb2_written', None)
+
+sa.event.listen(sa.orm.Session, 'after_flush', _mark_session_written)
+sa.event.listen(sa.orm.Session, 'after_commit', _clear_session_written)
+sa.event.listen(sa.orm.Session, 'after_rollback', _clear_session_written)
+
+
+def _track_new_logs(session, flush_context):
+    """ Keep the identifiers of the log entries inserted in the session,
+    see ``_assign_commit_seq``.
+    """
+    ids = [obj.id for obj in session.new if isinstance(obj, Log)]
+    if ids:
+        session.info.setdefault('pkgdb2_new_logs', set()).update(ids)
+
+
+def _assign_commit_seq(session):
+    """ Increase the version of the data (see ``DataVersion``) right
+    before committing a transaction which logged changes and record it on
+    these log entries, see ``Log.get_changes``.
+    """
+    if session.transaction.nested:
+        return
+    if any(isinstance(obj, Log) for obj in session.new):
+        session.flush()
+    ids = session.info.pop('pkgdb2_new_logs', None)
+    if not ids:
+        return
+
+    version = DataVersion.bump(session)
+    session.execute(Log.__table__.update().where(
+        Log.__table__.c.id.in_(list(ids))
+    ).values(commit_seq=version))
+
+
+def _clear_new_logs(session):
+    """ Forget the log entries tracked by ``_track_new_logs`` once the
+    transaction is rolled back.
+    """
+    session.info.pop('pkgdb2_new_logs', None)
+
+sa.event.listen(sa.orm.Session, 'after_flush', _track_new_logs)
+sa.event.listen(sa.orm.Session, 'before_commit', _assign_commit_seq)
+sa.event.listen(sa.orm.Session, 'after_rollback', _clear_new_logs)
+
+
+class FasPerson(BASE):
+    """Local mirror of the accounts of the Fedora Account System, used to
+    validate the users and find their bugzilla email without querying
+    FAS.
+
+    The mirror is refreshed by the ``pkgdb2_sync_fas.py`` script, see
+    ``pkgdb2.lib.sync_fas_people``.
+
+    Table -- fas_people
+    """
+
+    __tablename__ = 'fas_people'
+
+    username = sa.Column(sa.String(255), primary_key=True)
+    bugzilla_email = sa.Column(sa.Text, nullable=True)
+    groups = sa.Column(sa.Text, nullable=False, default='')
+    status = sa.Column(sa.String(50), nullable=False)
+    date_updated = sa.Column(
+        sa.DateTime, nullable=False, default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow)
+
+    def __init__(self, username, bugzilla_email, groups, status):
+        """ Constructor.
+
+        :arg username: the username of the account in FAS.
+        :arg bugzilla_email: the email address used in bugzilla.
+        :arg groups: the list of the groups the user is a member of.
+        :arg status: the status of the account in FAS.
+
+        """
+        self.username = username
+        self.bugzilla_email = bugzilla_email
+        self.groups = ' '.join(sorted(groups or []))
+        self.status = status
+
+    def __repr__(self):
+        """ The string representation of this object.
+
+        """
+        return 'FasPerson(%r, bugzilla_email=%r, status=%r)' % (
+            self.username, self.bugzilla_email, self.status)
+
+    @property
+    def group_list(self):
+        """ Return the list of the groups the user is a member of. """
+        return self.groups.split() if self.groups else []
+
+    def to_json(self):
+        """ Return a representation of the account as a dict. """
+        return dict(
+            username=self.username,
+            bugzilla_email=self.bugzilla_email,
+            groups=self.group_list,
+            status=self.status,
+        )
+
+    @classmethod
+    def get_many(cls, session, usernames, chunk_size=500):
+        """ Return the mirrored accounts of the specified users as a dict
+        keyed on their username, users not in the mirror are not in it.
+
+        :arg session: the session to connect to the database with.
+        :arg usernames: the usernames of the accounts to retrieve.
+        :kwarg chunk_size: the maximum number of usernames per query.
+
+        """
+        usernames = sorted(set(usernames))
+        output = {}
+        for cnt in range(0, len(usernames), chunk_size):
+            query = session.query(cls).filter(
+                cls.username.in_(usernames[cnt:cnt + chunk_size]))
+            for person in query.all():
+                output[person.username] = person
+        return output
+
+    @classmethod
+    def search(cls, session, pattern='*'):
+        """ Return the mirrored accounts whose username matches the
+        specified pattern as a dict keyed on their username.
+
+        :arg session: the session to connect to the database with.
+        :kwarg pattern: the pattern the usernames should match, using
+            ``*`` as wildcard, as FAS does.
+
+        """
+        query = session.query(cls)
+        if pattern != '*':
+            if '*' in pattern:
+                pattern = pattern.replace('\\', '\\\\').replace(
+                    '%', '\\%').replace('_', '\\_').replace('*', '%')
+                query = query.filter(
+                    cls.username.like(pattern, escape='\\'))
+            else:
+                query = query.filter(cls.username == pattern)
+        return dict((person.username, person) for person in query.all())
+
+
+class NotificationOutbox(BASE):
+    """Notifications (fedmsg messages and emails) waiting to be sent.
+
+    They are written in the same transaction as the change they announce
+    and sent, once committed, by the ``pkgdb2_dispatch_notifications.py``
+    script, see ``pkgdb2.lib.notifications.dispatch_outbox``.
+    Sent notifications are removed from the table, the ones which could
+    not be sent after too many attempts are kept with no ``next_attempt``.
+    Emails keep their ``recipient`` so the ones sent to the same address
+    can be collapsed into a digest.
+    A dispatcher claims the notifications it sends until ``claimed_until``
+    so they are not sent again by another dispatcher in the meantime.
+
+    Table -- notification_outbox
+    """
+
+    __tablename__ = 'notification_outbox'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    kind = sa.Column(sa.String(10), nullable=False)
+    topic = sa.Column(sa.String(100), nullable=True)
+    recipient = sa.Column(sa.Text, nullable=True, index=True)
+    payload = sa.Column(sa.Text, nullable=False)
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    next_attempt = sa.Column(
+        sa.DateTime, nullable=True, default=datetime.datetime.utcnow,
+        index=True)
+    last_error = sa.Column(sa.Text, nullable=True)
+    claimed_until = sa.Column(sa.DateTime, nullable=True)
+    date_created = sa.Column(
+        sa.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def __init__(self, kind, payload, topic=None, recipient=None,
+                 next_attempt=None):
+        """ Constructor.
+
+        :arg kind: the kind of notification, either ``fedmsg`` or
+            ``email``.
+        :arg payload: the content of the notification, a dict stored as
+            JSON.
+        :kwarg topic: the fedmsg topic of the notification.
+        :kwarg recipient: the address the email notification is sent to.
+        :kwarg next_attempt: the time at which the notification should be
+            sent, defaults to the current time.
+
+        """
+        self.kind = kind
+        self.topic = topic
+        self.recipient = recipient
+        self.payload = json.dumps(payload, default=str)
+        self.next_attempt = next_attempt or datetime.datetime.utcnow()
+
+    def __repr__(self):
+        """ The string representation of this object.
+
+        """
+        return 'NotificationOutbox(id:%r, %r, topic=%r, attempts=%r)' % (
+            self.id, self.kind, self.topic, self.attempts)
+
+    @property
+    def data(self):
+        """ Return the content of the notification as a dict. """
+        return json.loads(self.payload)
+
+    @classmethod
+    def _unclaimed(cls, now):
+        """ Return the filter selecting the notifications not claimed by
+        a dispatcher at the specified time.
+        """
+        return sa.or_(cls.claimed_until == None, cls.claimed_until <= now)
+
+    @classmethod
+    def pending(cls, session, limit=100, now=None):
+        """ Return the oldest notifications due to be sent and not claimed
+        by a dispatcher.
+
+        :arg session: the session to connect to the database with.
+        :kwarg limit: the maximum number of notifications to return.
+        :kwarg now: the time up to which the notifications are due,
+            defaults to the current time.
+
+        """
+        now = now or datetime.datetime.utcnow()
+        return session.query(cls).filter(
+            cls.next_attempt <= now
+        ).filter(
+            cls._unclaimed(now)
+        ).order_by(
+            cls.id
+        ).limit(limit).all()
+
+    @classmethod
+    def waiting_for(cls, session, kind, recipients, now=None):
+        """ Return the notifications of the specified kind, sent to the
+        specified recipients, which have not been attempted yet nor claimed
+        by a dispatcher, whether they are due or not.
+
+        :arg session: the session to connect to the database with.
+        :arg kind: the kind of notifications to return.
+        :arg recipients: the recipients of the notifications to return.
+        :kwarg now: the current time, defaults to the current time.
+
+        """
+        if not recipients:
+            return []
+        now = now or datetime.datetime.utcnow()
+        return session.query(cls).filter(
+            cls.kind == kind
+        ).filter(
+            cls.recipient.in_(recipients)
+        ).filter(
+            cls.attempts == 0
+        ).filter(
+            cls.next_attempt != None
+        ).filter(
+            cls._unclaimed(now)
+        ).order_by(
+            cls.id
+        ).all()
+
+    @classmethod
+    def claim(cls, session, notifications, until, now=None):
+        """ Claim the specified notifications until the specified time and
+        return the ones claimed, leaving out the ones claimed by another
+        dispatcher since they were selected.
+
+        Each notification is claimed by a conditional update, so only one
+        of the dispatchers selecting it concurrently claims it.  The claims
+        are to be committed before sending the notifications.
+
+        :arg session: the session to connect to the database with.
+        :arg notifications: the list of NotificationOutbox to claim.
+        :arg until: the time until which the notifications are claimed.
+        :kwarg now: the current time, defaults to the current time.
+
+        """
+        now = now or datetime.datetime.utcnow()
+        table = cls.__table__
+        claimed = []
+        for notification in notifications:
+            result = session.execute(
+                table.update().where(
+                    table.c.id == notification.id
+                ).where(
+                    sa.or_(
+                        table.c.claimed_until == None,
+                        table.c.claimed_until <= now)
+                ).values(claimed_until=until)
+            )
+            if result.rowcount == 1:
+                set_committed_value(notification, 'claimed_until', until)
+                claimed.append(notification)
+        return claimed
+
+    @classmethod
+    def depth(cls, session):
+        """ Return the number of notifications waiting to be sent and of
+        notifications which could not be sent, as a dict.
+
+        :arg session: the session to connect to the database with.
+
+        """
+        pending, failed = session.query(
+            sa.func.count(cls.next_attempt),
+            sa.func.count() - sa.func.count(cls.next_attempt),
+        ).first()
+        return {'pending': pending, 'failed': failed}
+
+
+class BugzillaJob(BASE):
+    """Reassignment, in bugzilla, of the open bugs of a package in a
+    collection to its new point of contact.
+
+    The jobs are run by the ``pkgdb2_bugzilla_jobs.py`` script, see
+    ``pkgdb2.lib.run_bugzilla_jobs``. There is a single job per package
+    and collection: changing the point of contact again before the job is
+    run updates it.
+
+    Table -- bugzilla_jobs
+    """
+
+    __tablename__ = 'bugzilla_jobs'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    package_name = sa.Column(sa.Text, nullable=False)
+    collection_name = sa.Column(sa.Text, nullable=False)
+    collection_version = sa.Column(sa.Text, nullable=False)
+    username = sa.Column(sa.Text, nullable=False)
+    prev_poc = sa.Column(sa.Text, nullable=True)
+    status = sa.Column(sa.String(50), nullable=False, default='Pending')
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    next_attempt = sa.Column(sa.DateTime, nullable=True, index=True)
+    last_error = sa.Column(sa.Text, nullable=True)
+    date_created = sa.Column(
+        sa.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    date_updated = sa.Column(
+        sa.DateTime, nullable=False, default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow)
+    revision = sa.Column(sa.Integer, nullable=False)
+
+    __table_args__ = (
+        sa.UniqueConstraint(
+            'package_name', 'collection_name', 'collection_version'),
+    )
+    # A job updated while it runs is not marked as done, it is run again
+    __mapper_args__ = {'version_id_col': revision}
+
+    STATUSES = ('Pending', 'Done', 'Failed')
+
+    def __repr__(self):
+        """ The string representation of this object.
+
+        """
+        return 'BugzillaJob(id:%r, %r, %r %r, %r -> %r, %s)' % (
+            self.id, self.package_name, self.collection_name,
+            self.collection_version, self.prev_poc, self.username,
+            self.status)
+
+    def to_json(self):
+        """ Return a representation of the job as a dict. """
+        return dict(
+            id=self.id,
+            package_name=self.package_name,
+            collection_name=self.collection_name,
+            collection_version=self.collection_version,
+            username=self.username,
+            prev_poc=self.prev_poc,
+            status=self.status,
+            attempts=self.attempts,
+            next_attempt=self.next_attempt,
+            last_error=self.last_error,
+            date_created=self.date_created,
+            date_updated=self.date_updated,
+        )
+
+    @classmethod
+    def enqueue(cls, session, username, prev_poc, package_name,
+                collection_name, collection_version):
+        """ Record that the bugs of the package in the collection should be
+        reassigned from ``prev_poc`` to ``username``.
+
+        If a job is already waiting for this package and collection, it is
+        updated: the bugs still belong to the point of contact it was
+        recorded for, unless the job was running and reassigned them, see
+        ``reassigned``.
+
+        The job is written with a single UPDATE, or INSERT if there is
+        none, rather than loaded first. The job being run meanwhile, or
+        created by a concurrent transaction, thus never makes the change
+        of point of contact fail: the update bumps the revision of the job,
+        it is the worker which notices the job changed and runs it again.
+
+        :arg session: the session to connect to the database with.
+        :arg username: the new point of contact.
+        :arg prev_poc: the previous point of contact.
+        :arg package_name: the name of the package.
+        :arg collection_name: the name of the collection, the product in
+            bugzilla.
+        :arg collection_version: the version of the collection.
+
+        """
+        table = cls.__table__
+        now = datetime.datetime.utcnow()
+        update = table.update().where(and_(
+            table.c.package_name == package_name,
+            table.c.collection_name == collection_name,
+            table.c.collection_version == collection_version,
+        )).values(
+            username=username,
+            prev_poc=sa.case(
+                [(table.c.status == 'Pending', table.c.prev_poc)],
+                else_=sa.literal(prev_poc, sa.Text)),
+            status='Pending',
+            attempts=0,
+            last_error=None,
+            next_attempt=now,
+            date_updated=now,
+            revision=table.c.revision + 1,
+        )
+        if session.execute(update).rowcount:
+            return
+
+        insert = table.insert().values(
+            package_name=package_name,
+            collection_name=collection_name,
+            collection_version=collection_version,
+            username=username,
+            prev_poc=prev_poc,
+            status='Pending',
+            attempts=0,
+            next_attempt=now,
+            date_created=now,
+            date_updated=now,
+            revision=1,
+        )
+        if session.get_bind().dialect.name == 'sqlite':
+            # The writers are serialized, no other transaction can have
+            # created the job meanwhile, and pysqlite does not support
+            # savepoints.
+            session.execute(insert)
+            return
+
+        try:
+            with session.begin_nested():
+                session.execute(insert)
+        except IntegrityError:
+            # Created by a concurrent transaction since the update
+            session.execute(update)
+
+    @classmethod
+    def reassigned(cls, session, job_id, username):
+        """ Record that the bugs of the job were reassigned to ``username``
+        while the job was updated, so that the job, run again, reassigns
+        them from ``username`` rather than from the point of contact it was
+        first recorded for.
+
+        :arg session: the session to connect to the database with.
+        :arg job_id: the identifier of the job.
+        :arg username: the point of contact the bugs were reassigned to.
+
+        """
+        table = cls.__table__
+        session.execute(table.update().where(and_(
+            table.c.id == job_id,
+            table.c.status == 'Pending',
+        )).values(prev_poc=username))
+
+    @classmethod
+    def pending(cls, session, limit=10, now=None):
+        """ Return the oldest jobs due to be run.
+
+        :arg session: the session to connect to the database with.
+        :kwarg limit: the maximum number of jobs to return.
+        :kwarg now: the time up to which the jobs are due, defaults to the
+            current time.
+
+        """
+        now = now or datetime.datetime.utcnow()
+        return session.query(cls).filter(
+            cls.status == 'Pending'
+        ).filter(
+            cls.next_attempt <= now
+        ).order_by(
+            cls.next_attempt, cls.id
+        ).limit(limit).all()
+
+    @classmethod
+    def search(cls, session, status=None, offset=None, limit=None):
+        """ Return the jobs with the specified status, the most recently
+        updated first.
+
+        :arg session: the session to connect to the database with.
+        :kwarg status: the status of the jobs to return.
+        :kwarg offset: the number of jobs to skip.
+        :kwarg limit: the maximum number of jobs to return.
+
+        """
+        query = session.query(cls)
+        if status:
+            query = query.filter(cls.status == status)
+        query = query.order_by(cls.date_updated.desc(), cls.id.desc())
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    @classmethod
+    def count_by_status(cls, session):
+        """ Return the number of jobs in each status as a dict.
+
+        :arg session: the session to connect to the database with.
+
+        """
+        output = dict((status, 0) for status in cls.STATUSES)
+        output.update(session.query(
+            cls.status, sa.func.count(cls.id)
+        ).group_by(cls.status).all())
+        return output
+
+
+def notify(session, eol=False, name=None, version=None, acls=None,
+           yield_per=None):
     """ Return the user that should be notify for each package.
 
     :arg session: the session to connect to the database with.
@@ -2020,6 +3458,8 @@ def notify(session, eol=False, name=None, version=None, acls=None):
         will return any person having one of these three acls for each
         package in the database.
         If the acls specified is ``all`` then all ACLs are used.
+    :kwarg yield_per: if set, return an iterator fetching the rows from
+        the database in batches of this size instead of a list.
 
     """
 
@@ -2031,88 +3471,72 @@ def notify(session, eol=False, name=None, version=None, acls=None):
         acls = [acls]
 
     query = session.query(
-        Package.name,
-        PackageListingAcl.fas_name
-    ).join(
-        PackageListing,
-        PackageListingAcl
-    ).filter(
-        Package.id == PackageListing.package_id
-    ).filter(
-        PackageListingAcl.packagelisting_id == PackageListing.id
-    ).filter(
-        PackageListing.collection_id == Collection.id
+        EffectiveAcl.package_name,
+        EffectiveAcl.fas_name
     ).filter(
-        Package.status == 'Approved'
+        EffectiveAcl.acl.in_(acls)
     ).filter(
-        PackageListing.point_of_contact != 'orphan'
+        EffectiveAcl.package_status == 'Approved'
     ).filter(
-        PackageListingAcl.acl.in_(acls)
-    ).filter(
-        PackageListingAcl.status == 'Approved'
-    ).group_by(
-        Package.name, PackageListingAcl.fas_name
+        EffectiveAcl.point_of_contact != 'orphan'
+    ).distinct(
     ).order_by(
-        Package.name
+        EffectiveAcl.package_name, EffectiveAcl.fas_name
     )
 
     if eol is False:
-        query = query.filter(Collection.status != 'EOL')
+        query = query.filter(EffectiveAcl.collection_status != 'EOL')
 
     if name:
-        query = query.filter(Collection.name == name)
+        query = query.filter(EffectiveAcl.collection_name == name)
 
     if version:
-        query = query.filter(Collection.version == version)
+        query = query.filter(EffectiveAcl.collection_version == version)
 
+    if yield_per:
+        return query.yield_per(yield_per)
     return query.all()
 
 
-def bugzilla(session, name=None):
+def bugzilla(session, name=None, yield_per=None):
     """ Return information for each package to sync with bugzilla.
 
     :arg session: the session to connect to the database with.
     :kwarg name: restricts the output to a specific collection name.
+    :kwarg yield_per: if set, return an iterator fetching the rows from
+        the database in batches of this size instead of a list.
 
     """
     query = session.query(
-        Collection.name,  # 0
-        Collection.version,  # 1
-        Package.name,  # 2
-        Package.summary,  # 3
-        PackageListing.point_of_contact,  # 4
-        PackageListingAcl.fas_name,  # 5
-        Collection.branchname,  # 6
-    ).filter(
-        Package.id == PackageListing.package_id
+        EffectiveAcl.collection_name,  # 0
+        EffectiveAcl.collection_version,  # 1
+        EffectiveAcl.package_name,  # 2
+        EffectiveAcl.package_summary,  # 3
+        EffectiveAcl.point_of_contact,  # 4
+        EffectiveAcl.fas_name,  # 5
+        EffectiveAcl.collection_branchname,  # 6
     ).filter(
-        PackageListingAcl.packagelisting_id == PackageListing.id
+        EffectiveAcl.acl == 'watchbugzilla'
     ).filter(
-        PackageListing.collection_id == Collection.id
-    ).filter(
-        Package.status == 'Approved'
-    ).filter(
-        Collection.status != 'EOL'
+        EffectiveAcl.collection_status != 'EOL'
     ).filter(
-        PackageListingAcl.acl.in_(
-            ['watchbugzilla'])
-    ).filter(
-        PackageListingAcl.status == 'Approved'
-    ).group_by(
-        Collection.name, Package.name, PackageListing.point_of_contact,
-        PackageListingAcl.fas_name, Package.summary, Collection.branchname,
-        Collection.version
+        EffectiveAcl.package_status == 'Approved'
+    ).distinct(
     ).order_by(
-        Package.name
+        EffectiveAcl.collection_name, EffectiveAcl.package_name,
+        EffectiveAcl.point_of_contact, EffectiveAcl.fas_name
     )
 
     if name:
-        query = query.filter(Collection.name == name)
+        query = query.filter(EffectiveAcl.collection_name == name)
 
+    if yield_per:
+        return query.yield_per(yield_per)
     return query.all()
 
 
-def vcs_acls(session, eol=False, collection=None, namespace=None):
+def vcs_acls(session, eol=False, collection=None, namespace=None,
+             yield_per=None):
     """ Return information for each package to sync with git.
 
     :arg session: the session to connect to the database with.
@@ -2120,88 +3544,64 @@ def vcs_acls(session, eol=False, collection=None, namespace=None):
         End Of Life collections or not. Defaults to ``False``.
     :kwarg collection: Restrict the VCS info to a specific collection
     :kwarg namespace: Restrict the VCS info returned to a given namespace
+    :kwarg yield_per: if set, return an iterator fetching the rows from
+        the database in batches of this size instead of a list. The rows
+        are then ordered by package name and branch and each of these
+        branches also has a row with no user, whether someone has commit
+        on it or not.
 
     """
     query = session.query(
-        Package.name,  # 0
-        PackageListingAcl.fas_name,  # 1
-        Collection.branchname,  # 2
-        Package.namespace,  # 2
-    ).filter(
-        Package.id == PackageListing.package_id
-    ).filter(
-        PackageListingAcl.packagelisting_id == PackageListing.id
+        EffectiveAcl.package_name,  # 0
+        EffectiveAcl.fas_name,  # 1
+        EffectiveAcl.collection_branchname,  # 2
+        EffectiveAcl.package_namespace,  # 3
     ).filter(
-        PackageListing.collection_id == Collection.id
+        EffectiveAcl.status.in_(['Approved', 'Orphaned'])
     ).filter(
-        PackageListing.status.in_(['Approved', 'Orphaned'])
+        or_(
+            EffectiveAcl.acl == 'commit',
+            EffectiveAcl.acl == None,
+        )
+    ).distinct(
+    ).order_by(
+        EffectiveAcl.package_name
     )
 
     if collection is not None:
         query = query.filter(
-            Collection.branchname == collection
+            EffectiveAcl.collection_branchname == collection
         )
 
     if not eol:
         query = query.filter(
-            Collection.status != 'EOL')
+            EffectiveAcl.collection_status != 'EOL')
 
     if namespace is not None:
         query = query.filter(
-            Package.namespace == namespace
+            EffectiveAcl.package_namespace == namespace
         )
 
-    query = query.filter(
-        PackageListingAcl.acl == 'commit'
-    ).filter(
-        PackageListingAcl.status == 'Approved'
-    ).group_by(
-        Package.namespace, Package.name, PackageListingAcl.fas_name,
-        Collection.branchname,
-    ).order_by(
-        Package.name
-    )
+    if yield_per:
+        return query.order_by(
+            EffectiveAcl.collection_branchname,
+            EffectiveAcl.package_namespace,
+            EffectiveAcl.fas_name,
+        ).yield_per(yield_per)
+
+    data = []
+    # The branches without anyone having commit are returned with no user
+    empty = []
+    for entry in query.all():
+        if entry[1] is None:
+            empty.append(entry)
+        else:
+            data.append(entry)
 
-    data = query.all()
     sub = set([(it[0], it[2]) for it in data])
-
-    query2 = session.query(
-        Package.name,  # 0
-        Collection.branchname,  # 1
-        Package.namespace,  # 2
-    ).filter(
-        Package.id == PackageListing.package_id
-    ).filter(
-        PackageListing.collection_id == Collection.id
-    ).filter(
-        PackageListing.status.in_(['Approved', 'Orphaned'])
-    ).group_by(
-        Package.namespace,
-        Package.name,
-        Collection.branchname,
-    ).order_by(
-        Package.name,
-        Collection.branchname
-    )
-
-    if collection is not None:
-        query2 = query2.filter(
-            Collection.branchname == collection
-        )
-
-    if not eol:
-        query2 = query2.filter(
-            Collection.status != 'EOL')
-
-    if namespace is not None:
-        query2 = query2.filter(
-            Package.namespace == namespace
-        )
-
-    sub2 = set(query2.all())
-
-    for entry in sub2 - sub:
-        data.append([entry[0], None, entry[1], entry[2]])
+    for entry in empty:
+        if (entry[0], entry[2]) not in sub:
+            data.append(entry)
 
     return data
 
@@ -27,7 +27,11 @@ messages.  If it is not installed, it will return silently.
 
 """
 
+import collections
+import datetime
 import smtplib
+import socket
+import threading
 import warnings
 
 from email.mime.text import MIMEText
@@ -49,10 +53,82 @@ def fedmsg_publish(*args, **kwargs):  # pragma: no cover
         warnings.warn(str(err))
 
 
+def _email_subject_to(user, package, subject=None, to_email=None):
+    ''' Return the subject and the recipient of the email notifying of
+    the specified change.
+    '''
+    if not subject:
+        if package:
+            subject = '{0} updated {1}'.format(user, package.name)
+        else:
+            subject = 'updated by {0}'.format(user)
+
+    if not to_email:
+        email_to_template = pkgdb2.APP.config.get(
+            'PKGDB2_EMAIL_TO', '{pkg_name}-owner@fedoraproject.org')
+        to_email = email_to_template.format(pkg_name=package.name)
+
+    return subject, to_email
+
+
+class SMTPMailer(object):
+    ''' Connection to the SMTP server kept open between the emails sent,
+    rather than opening one per email.
+
+    The connection is opened at the first email and opened again if the
+    server closed it in the meantime.  It is shared between the threads of
+    the process.
+    '''
+
+    def __init__(self, server=None):
+        ''' Instanciate a SMTPMailer object.
+
+        :kwarg server: the SMTP server to connect to, as ``host`` or
+            ``host:port``, defaults to ``PKGDB2_EMAIL_SMTP_SERVER``.
+
+        '''
+        self.server = server
+        self.smtp = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        ''' Open the connection to the SMTP server. '''
+        server = self.server or pkgdb2.APP.config.get(
+            'PKGDB2_EMAIL_SMTP_SERVER', 'localhost')
+        self.smtp = smtplib.SMTP(server)
+
+    def sendmail(self, from_email, to_email, message):
+        ''' Send the specified message, see ``smtplib.SMTP.sendmail``. '''
+        with self.lock:
+            if self.smtp is None:
+                self._connect()
+            try:
+                self.smtp.sendmail(from_email, to_email, message)
+            except (smtplib.SMTPServerDisconnected, socket.error):
+                # The server closed the connection, idle for too long
+                self._connect()
+                self.smtp.sendmail(from_email, to_email, message)
+
+    def close(self):
+        ''' Close the connection to the SMTP server, if it is open. '''
+        with self.lock:
+            if self.smtp is not None:
+                try:
+                    self.smtp.quit()
+                except (smtplib.SMTPException, socket.error):
+                    pass
+                self.smtp = None
+
+
+MAILER = SMTPMailer()
+
+
 def email_publish(
         user, package, message, subject=None,
-        to_email=None):  # pragma: no cover
-    ''' Send notification by email. '''
+        to_email=None, mailer=None):  # pragma: no cover
+    ''' Send notification by email, through the specified ``SMTPMailer``,
+    defaults to ``MAILER``.
+    '''
 
     if not package and not to_email:
         # If we have no package and no to_email, we have no way to know
@@ -61,22 +137,12 @@ def email_publish(
 
     msg = MIMEText(message)
 
-    if subject:
-        msg['Subject'] = '[PkgDB] %s' % subject
-    elif package:
-        msg['Subject'] = '[PkgDB] {0} updated {1}'.format(
-            user, package.name)
-    else:
-        msg['Subject'] = '[PkgDB] updated by {0}'.format(user)
+    subject, to_email = _email_subject_to(user, package, subject, to_email)
+    msg['Subject'] = '[PkgDB] %s' % subject
 
     from_email = pkgdb2.APP.config.get(
         'PKGDB2_EMAIL_FROM', 'nobody@fedoraproject.org')
 
-    if not to_email:
-        email_to_template = pkgdb2.APP.config.get(
-            'PKGDB2_EMAIL_TO', '{pkg_name}-owner@fedoraproject.org')
-        to_email = email_to_template.format(pkg_name=package.name)
-
     msg['From'] = from_email
     msg['To'] = to_email
     cc_email = pkgdb2.APP.config.get('PKGDB2_EMAIL_CC', None)
@@ -87,11 +153,205 @@ def email_publish(
         cc_email = [cc_email]
     if isinstance(to_email, basestring):
         to_email = [to_email]
-    to_email.extend(cc_email)
+    if cc_email:
+        to_email = list(to_email) + list(cc_email)
 
     # Send the message via our own SMTP server, but don't include the
     # envelope header.
-    smtp = smtplib.SMTP(pkgdb2.APP.config.get(
-        'PKGDB2_EMAIL_SMTP_SERVER', 'localhost'))
-    smtp.sendmail(from_email, to_email, msg.as_string())
-    smtp.quit()
+    (mailer or MAILER).sendmail(from_email, to_email, msg.as_string())
+
+
+def queue_fedmsg(session, topic, message):
+    ''' Queue a message to be published on the fedmsg bus once the
+    current transaction is committed, see ``dispatch_outbox``.
+    '''
+    # To avoid a circular import.
+    import pkgdb2.lib.model as model
+
+    session.add(model.NotificationOutbox(
+        'fedmsg', {'topic': topic, 'msg': message}, topic=topic))
+
+
+def queue_email(
+        session, user, package, message, subject=None, to_email=None):
+    ''' Queue a notification to be sent by email once the current
+    transaction is committed, see ``email_publish`` and ``dispatch_outbox``.
+
+    If ``PKGDB2_EMAIL_DIGEST_WINDOW`` is set, the email is held for that
+    many seconds, to be sent in a digest with the other notifications sent
+    to the same address in the meantime.
+    '''
+    # To avoid a circular import.
+    import pkgdb2.lib.model as model
+
+    if not package and not to_email:
+        return
+
+    subject, to_email = _email_subject_to(user, package, subject, to_email)
+    recipient = to_email
+    if not isinstance(recipient, basestring):
+        recipient = ', '.join(sorted(recipient))
+
+    window = pkgdb2.APP.config.get('PKGDB2_EMAIL_DIGEST_WINDOW', 0)
+    session.add(model.NotificationOutbox(
+        'email',
+        {
+            'user': user,
+            'message': message,
+            'subject': subject,
+            'to_email': to_email,
+        },
+        recipient=recipient,
+        next_attempt=datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=window),
+    ))
+
+
+def _send_fedmsg(data):  # pragma: no cover
+    ''' Publish a queued message on the fedmsg bus, unlike
+    ``fedmsg_publish`` failures are raised so the message can be retried.
+    '''
+    ## Ignore message about fedmsg import
+    # pylint: disable=F0401
+    import fedmsg
+    fedmsg.publish(topic=data['topic'], msg=data['msg'], modname='pkgdb')
+
+
+def _send_email(data):  # pragma: no cover
+    ''' Send a queued email notification. '''
+    email_publish(
+        data['user'], None, data['message'], subject=data['subject'],
+        to_email=data['to_email'])
+
+
+def _digest(notifications):
+    ''' Return the content of the email collapsing the specified email
+    notifications, all sent to the same address.
+    '''
+    data = [notification.data for notification in notifications]
+    if len(data) == 1:
+        return data[0]
+
+    return {
+        'user': data[0]['user'],
+        'subject': '%s updates' % len(data),
+        'message': '\n\n----\n\n'.join(
+            '%s\n\n%s' % (item['subject'], item['message'])
+            for item in data),
+        'to_email': data[0]['to_email'],
+    }
+
+
+SENDERS = {
+    'fedmsg': _send_fedmsg,
+    'email': _send_email,
+}
+
+
+def dispatch_outbox(
+        session, batch_size=100, max_attempts=None, backoff=None,
+        senders=None, now=None, lease=None):
+    ''' Send the oldest notifications due in the outbox.
+
+    Sent notifications are removed from the outbox.  The others are
+    retried after ``backoff`` seconds, doubled at each attempt, until they
+    have been attempted ``max_attempts`` times.
+    If ``PKGDB2_EMAIL_DIGEST_WINDOW`` is set, the email notifications due
+    are sent in a single digest per address, together with the ones
+    queued for the same address since.
+    The notifications are claimed for ``lease`` seconds, and the claim
+    committed, before being sent so that concurrent dispatchers do not send
+    them twice. A notification claimed by a dispatcher which did not
+    commit its outcome is sent again once the claim expires.
+    Once the notifications are sent the session is only flushed, it is up
+    to the caller to commit.
+
+    :arg session: the session to connect to the database with.
+    :kwarg batch_size: the maximum number of notifications to send.
+    :kwarg max_attempts: the number of attempts after which a notification
+        is given up, defaults to ``PKGDB2_OUTBOX_MAX_ATTEMPTS``.
+    :kwarg backoff: the number of seconds to wait before the first retry,
+        defaults to ``PKGDB2_OUTBOX_BACKOFF``.
+    :kwarg senders: a dict of the function sending each kind of
+        notification, defaults to ``SENDERS``.
+    :kwarg now: the current time, defaults to ``datetime.utcnow()``.
+    :kwarg lease: the number of seconds the notifications are claimed for,
+        defaults to ``PKGDB2_OUTBOX_LEASE``.
+    :returns: a dict with the number of notifications ``sent``,
+        ``retried`` and ``failed`` (given up).
+
+    '''
+    # To avoid a circular import.
+    import pkgdb2.lib.model as model
+    ## We catch Exception if we want :-p
+    # pylint: disable=W0703
+
+    if max_attempts is None:
+        max_attempts = pkgdb2.APP.config.get('PKGDB2_OUTBOX_MAX_ATTEMPTS', 8)
+    if backoff is None:
+        backoff = pkgdb2.APP.config.get('PKGDB2_OUTBOX_BACKOFF', 30)
+    if lease is None:
+        lease = pkgdb2.APP.config.get('PKGDB2_OUTBOX_LEASE', 300)
+    senders = senders or SENDERS
+    now = now or datetime.datetime.utcnow()
+
+    pending = model.NotificationOutbox.pending(
+        session, limit=batch_size, now=now)
+
+    # Each item is the list of notifications sent at once
+    groups = []
+    digests = collections.OrderedDict()
+    digest = pkgdb2.APP.config.get('PKGDB2_EMAIL_DIGEST_WINDOW', 0)
+    for notification in pending:
+        if digest and notification.kind == 'email':
+            digests.setdefault(notification.recipient, []).append(
+                notification)
+        else:
+            groups.append([notification])
+    for notification in model.NotificationOutbox.waiting_for(
+            session, 'email', list(digests), now=now):
+        if notification not in digests[notification.recipient]:
+            digests[notification.recipient].append(notification)
+    groups.extend(digests.values())
+
+    claimed = set(model.NotificationOutbox.claim(
+        session, [notif for group in groups for notif in group],
+        now + datetime.timedelta(seconds=lease), now=now))
+    session.commit()
+    groups = [
+        [notif for notif in notifications if notif in claimed]
+        for notifications in groups
+    ]
+
+    output = {'sent': 0, 'retried': 0, 'failed': 0}
+    for notifications in groups:
+        if not notifications:
+            continue
+        try:
+            senders[notifications[0].kind](_digest(notifications))
+        except Exception, err:
+            for notification in notifications:
+                notification.claimed_until = None
+                if pkgdb2.lib.utils.schedule_retry(
+                        notification, err, max_attempts, backoff, now):
+                    output['retried'] += 1
+                else:
+                    output['failed'] += 1
+        else:
+            for notification in notifications:
+                session.delete(notification)
+                output['sent'] += 1
+
+    session.flush()
+    return output
+
+
+def outbox_depth(session):
+    ''' Return the number of notifications in the outbox, as a dict with
+    the number of ``pending`` ones and of ``failed`` ones, which will not
+    be retried.
+    '''
+    # To avoid a circular import.
+    import pkgdb2.lib.model as model
+
+    return model.NotificationOutbox.depth(session)
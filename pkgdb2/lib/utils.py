@@ -23,8 +23,12 @@
 Utilities for all classes to use
 '''
 
+import collections
 import datetime
 import hashlib
+import re
+import threading
+import time
 import urllib
 
 import requests
@@ -83,31 +87,127 @@ def get_fas():  # pragma: no cover
     return _FAS
 
 
-@pkgdb2.CACHE.cache_on_arguments(expiration_time=3600)
-def __get_fas_grp_member(group='packager'):  # pragma: no cover
-    ''' Retrieve from FAS the list of users in the packager group.
+class LocalCache(object):
+    ''' Value kept in memory by this process.
+
+    The value is loaded by calling ``load`` the first time it is asked for.
+    Once it is older than ``max_age`` seconds, it is reloaded in a
+    background thread while the stale value keeps being returned, thus
+    only the very first call ever waits for ``load``.
+    If reloading fails, the stale value is kept for another ``max_age``
+    seconds.
+    '''
+
+    def __init__(self, load, max_age):
+        ''' Instanciate a LocalCache object.
+
+        :arg load: the function returning the value.
+        :arg max_age: the number of seconds after which the value is
+            reloaded.
+
+        '''
+        self.load = load
+        self.max_age = max_age
+        self.value = None
+        self.loaded = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    def get(self):
+        ''' Return the value, loading it if it has never been loaded and
+        starting to reload it in the background if it is stale.
+        '''
+        if self.loaded is None:
+            with self.lock:
+                if self.loaded is None:
+                    self.value = self.load()
+                    self.loaded = time.time()
+            return self.value
+
+        if time.time() - self.loaded > self.max_age:
+            with self.lock:
+                start = not self.refreshing
+                self.refreshing = True
+            if start:
+                thread = threading.Thread(target=self.refresh)
+                thread.daemon = True
+                thread.start()
+        return self.value
+
+    def refresh(self):
+        ''' Reload the value. '''
+        try:
+            self.value = self.load()
+        except Exception, err:
+            pkgdb2.LOG.exception(err)
+        finally:
+            self.loaded = time.time()
+            self.refreshing = False
+
+    def clear(self):
+        ''' Forget the value, it is loaded again at the next call. '''
+        with self.lock:
+            self.loaded = None
+            self.value = None
+
+
+def __get_fas_packagers():  # pragma: no cover
+    ''' Retrieve from FAS the name of all the users in the packager group.
     '''
     fas = get_fas()
 
-    return fas.group_members(group)
+    return frozenset(
+        user.username
+        for user in fas.group_members('packager')
+        if user.role_type in ('user', 'sponsor', 'administrator')
+    )
+
+
+_PACKAGERS = LocalCache(
+    __get_fas_packagers,
+    max_age=pkgdb2.APP.config.get('PKGDB2_FAS_CACHE_TIME', 3600))
 
 
 def get_packagers():  # pragma: no cover
-    """ Return a list containing the name of all the packagers. """
-    output = []
-    for user in __get_fas_grp_member('packager'):
-        if user.role_type in ('user', 'sponsor', 'administrator'):
-            output.append(user.username)
-    return output
+    """ Return a frozenset containing the name of all the packagers.
 
+    The set is kept in memory by this process and refreshed in the
+    background, see ``LocalCache``.
+    """
+    return _PACKAGERS.get()
 
-@pkgdb2.CACHE.cache_on_arguments(expiration_time=3600)
-def get_fas_group(group):  # pragma: no cover
+
+# Least recently used last
+_FAS_GROUPS = collections.OrderedDict()
+_FAS_GROUPS_LOCK = threading.Lock()
+_FAS_GROUPS_MAX = 256
+
+
+def get_fas_group(group):
     """ Return group information from FAS based on the specified group name.
-    """
-    fas = get_fas()
 
-    return fas.group_by_name(group)
+    The information is kept in memory by this process and refreshed in the
+    background, see ``LocalCache``. Only the ``_FAS_GROUPS_MAX`` groups
+    most recently asked for are kept and a group is not kept if it could
+    not be retrieved, for example because it does not exist.
+    """
+    with _FAS_GROUPS_LOCK:
+        cache = _FAS_GROUPS.pop(group, None)
+        if cache is None:
+            cache = LocalCache(
+                lambda: get_fas().group_by_name(group),
+                max_age=pkgdb2.APP.config.get('PKGDB2_FAS_CACHE_TIME', 3600))
+        _FAS_GROUPS[group] = cache
+        while len(_FAS_GROUPS) > _FAS_GROUPS_MAX:
+            _FAS_GROUPS.popitem(last=False)
+
+    try:
+        return cache.get()
+    except Exception:
+        with _FAS_GROUPS_LOCK:
+            if _FAS_GROUPS.get(group) is cache and cache.loaded is None:
+                del _FAS_GROUPS[group]
+        raise
 
 
 @pkgdb2.CACHE.cache_on_arguments(expiration_time=3600)
@@ -119,6 +219,26 @@ def get_bz_email_user(username):  # pragma: no cover
     return fas.person_by_username(username)
 
 
+def get_bugzilla_email(username, session=None):  # pragma: no cover
+    ''' Return the bugzilla email of the provided user.
+
+    If a session is specified, the email is looked up in the local mirror
+    of FAS first and FAS is only queried for the users not mirrored (yet).
+
+    :arg username: the username of the user.
+    :kwarg session: the session to connect to the database with.
+
+    '''
+    if session is not None:
+        # To avoid a circular import.
+        import pkgdb2.lib.model as model
+        person = model.FasPerson.get_many(session, [username]).get(username)
+        if person is not None and person.bugzilla_email:
+            return person.bugzilla_email
+
+    return get_bz_email_user(username).bugzilla_email
+
+
 def get_bz():  # pragma: no cover
     '''Retrieve a connection to bugzilla
 
@@ -143,7 +263,7 @@ def get_bz():  # pragma: no cover
 
 def set_bugzilla_owner(
         username, prev_poc, pkg_name, collectn, collectn_version,
-        bz_comment=None):  # pragma: no cover
+        bz_comment=None, session=None):  # pragma: no cover
     '''Change the package owner
 
      :arg username: Username of the new point of contact.
@@ -153,6 +273,8 @@ def set_bugzilla_owner(
      :arg collectn_version: Collection version.
      :kwarg bz_comment: the comment of changes, if left to None, rely on a
         default comment.
+     :kwarg session: the session to connect to the database with, used to
+        look up the bugzilla emails in the local mirror of FAS.
     '''
     if not bz_comment:
         bz_comment = 'This package has changed ownership in the Fedora'\
@@ -163,7 +285,7 @@ def set_bugzilla_owner(
         user_email = get_fas_group(
             username.replace('group::', '')).mailing_list
     else:
-        user_email = get_bz_email_user(username).bugzilla_email
+        user_email = get_bugzilla_email(username, session=session)
 
     prev_poc_email = ''
     if prev_poc:
@@ -171,7 +293,7 @@ def set_bugzilla_owner(
             prev_poc_email = get_fas_group(
                 prev_poc.replace('group::', '')).mailing_list
         else:
-            prev_poc_email = get_bz_email_user(prev_poc).bugzilla_email
+            prev_poc_email = get_bugzilla_email(prev_poc, session=session)
 
     bz_mail = '%s' % user_email
     prev_mail = '%s' % prev_poc_email
@@ -207,143 +329,296 @@ def set_bugzilla_owner(
                         'current': bz_mail})
 
 
-def _construct_substitutions(msg):
-    """ Convert a fedmsg message into a dict of substitutions. """
-    subs = {}
-    for key1 in msg:
-        if isinstance(msg[key1], dict):
-            subs.update(dict([
-                ('.'.join([key1, key2]), val2)
-                for key2, val2 in _construct_substitutions(msg[key1]).items()
-            ]))
+def schedule_retry(item, err, max_attempts, backoff, now):
+    """ Record a failed attempt at processing an item of a queue, such as
+    a notification of the outbox or a bugzilla job, and schedule the next
+    attempt after ``backoff`` seconds, doubled at each attempt.
+
+    :arg item: the item which failed, it has an ``attempts``, a
+        ``last_error`` and a ``next_attempt`` attribute.
+    :arg err: the exception raised while processing the item.
+    :arg max_attempts: the number of attempts after which it is given up.
+    :arg backoff: the number of seconds to wait before the first retry.
+    :arg now: the current time.
+    :returns: a boolean, False if the item is given up.
+
+    """
+    item.attempts += 1
+    item.last_error = '%s: %s' % (type(err).__name__, err)
+    if item.attempts >= max_attempts:
+        item.next_attempt = None
+        return False
+    item.next_attempt = now + datetime.timedelta(
+        seconds=backoff * 2 ** (item.attempts - 1))
+    return True
+
+
+_MISSING = object()
+
+
+def _resolve(message, path, default=_MISSING):
+    """ Return the value at the specified dotted path of a fedmsg message,
+    ``package.name`` being ``message['package']['name']``.
 
-        subs[key1] = msg[key1]
+    :raises KeyError: if the path is not in the message and no default is
+        specified.
+    """
+    value = message
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            if default is _MISSING:
+                raise KeyError('.'.join(path))
+            return default
+        value = value[key]
+    return value
+
+
+class LogTemplate(object):
+    """ Template of the log of a change, compiled once.
+
+    It knows which dotted paths of the fedmsg message it uses, thus only
+    resolves these when formatted rather than flattening the entire
+    message.
+    """
 
-    return subs
+    _KEY = re.compile(r'%\(([^)]+)\)')
+
+    def __init__(self, template):
+        """ Instanciate a LogTemplate object.
+
+        :arg template: the template, a string using ``%(dotted.path)s``.
+
+        """
+        self.template = template
+        self.paths = [
+            (key, tuple(key.split('.')))
+            for key in sorted(set(self._KEY.findall(template)))
+        ]
+
+    def format(self, message):
+        """ Return the template filled from the specified fedmsg message.
+        """
+        return self.template % dict(
+            (key, _resolve(message, path)) for key, path in self.paths)
+
+
+# A big lookup of fedmsg topics to model.Log template strings.
+_LOG_TEMPLATES = {
+    'acl.update': 'user: %(agent)s set for %(username)s acl: %(acl)s of'
+                  ' package: %(package_name)s from: '
+                  '%(previous_status)s to: '
+                  '%(status)s on branch: '
+                  '%(package_listing.collection.branchname)s',
+    'acl.delete': 'user: %(agent)s deleted acl: %(acl.acl)s of '
+                  'package: %(acl.packagelist.package.name)s of user: '
+                  '%(acl.fas_name)s on: '
+                  '%(acl.packagelist.collection.branchname)s',
+    'owner.update': 'user: %(agent)s changed point of contact of package: '
+                    '%(package_name)s from: '
+                    '%(previous_owner)s to: '
+                    '%(username)s on branch: '
+                    '%(package_listing.collection.branchname)s',
+    'branch.start': 'user: %(agent)s started branching from '
+                    '%(collection_from.branchname)s to '
+                    '%(collection_to.branchname)s',
+    'branch.complete': 'user: %(agent)s finished branching from '
+                       '%(collection_from.branchname)s to '
+                       '%(collection_to.branchname)s',
+    'package.branch.delete': 'user: %(agent)s deleted branch: '
+                             '%(package_listing.collection.'
+                             'branchname)s '
+                             'for package %(package_listing.'
+                             'package.name)s ',
+    'package.branch.new': 'user: %(agent)s created branch '
+                          '%(package_listing.collection.'
+                          'branchname)s on package %(package.name)s',
+    'package.branch.request': 'user: %(agent)s requested branch: '
+                             '%(collection_to.branchname)s '
+                             'for package %(package.name)s',
+    'package.new.request': 'user: %(agent)s request package: '
+                           '%(info.pkg_name)s on branch '
+                           '%(collection.branchname)s',
+    'package.delete': 'user: %(agent)s deleted package %(package.name)s',
+    'package.new': 'user: %(agent)s created package: '
+                   '%(package_name)s on branch: '
+                   '%(package_listing.collection.branchname)s for point'
+                   ' of contact: %(package_listing.point_of_contact)s',
+    'package.critpath.update': 'user: %(agent)s updated critpath status'
+                               'for package: %(package.name)s on '
+                               'branches %(branches)s',
+    'package.unretire.request': 'user: %(agent)s requested branch: '
+                                '%(collection.branchname)s to be '
+                                'unretired for package %(package.name)s',
+    'package.update': 'user: %(agent)s updated %(fields)s package: '
+                      '%(package.name)s',
+    'package.update.status': 'user: %(agent)s updated package: '
+                      '%(package_name)s status from: '
+                      '%(prev_status)s to '
+                      '%(status)s on branch: '
+                      '%(package_listing.collection.branchname)s',
+    'collection.new': 'user: %(agent)s created collection: '
+                      '%(collection.name)s',
+    'collection.update': 'user: %(agent)s edited collection: '
+                         '%(collection.name)s',
+    'package.monitor.update': 'user: %(agent)s updated the monitoring '
+                           'status of %(package.name)s to %(status)s',
+    'admin.action.status.update': 'user: %(agent)s updated action: '
+                           '%(action.id)s of %(action.package.name)s '
+                           'from `%(old_status)s` to `%(new_status)s`',
+    'package.koschei.update': 'user: %(agent)s updated the Koschei '
+                           'monitoring status of %(package.name)s to '
+                           '%(status)s',
+    'namespace.new': 'user: %(agent)s added a new namespace: '
+                           '%(namespace)s',
+    'namespace.drop': 'user: %(agent)s removed a namespace: %(namespace)s',
+}
+
+# The templates of the subject of the emails notifying of a change.
+_SUBJECT_TEMPLATES = {
+    'acl.update': '%(agent)s:%(package_name)s %(acl)s  set to %(status)s',
+    'owner.update': '%(agent)s:%(package_name)s set point of contact to: '
+                    '%(username)s',
+    'package.branch.request': '%(agent)s:%(package.name)s requested new '
+                              'branch %(collection_to.branchname)s',
+    'package.unretire.request': '%(agent)s:%(package.name)s requested '
+                                'that branch %(collection.branchname)s '
+                                'be unretired',
+    'package.update': '%(agent)s updated package: '
+                      '%(package.name)s',
+    'package.update.status': '%(agent)s updated package: '
+                      '%(package_name)s status to '
+                      '%(status)s ['
+                      '%(package_listing.collection.branchname)s]',
+}
+
+# The template of the `admin.action.status.update` topic for the actions
+# requesting a new package
+_ACTION_PKG_TEMPLATE = 'user: %(agent)s updated action: ' \
+    '%(action.id)s of %(action.info.pkg_name)s ' \
+    'from `%(old_status)s` to `%(new_status)s`'
+
+_LOG_FORMATTERS = dict(
+    (topic, LogTemplate(template))
+    for topic, template in _LOG_TEMPLATES.items())
+_SUBJECT_FORMATTERS = dict(
+    (topic, LogTemplate(template))
+    for topic, template in _SUBJECT_TEMPLATES.items())
+# The variants of the template of the `admin.action.status.update` topic,
+# keyed on whether the action requests a new package and whether it comes
+# with a message.
+_ACTION_FORMATTERS = dict(
+    ((new_pkg, with_msg), LogTemplate(
+        (_ACTION_PKG_TEMPLATE if new_pkg
+         else _LOG_TEMPLATES['admin.action.status.update'])
+        + (' with message: %(action.message)s' if with_msg else '')))
+    for new_pkg in (False, True)
+    for with_msg in (False, True)
+)
+
+
+# For the topics changing a value, the dotted paths in the message of the
+# previous and the new value.
+_CHANGE_VALUES = {
+    'acl.update': ('previous_status', 'status'),
+    'owner.update': ('previous_owner', 'username'),
+    'package.update.status': ('prev_status', 'status'),
+    'admin.action.status.update': ('old_status', 'new_status'),
+    'package.monitor.update': (None, 'status'),
+    'package.koschei.update': (None, 'status'),
+}
+
+# The dotted paths in the message of each of the details of a change, the
+# first one set is used.
+_DETAILS_PATHS = [
+    (name, [tuple(path.split('.')) for path in paths])
+    for name, paths in [
+        ('namespace', [
+            'package.namespace', 'package_listing.package.namespace',
+            'acl.packagelist.package.namespace', 'action.package.namespace',
+            'namespace']),
+        ('package', [
+            'package_name', 'package.name', 'package_listing.package.name',
+            'acl.packagelist.package.name', 'action.package.name',
+            'action.info.pkg_name', 'info.pkg_name']),
+        ('branch', [
+            'package_listing.collection.branchname',
+            'acl.packagelist.collection.branchname',
+            'collection_to.branchname', 'collection.branchname']),
+        ('username', ['username', 'acl.fas_name']),
+        ('acl', ['acl', 'acl.acl']),
+    ]
+]
+
+
+def _construct_details(package, topic, message):
+    """ Return the structured information about a change logged, as
+    returned by ``pkgdb2.lib.model.Log.to_json``, from its fedmsg message.
+    """
+    def _first(paths):
+        """ Return the value of the first of the specified paths which is
+        set and is not a dict. """
+        for path in paths:
+            value = _resolve(message, path, None)
+            if value is not None and not isinstance(value, dict):
+                return value
+
+    details = dict(
+        (name, _first(paths)) for name, paths in _DETAILS_PATHS)
+    details['old_value'] = None
+    details['new_value'] = None
+    if package:
+        details['namespace'] = package.namespace
+        details['package'] = package.name
+
+    if topic in _CHANGE_VALUES:
+        old_key, new_key = _CHANGE_VALUES[topic]
+        if old_key:
+            details['old_value'] = _first([(old_key,)])
+        details['new_value'] = _first([(new_key,)])
+
+    return details
 
 
 def log(session, package, topic, message):
     """ Take a partial fedmsg topic and message.
 
     Publish the message and log it in the db.
+
+    If ``PKGDB2_NOTIFICATION_OUTBOX`` is set, the notifications are not
+    sent but queued in the outbox, in the same transaction as the log, see
+    ``pkgdb2.lib.notifications.dispatch_outbox``.
     """
 
     # To avoid a circular import.
     import pkgdb2.lib.model as model
     from pkgdb2.lib.notifications import fedmsg_publish, email_publish
+    from pkgdb2.lib.notifications import queue_fedmsg, queue_email
+
+    outbox = pkgdb2.APP.config.get('PKGDB2_NOTIFICATION_OUTBOX', False)
 
     if pkgdb2.APP.config.get('PKGDB2_FEDMSG_NOTIFICATION', True):
-        fedmsg_publish(topic, message)
+        if outbox:
+            queue_fedmsg(session, topic, message)
+        else:
+            fedmsg_publish(topic, message)
+
+    if topic == 'admin.action.status.update':
+        action = message.get('action') or {}
+        formatter = _ACTION_FORMATTERS[(
+            bool((action.get('info') or {}).get('pkg_name')),
+            bool(action.get('message')),
+        )]
+    else:
+        formatter = _LOG_FORMATTERS[topic]
 
-    # A big lookup of fedmsg topics to model.Log template strings.
-    templates = {
-        'acl.update': 'user: %(agent)s set for %(username)s acl: %(acl)s of'
-                      ' package: %(package_name)s from: '
-                      '%(previous_status)s to: '
-                      '%(status)s on branch: '
-                      '%(package_listing.collection.branchname)s',
-        'acl.delete': 'user: %(agent)s deleted acl: %(acl.acl)s of '
-                      'package: %(acl.packagelist.package.name)s of user: '
-                      '%(acl.fas_name)s on: '
-                      '%(acl.packagelist.collection.branchname)s',
-        'owner.update': 'user: %(agent)s changed point of contact of package: '
-                        '%(package_name)s from: '
-                        '%(previous_owner)s to: '
-                        '%(username)s on branch: '
-                        '%(package_listing.collection.branchname)s',
-        'branch.start': 'user: %(agent)s started branching from '
-                        '%(collection_from.branchname)s to '
-                        '%(collection_to.branchname)s',
-        'branch.complete': 'user: %(agent)s finished branching from '
-                           '%(collection_from.branchname)s to '
-                           '%(collection_to.branchname)s',
-        'package.branch.delete': 'user: %(agent)s deleted branch: '
-                                 '%(package_listing.collection.'
-                                 'branchname)s '
-                                 'for package %(package_listing.'
-                                 'package.name)s ',
-        'package.branch.new': 'user: %(agent)s created branch '
-                              '%(package_listing.collection.'
-                              'branchname)s on package %(package.name)s',
-        'package.branch.request': 'user: %(agent)s requested branch: '
-                                 '%(collection_to.branchname)s '
-                                 'for package %(package.name)s',
-        'package.new.request': 'user: %(agent)s request package: '
-                               '%(info.pkg_name)s on branch '
-                               '%(collection.branchname)s',
-        'package.delete': 'user: %(agent)s deleted package %(package.name)s',
-        'package.new': 'user: %(agent)s created package: '
-                       '%(package_name)s on branch: '
-                       '%(package_listing.collection.branchname)s for point'
-                       ' of contact: %(package_listing.point_of_contact)s',
-        'package.critpath.update': 'user: %(agent)s updated critpath status'
-                                   'for package: %(package.name)s on '
-                                   'branches %(branches)s',
-        'package.unretire.request': 'user: %(agent)s requested branch: '
-                                    '%(collection.branchname)s to be '
-                                    'unretired for package %(package.name)s',
-        'package.update': 'user: %(agent)s updated %(fields)s package: '
-                          '%(package.name)s',
-        'package.update.status': 'user: %(agent)s updated package: '
-                          '%(package_name)s status from: '
-                          '%(prev_status)s to '
-                          '%(status)s on branch: '
-                          '%(package_listing.collection.branchname)s',
-        'collection.new': 'user: %(agent)s created collection: '
-                          '%(collection.name)s',
-        'collection.update': 'user: %(agent)s edited collection: '
-                             '%(collection.name)s',
-        'package.monitor.update': 'user: %(agent)s updated the monitoring '
-                               'status of %(package.name)s to %(status)s',
-        'admin.action.status.update': 'user: %(agent)s updated action: '
-                               '%(action.id)s of %(action.package.name)s '
-                               'from `%(old_status)s` to `%(new_status)s`',
-        'package.koschei.update': 'user: %(agent)s updated the Koschei '
-                               'monitoring status of %(package.name)s to '
-                               '%(status)s',
-        'namespace.new': 'user: %(agent)s added a new namespace: '
-                               '%(namespace)s',
-        'namespace.drop': 'user: %(agent)s removed a namespace: %(namespace)s',
-    }
-    subject_templates = {
-        'acl.update': '%(agent)s:%(package_name)s %(acl)s  set to %(status)s',
-        'owner.update': '%(agent)s:%(package_name)s set point of contact to: '
-                        '%(username)s',
-        'package.branch.request': '%(agent)s:%(package.name)s requested new '
-                                  'branch %(collection_to.branchname)s',
-        'package.unretire.request': '%(agent)s:%(package.name)s requested '
-                                    'that branch %(collection.branchname)s '
-                                    'be unretired',
-        'package.update': '%(agent)s updated package: '
-                          '%(package.name)s',
-        'package.update.status': '%(agent)s updated package: '
-                          '%(package_name)s status to '
-                          '%(status)s ['
-                          '%(package_listing.collection.branchname)s]',
-    }
-    substitutions = _construct_substitutions(message)
-
-    if topic == 'admin.action.status.update' \
-            and 'action' in message \
-            and 'info' in message['action'] \
-            and 'pkg_name' in message['action']['info'] \
-            and message['action']['info']['pkg_name']:
-        templates[topic] = 'user: %(agent)s updated action: ' \
-           '%(action.id)s of %(action.info.pkg_name)s ' \
-           'from `%(old_status)s` to `%(new_status)s`'
-
-    if topic == 'admin.action.status.update' \
-            and 'action' in message \
-            and 'message' in message['action'] \
-            and message['action']['message']:
-        templates[topic] += ' with message: %(action.message)s'
-
-    final_msg = templates[topic] % substitutions
+    final_msg = formatter.format(message)
     subject = None
-    if topic in subject_templates:
-        subject = subject_templates[topic] % substitutions
+    if topic in _SUBJECT_FORMATTERS:
+        subject = _SUBJECT_FORMATTERS[topic].format(message)
 
-    model.Log.insert(session, message['agent'], package, final_msg)
+    model.Log.insert(
+        session, message['agent'], package, final_msg, topic=topic,
+        details=_construct_details(package, topic, message))
 
     if pkgdb2.APP.config.get(
             'PKGDB2_EMAIL_NOTIFICATION', False):  # pragma: no cover
@@ -353,8 +628,13 @@ def log(session, package, topic, message):
                 '{1}/package/{2}'.format(
                     final_msg, pkgdb2.APP.config.get('SITE_URL'),
                     package.name)
-        email_publish(
-            message['agent'], package, body_email, subject=subject)
+        if outbox:
+            queue_email(
+                session, message['agent'], package, body_email,
+                subject=subject)
+        else:
+            email_publish(
+                message['agent'], package, body_email, subject=subject)
 
     return final_msg
 
@@ -119,10 +119,6 @@ def index():
 @UI.route('/stats/')
 def stats():
     ''' Display some statistics aboue the packages in the DB. '''
-    collections = pkgdblib.search_collection(SESSION, '*', 'Active')
-    collections.extend(pkgdblib.search_collection(
-        SESSION, '*', 'Under Development'))
-
     collections = pkgdblib.count_collection(SESSION)
     collections_fedora = pkgdblib.count_fedora_collection(SESSION)
 
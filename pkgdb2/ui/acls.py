@@ -548,17 +548,18 @@ def pending_acl_approve():
         pending_acls = pkgdblib.get_pending_acl_user(
             SESSION, flask.g.fas_user.username)
         try:
-            for acl in pending_acls:
-                pkgdblib.set_acl_package(
-                    SESSION,
-                    namespace=acl['namespace'],
-                    pkg_name=acl['package'],
-                    pkg_branch=acl['collection'],
-                    pkg_user=acl['user'],
-                    acl=acl['acl'],
-                    status='Approved',
-                    user=flask.g.fas_user
-                )
+            results = pkgdblib.set_acl_packages(
+                SESSION,
+                [
+                    (acl['namespace'], acl['package'], acl['collection'],
+                     acl['user'], acl['acl'], 'Approved')
+                    for acl in pending_acls
+                ],
+                user=flask.g.fas_user
+            )
+            for result in results:
+                if isinstance(result, pkgdblib.PkgdbException):
+                    raise result
 
             SESSION.commit()
             flask.flash('All ACLs approved')
@@ -580,17 +581,18 @@ def pending_acl_deny():
         pending_acls = pkgdblib.get_pending_acl_user(
             SESSION, flask.g.fas_user.username)
         try:
-            for acl in pending_acls:
-                pkgdblib.set_acl_package(
-                    SESSION,
-                    namespace=acl['namespace'],
-                    pkg_name=acl['package'],
-                    pkg_branch=acl['collection'],
-                    pkg_user=acl['user'],
-                    acl=acl['acl'],
-                    status='Denied',
-                    user=flask.g.fas_user
-                )
+            results = pkgdblib.set_acl_packages(
+                SESSION,
+                [
+                    (acl['namespace'], acl['package'], acl['collection'],
+                     acl['user'], acl['acl'], 'Denied')
+                    for acl in pending_acls
+                ],
+                user=flask.g.fas_user
+            )
+            for result in results:
+                if isinstance(result, pkgdblib.PkgdbException):
+                    raise result
 
             SESSION.commit()
             flask.flash('All ACLs denied')
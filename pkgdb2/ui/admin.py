@@ -52,6 +52,7 @@ def admin_log():
     refresh = flask.request.args.get('refresh', False)
     limit = flask.request.args.get('limit', APP.config['ITEMS_PER_PAGE'])
     page = flask.request.args.get('page', 1)
+    cursor = flask.request.args.get('cursor', None)
 
     try:
         page = abs(int(page))
@@ -88,6 +89,7 @@ def admin_log():
             from_date=from_date,
             page=page,
             limit=limit,
+            cursor=cursor,
         )
         cnt_logs = pkgdblib.search_logs(
             SESSION,
@@ -164,9 +166,8 @@ def admin_actions():
 
     total_page = int(ceil(cnt_actions / float(limit)))
 
-    action_status = pkgdblib.get_status(
+    action_status = ['All'] + pkgdblib.get_status(
         SESSION, 'admin_status')['admin_status']
-    action_status.insert(0, 'All')
 
     return flask.render_template(
         'list_actions.html',
@@ -182,6 +183,47 @@ def admin_actions():
     )
 
 
+@UI.route('/admin/bugzilla/')
+@is_admin
+def admin_bugzilla_jobs():
+    """ Return the jobs reassigning bugs in bugzilla, with their status.
+    """
+    status = flask.request.args.get('status', None)
+    limit = flask.request.args.get('limit', APP.config['ITEMS_PER_PAGE'])
+    page = flask.request.args.get('page', 1)
+
+    try:
+        page = abs(int(page)) or 1
+    except ValueError:
+        page = 1
+
+    try:
+        limit = abs(int(limit)) or APP.config['ITEMS_PER_PAGE']
+    except ValueError:
+        limit = APP.config['ITEMS_PER_PAGE']
+        flask.flash('Incorrect limit provided, using default', 'errors')
+
+    if status == 'All':
+        status = None
+
+    counts = pkgdblib.count_bugzilla_jobs(SESSION)
+    jobs = pkgdblib.search_bugzilla_jobs(
+        SESSION, status=status, page=page, limit=limit)
+
+    cnt_jobs = counts.get(status, 0) if status else sum(counts.values())
+    total_page = int(ceil(cnt_jobs / float(limit)))
+
+    return flask.render_template(
+        'list_bugzilla_jobs.html',
+        jobs=jobs,
+        counts=counts,
+        total_page=total_page,
+        page=page,
+        status=status or 'All',
+        statuses=['All'] + sorted(counts),
+    )
+
+
 @UI.route('/admin/action/<action_id>/status', methods=['GET', 'POST'])
 @is_admin
 def admin_action_edit_status(action_id):
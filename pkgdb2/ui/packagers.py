@@ -178,9 +178,8 @@ def packager_requests(packager):
 
     total_page = int(ceil(cnt_actions / float(limit)))
 
-    action_status = pkgdblib.get_status(
+    action_status = ['All'] + pkgdblib.get_status(
         SESSION, 'admin_status')['admin_status']
-    action_status.insert(0, 'All')
 
     return flask.render_template(
         'list_actions.html',
@@ -232,9 +232,7 @@ def package_info(namespace, package):
         if listing.collection.status != 'EOL'
     ])
 
-    collections = pkgdb2.lib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.extend(pkgdb2.lib.search_collection(SESSION, '*', 'Active'))
+    collections = pkgdb2.lib.get_collection_registry(SESSION).active()
     branches_possible = [
         collec.branchname
         for collec in collections
@@ -272,6 +270,7 @@ def package_timeline(namespace, package):
     packager = flask.request.args.get('packager', None)
     limit = flask.request.args.get('limit', APP.config['ITEMS_PER_PAGE'])
     page = flask.request.args.get('page', 1)
+    cursor = flask.request.args.get('cursor', None)
 
     try:
         page = abs(int(page))
@@ -308,6 +307,7 @@ def package_timeline(namespace, package):
             from_date=from_date,
             page=page,
             limit=limit,
+            cursor=cursor,
         )
         cnt_logs = pkgdblib.search_logs(
             SESSION,
@@ -491,9 +491,7 @@ def package_request_edit(action_id):
 def package_new():
     ''' Page to create a new package. '''
 
-    collections = pkgdb2.lib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.extend(pkgdb2.lib.search_collection(SESSION, '*', 'Active'))
+    collections = pkgdb2.lib.get_collection_registry(SESSION).active()
     pkg_status = pkgdb2.lib.get_status(SESSION, 'pkg_status')['pkg_status']
     namespaces = pkgdb2.lib.get_status(SESSION, 'namespaces')['namespaces']
 
@@ -834,14 +832,13 @@ def package_unretire(namespace, package, full=True):
     ]
 
     # Get the list of all the collections active or under development
+    registry = pkgdb2.lib.get_collection_registry(SESSION)
     collections = [
         collection.branchname for collection in
-        pkgdb2.lib.search_collection(SESSION, '*', 'Under Development')
+        registry.search('Under Development', reverse=True)
         if collection.branchname in retire_collections
     ]
-    collections.reverse()
-    active_collections = pkgdb2.lib.search_collection(SESSION, '*', 'Active')
-    active_collections.reverse()
+    active_collections = registry.search('Active', reverse=True)
     cnt = 0
     # Restrict the Fedora branch to 2 active versions
     for collection in active_collections:
@@ -1268,9 +1265,7 @@ def package_request_branch(namespace, package, full=True):
         if pkg.collection.status != 'EOL'
     ]
 
-    collections = pkgdb2.lib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.extend(pkgdb2.lib.search_collection(SESSION, '*', 'Active'))
+    collections = pkgdb2.lib.get_collection_registry(SESSION).active()
     branches_possible = [
         collec.branchname
         for collec in collections
@@ -1319,12 +1314,9 @@ def package_request_branch(namespace, package, full=True):
 def package_request_new():
     ''' Page to request a new package. '''
 
-    collections = pkgdb2.lib.search_collection(
-        SESSION, '*', 'Under Development')
-    collections.reverse()
-    active_collections = pkgdb2.lib.search_collection(
-        SESSION, '*', 'Active')
-    active_collections.reverse()
+    registry = pkgdb2.lib.get_collection_registry(SESSION)
+    collections = registry.search('Under Development', reverse=True)
+    active_collections = registry.search('Active', reverse=True)
     # We want all the branch `Under Development` as well as all the `Active`
     # branch but we can only have at max 2 Fedora branch active at the same
     # time. In other words, when Fedora n+1 is released one can no longer
@@ -46,6 +46,9 @@ setup(
     install_requires=get_requirements(),
     scripts=[
         'utility/pkgdb2_branch.py',
+        'utility/pkgdb2_bugzilla_jobs.py',
+        'utility/pkgdb2_dispatch_notifications.py',
+        'utility/pkgdb2_sync_fas.py',
         'utility/pkgdb-sync-bugzilla',
         'utility/update_package_info.py',
     ],
@@ -26,12 +26,18 @@ pkgdb tests.
 __requires__ = ['SQLAlchemy >= 0.7']
 import pkg_resources
 
+import asyncore
+import email
+import fnmatch
+import smtpd
+import threading
 import unittest
 import sys
 import os
 
 from contextlib import contextmanager
 from flask import appcontext_pushed, g
+from sqlalchemy import event
 
 sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
@@ -88,6 +94,74 @@ class FakeFasGroupInvalid(object):
     group_type = 'tracking'
 
 
+class FakeFas(object):
+    """ Fake connection to FAS used for the tests, answering the queries
+    from the accounts it is given.
+    """
+
+    def __init__(self, people=None):
+        self.people = dict(people or {})
+        self.queries = []
+
+    def people_by_key(self, key=u'username', search=u'*', fields=None):
+        """ Return the accounts whose username matches ``search``. """
+        self.queries.append(search)
+        return dict(
+            (username, dict(person, username=username))
+            for username, person in self.people.items()
+            if fnmatch.fnmatchcase(username, search)
+        )
+
+    def person_by_username(self, username):
+        """ Return the account of the specified user, if any. """
+        self.queries.append(username)
+        if username in self.people:
+            return dict(self.people[username], username=username)
+        return {}
+
+
+class FakeSMTPServer(smtpd.SMTPServer):
+    """ Local SMTP server used for the tests, keeping the emails it
+    receives rather than sending them.
+    """
+
+    def __init__(self):
+        smtpd.SMTPServer.__init__(self, ('127.0.0.1', 0), None)
+        self.address = '127.0.0.1:%s' % self.socket.getsockname()[1]
+        self.messages = []
+        self.connections = 0
+        self.running = False
+        self.thread = None
+
+    def handle_accept(self):
+        """ Count the connections opened. """
+        self.connections += 1
+        smtpd.SMTPServer.handle_accept(self)
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        """ Keep the email received. """
+        self.messages.append(
+            (mailfrom, rcpttos, email.message_from_string(data)))
+
+    def start(self):
+        """ Serve in a background thread. """
+        self.running = True
+        self.thread = threading.Thread(target=self._serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _serve(self):
+        """ Handle the connections until stopped. """
+        while self.running:
+            asyncore.loop(timeout=0.01, count=1)
+
+    def stop(self):
+        """ Stop serving and close the connections. """
+        self.running = False
+        self.thread.join()
+        asyncore.close_all()
+
+
 @contextmanager
 def user_set(APP, user):
     """ Set the provided user as fas_user in the provided application."""
@@ -104,6 +178,23 @@ def user_set(APP, user):
         yield
 
 
+@contextmanager
+def count_statements(session):
+    """ Yield the list of the SQL statements sent to the database through
+    the provided session, appended as they are sent. """
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+
+
 class Modeltests(unittest.TestCase):
     """ Model tests. """
 
@@ -120,6 +211,9 @@ class Modeltests(unittest.TestCase):
             if os.path.exists(dbfile):
                 os.unlink(dbfile)
         self.session = model.create_tables(DB_PATH, debug=False)
+        # The fixtures write directly to the database, always check if the
+        # snapshots kept in memory are still up to date
+        APP.config['PKGDB2_STATUS_CHECK_INTERVAL'] = 0
         # Create the docker namespace
         obj = model.Namespace('docker')
         self.session.add(obj)
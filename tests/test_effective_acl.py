@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+pkgdb tests for the EffectiveAcl object.
+'''
+
+__requires__ = ['SQLAlchemy >= 0.8']
+import pkg_resources
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), '..'))
+
+from pkgdb2.lib import model
+from tests import Modeltests, create_package_acl
+
+
+def _get_rows(session):
+    """ Return the content of the effective_acls table, minus the ids. """
+    return sorted(
+        (
+            row.packagelisting_id, row.packagelistingacl_id, row.fas_name,
+            row.acl, row.package_name, row.package_summary,
+            row.package_status, row.collection_branchname,
+            row.collection_status, row.status, row.point_of_contact,
+        )
+        for row in session.query(model.EffectiveAcl).all()
+    )
+
+
+class EffectiveAcltests(Modeltests):
+    """ EffectiveAcl tests. """
+
+    def test_refresh(self):
+        """ Test that the table is kept up to date when flushing and that
+        it matches a full refresh. """
+        create_package_acl(self.session)
+
+        rows = _get_rows(self.session)
+        # 9 package listings and 12 approved ACLs
+        self.assertEqual(len(rows), 21)
+        self.assertEqual(
+            len([row for row in rows if row[3] is None]), 9)
+
+        model.EffectiveAcl.refresh(self.session)
+        self.assertEqual(_get_rows(self.session), rows)
+
+        # Refreshing nothing changes nothing
+        model.EffectiveAcl.refresh(self.session, listing_ids=[])
+        self.assertEqual(_get_rows(self.session), rows)
+
+    def test_acl_change(self):
+        """ Test that changing an ACL updates the exports. """
+        create_package_acl(self.session)
+
+        self.assertEqual(
+            model.notify(self.session, acls='commit'),
+            [('geany', 'group::gtk-sig'), ('geany', 'josef'),
+             ('guake', 'pingou')])
+
+        pkglist = model.PackageListing.by_pkgid_collectionid(
+            self.session,
+            model.Package.by_name(self.session, 'rpms', 'geany').id,
+            model.Collection.by_name(self.session, 'master').id)
+        for acl in pkglist.acls:
+            if acl.acl == 'commit' and acl.fas_name == 'josef':
+                acl.status = 'Obsolete'
+        self.session.commit()
+
+        self.assertEqual(
+            model.notify(self.session, acls='commit'),
+            [('geany', 'group::gtk-sig'), ('guake', 'pingou')])
+
+    def test_collection_status(self):
+        """ Test that changing the status of a collection updates the
+        exports. """
+        create_package_acl(self.session)
+
+        branches = set(row[2] for row in model.vcs_acls(self.session))
+        self.assertEqual(branches, set(['master', 'f18', 'f17']))
+
+        collection = model.Collection.by_name(self.session, 'f18')
+        collection.status = 'EOL'
+        self.session.commit()
+
+        branches = set(row[2] for row in model.vcs_acls(self.session))
+        self.assertEqual(branches, set(['master', 'f17']))
+
+        branches = set(
+            row[2] for row in model.vcs_acls(self.session, eol=True))
+        self.assertEqual(branches, set(['master', 'f18', 'f17', 'el4']))
+
+
+if __name__ == '__main__':
+    SUITE = unittest.TestLoader().loadTestsFromTestCase(EffectiveAcltests)
+    unittest.TextTestRunner(verbosity=2).run(SUITE)
@@ -32,6 +32,7 @@ import sys
 import os
 
 from mock import patch
+from sqlalchemy.exc import SQLAlchemyError
 
 sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
@@ -227,6 +228,150 @@ class FlaskApiAclsTest(Modeltests):
             self.assertEqual(output.status_code, 200)
             self.assertEqual(json_out, exp)
 
+    @patch('pkgdb2.lib.utils.get_packagers')
+    @patch('pkgdb2.packager_login_required')
+    @patch('pkgdb2.lib.utils.get_bz_email_user')
+    def test_acl_bulk_update(self, bz_mail_func, login_func, pkger_func):
+        """ Test the api_acl_bulk_update function.  """
+        login_func.return_value = None
+        bz_mail_func.return_value = 1
+        pkger_func.return_value = ['pingou', 'ralph', 'toshio']
+
+        user = FakeFasUser()
+        with user_set(APP, user):
+            output = self.app.post('/api/package/acl/bulk/')
+            self.assertEqual(output.status_code, 500)
+            data = json.loads(output.data)
+            self.assertEqual(
+                data,
+                {
+                    "output": "notok",
+                    "error": "Invalid input submitted",
+                }
+            )
+
+            output = self.app.post(
+                '/api/package/acl/bulk/',
+                data={'changes': json.dumps([{'pkgname': 'guake'}])})
+            self.assertEqual(output.status_code, 500)
+
+        create_package_acl(self.session)
+
+        changes = [
+            {
+                'pkgname': 'guake',
+                'branch': 'master',
+                'user': 'toshio',
+                'acl': 'commit',
+                'acl_status': 'Approved',
+            },
+            ['rpms', 'guake', 'master', 'toshio', 'watchcommits',
+             'Awaiting Review'],
+            ['rpms', 'guake', 'f18', 'toshio', 'commit', 'Approved'],
+        ]
+        with user_set(APP, user):
+            output = self.app.post(
+                '/api/package/acl/bulk/',
+                data=json.dumps({'changes': changes}),
+                content_type='application/json')
+            self.assertEqual(output.status_code, 200)
+            data = json.loads(output.data)
+            self.assertEqual(
+                data,
+                {
+                    "output": "ok",
+                    "results": [
+                        {
+                            "output": "ok",
+                            "message": "user: pingou set for toshio acl: "
+                            "commit of package: guake from: Awaiting Review "
+                            "to: Approved on branch: master",
+                        },
+                        {
+                            "output": "ok",
+                            "message": "user: pingou set for toshio acl: "
+                            "watchcommits of package: guake from:  "
+                            "to: Approved on branch: master",
+                        },
+                        {
+                            "output": "notok",
+                            "error": "You are not allowed to update ACLs "
+                            "of someone else.",
+                        },
+                    ]
+                }
+            )
+
+            # Sent again, as a form field, there is nothing left to do
+            output = self.app.post(
+                '/api/package/acl/bulk/',
+                data={'changes': json.dumps(changes[:2])})
+            self.assertEqual(output.status_code, 200)
+            data = json.loads(output.data)
+            self.assertEqual(
+                [res['message'] for res in data['results']],
+                [
+                    "Nothing to update on branch: master for acl: commit",
+                    "Nothing to update on branch: master for acl: "
+                    "watchcommits",
+                ]
+            )
+
+            # The branch must be active and the namespace known
+            changes = [
+                ['rpms', 'guake', 'el4', 'toshio', 'commit', 'Approved'],
+                ['foo', 'guake', 'master', 'toshio', 'commit', 'Approved'],
+            ]
+            output = self.app.post(
+                '/api/package/acl/bulk/',
+                data=json.dumps({'changes': changes}),
+                content_type='application/json')
+            self.assertEqual(output.status_code, 500)
+            data = json.loads(output.data)
+            self.assertEqual(
+                data,
+                {
+                    "output": "notok",
+                    "results": [
+                        {"output": "notok", "error": "Invalid branch: el4"},
+                        {"output": "notok", "error": "Invalid namespace: foo"},
+                    ]
+                }
+            )
+            self.assertEqual(
+                pkgdb2.lib.get_acl_package(
+                    self.session, 'rpms', 'guake', pkg_clt='el4'),
+                [])
+
+            output = self.app.post(
+                '/api/package/acl/bulk/',
+                data=json.dumps({'changes': changes + [
+                    ['rpms', 'guake', 'master', 'toshio', 'watchbugzilla',
+                     'Awaiting Review']]}),
+                content_type='application/json')
+            self.assertEqual(output.status_code, 200)
+            data = json.loads(output.data)
+            self.assertEqual(
+                [res['output'] for res in data['results']],
+                ['notok', 'notok', 'ok'])
+
+            # Nothing is saved if the database fails
+            with patch('pkgdb2.lib.set_acl_packages') as mock_set:
+                mock_set.side_effect = SQLAlchemyError('db is down')
+                output = self.app.post(
+                    '/api/package/acl/bulk/',
+                    data=json.dumps({'changes': changes}),
+                    content_type='application/json')
+            self.assertEqual(output.status_code, 500)
+            data = json.loads(output.data)
+            self.assertEqual(
+                data,
+                {
+                    "output": "notok",
+                    "error": "Could not save the ACLs to the database",
+                }
+            )
+
     @patch('pkgdb2.lib.utils')
     @patch('pkgdb2.packager_login_required')
     def test_acl_reassign(self, login_func, mock_func):
@@ -37,7 +37,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
 
 import pkgdb2
-from tests import (Modeltests, FakeFasUser, FakeFasUserAdmin, user_set)
+from tests import (Modeltests, FakeFasUser, FakeFasUserAdmin, user_set,
+                   create_package_acl, create_admin_actions)
 
 
 class FlaskApiAdminTest(Modeltests):
@@ -141,6 +142,51 @@ class FlaskApiAdminTest(Modeltests):
         self.assertEqual(
             data['error'], 'No actions found for these parameters')
 
+    def test_api_admin_actions_cursor(self):
+        """ Test the api_admin_actions function paginated with a cursor.
+        """
+        create_package_acl(self.session)
+        create_admin_actions(self.session, n=2)
+
+        output = self.app.get('/api/admin/actions/?cursor=abc')
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(data['output'], 'notok')
+        self.assertEqual(data['error'], 'Wrong cursor provided')
+
+        # Cursor of the packages
+        cursor = pkgdb2.lib.model.Package.by_name(
+            self.session, 'rpms', 'guake').cursor
+        output = self.app.get('/api/admin/actions/?cursor=%s' % cursor)
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(data['output'], 'notok')
+        self.assertEqual(data['error'], 'Wrong cursor provided')
+
+        output = self.app.get('/api/admin/actions/')
+        expected = [
+            action['id'] for action in json.loads(output.data)['actions']]
+        self.assertEqual(len(expected), 3)
+
+        # First page
+        output = self.app.get('/api/admin/actions/?cursor=&limit=2')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            sorted(data.keys()), ['actions', 'next_cursor', 'output'])
+        self.assertEqual(
+            [action['id'] for action in data['actions']], expected[:2])
+        self.assertNotEqual(data['next_cursor'], None)
+
+        # Last page
+        output = self.app.get(
+            '/api/admin/actions/?limit=2&cursor=%s' % data['next_cursor'])
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            [action['id'] for action in data['actions']], expected[2:])
+        self.assertEqual(data['next_cursor'], None)
+
     @patch('pkgdb2.lib.utils')
     @patch('pkgdb2.packager_login_required')
     def test_api_admin_action(self, login_func, mock_func):
@@ -26,15 +26,21 @@ pkgdb tests for the Flask API regarding collections.
 __requires__ = ['SQLAlchemy >= 0.8']
 import pkg_resources
 
+import gzip
 import json
+import shutil
+import tempfile
 import unittest
 import sys
 import os
 
+from cStringIO import StringIO
+
 sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
 
 import pkgdb2
+from pkgdb2.lib import model
 from tests import (Modeltests, create_package_acl, create_package_acl2,
                    create_package_critpath, create_retired_pkgs)
 
@@ -371,6 +377,158 @@ guake|pingou
 
         self.assertEqual(data, expected)
 
+    def test_api_vcs_snapshot(self):
+        """ Test that the output of api_vcs is served from a snapshot
+        regenerated when the data changes. """
+        folder = tempfile.mkdtemp(prefix='pkgdb2-tests-')
+        pkgdb2.APP.config['PKGDB2_SNAPSHOT_DIR'] = folder
+        try:
+            create_package_acl2(self.session)
+
+            # The first request streams the output while making the
+            # snapshot, the following ones are served from the snapshot
+            output = self.app.get('/api/vcs/')
+            self.assertEqual(output.status_code, 200)
+            self.assertTrue('rpms/geany/f18' in output.data)
+            self.assertTrue(output.headers['ETag'].startswith('W/'))
+            self.assertFalse('Content-Length' in output.headers)
+            self.assertEqual(len(os.listdir(folder)), 3)
+
+            output2 = self.app.get('/api/vcs/')
+            self.assertEqual(output2.data, output.data)
+            etag = output2.headers['ETag']
+            self.assertNotEqual(etag, output.headers['ETag'])
+            self.assertEqual(
+                output2.headers['Content-Length'], str(len(output.data)))
+
+            # Both ETags are recognized
+            for value in (etag, output.headers['ETag']):
+                output2 = self.app.get(
+                    '/api/vcs/', headers={'If-None-Match': value})
+                self.assertEqual(output2.status_code, 304)
+                self.assertEqual(output2.data, '')
+
+            output2 = self.app.get(
+                '/api/vcs/', environ_base={'HTTP_ACCEPT_ENCODING': 'gzip'})
+            self.assertEqual(output2.headers['Content-Encoding'], 'gzip')
+            self.assertNotEqual(output2.headers['ETag'], etag)
+            self.assertEqual(
+                gzip.GzipFile(fileobj=StringIO(output2.data)).read(),
+                output.data)
+
+            # Another variant has its own snapshot
+            output2 = self.app.get('/api/vcs/?format=json')
+            self.assertEqual(output2.status_code, 200)
+            data = json.loads(output2.data)
+            self.assertTrue('geany' in data['rpms'])
+            self.assertEqual(len(os.listdir(folder)), 6)
+
+            # Changing the data regenerates the snapshot
+            collection = model.Collection.by_name(self.session, 'f18')
+            collection.status = 'EOL'
+            model.Log.insert(
+                self.session, 'pingou', None, 'Collection f18 is EOL')
+            self.session.commit()
+
+            output2 = self.app.get('/api/vcs/')
+            self.assertEqual(output2.status_code, 200)
+            self.assertFalse('rpms/geany/f18' in output2.data)
+
+            # The content of the previous snapshot is removed
+            output2 = self.app.get('/api/vcs/')
+            self.assertNotEqual(output2.headers['ETag'], etag)
+            self.assertEqual(len(os.listdir(folder)), 6)
+        finally:
+            pkgdb2.APP.config['PKGDB2_SNAPSHOT_DIR'] = None
+            shutil.rmtree(folder)
+
+    def test_api_changes(self):
+        """ Test the api_changes function. """
+        output = self.app.get('/api/changes/')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            data, {'output': 'ok', 'changes': [], 'next_cursor': None})
+
+        output = self.app.get('/api/changes/?since=abc')
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(data['error'], 'Wrong cursor provided')
+
+        create_package_acl(self.session)
+        package = model.Package.by_name(self.session, 'rpms', 'guake')
+        for status in ('Awaiting Review', 'Approved'):
+            pkgdb2.lib.utils.log(
+                self.session, package, 'acl.update', dict(
+                    agent='pingou',
+                    username='ralph',
+                    acl='commit',
+                    previous_status='Approved',
+                    status=status,
+                    package_name='guake',
+                    package_listing={'collection': {'branchname': 'master'}},
+                ))
+        pkgdb2.lib.utils.log(
+            self.session, None, 'namespace.new', dict(
+                agent='pingou', namespace='docker'))
+        self.session.commit()
+
+        # Cursors of the admin logs and of the admin actions are sorted by
+        # date, an identifier sent as string is rejected as well
+        log = self.session.query(model.Log).first()
+        for cursor in [log.cursor, model.encode_cursor(['1', 2])]:
+            output = self.app.get('/api/changes/?since=%s' % cursor)
+            self.assertEqual(output.status_code, 500)
+            data = json.loads(output.data)
+            self.assertEqual(data['error'], 'Wrong cursor provided')
+
+        output = self.app.get('/api/changes/?limit=1')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(len(data['changes']), 1)
+        self.assertEqual(data['changes'][0]['new_value'], 'Awaiting Review')
+        self.assertEqual(
+            data['changes'][0]['cursor'], data['next_cursor'])
+        del data['changes'][0]['date']
+        del data['changes'][0]['cursor']
+        self.assertEqual(
+            data['changes'][0],
+            {
+                'topic': 'acl.update',
+                'user': 'pingou',
+                'description': 'user: pingou set for ralph acl: commit of '
+                'package: guake from: Approved to: Awaiting Review on '
+                'branch: master',
+                'namespace': 'rpms',
+                'package': 'guake',
+                'branch': 'master',
+                'username': 'ralph',
+                'acl': 'commit',
+                'old_value': 'Approved',
+                'new_value': 'Awaiting Review',
+            }
+        )
+
+        cursor = data['next_cursor']
+        output = self.app.get('/api/changes/?since=%s' % cursor)
+        data = json.loads(output.data)
+        self.assertEqual(
+            [chg['topic'] for chg in data['changes']],
+            ['acl.update', 'namespace.new'])
+        self.assertEqual(data['changes'][1]['namespace'], 'docker')
+
+        output = self.app.get(
+            '/api/changes/?since=%s&topic=namespace.new' % cursor)
+        data = json.loads(output.data)
+        self.assertEqual(len(data['changes']), 1)
+
+        # No changes since the last one
+        cursor = data['next_cursor']
+        output = self.app.get('/api/changes/?since=%s' % cursor)
+        data = json.loads(output.data)
+        self.assertEqual(data['changes'], [])
+        self.assertEqual(data['next_cursor'], cursor)
+
     def test_api_vcs_filled(self):
         """ Test the api_vcs function with a filled database. """
         # Filled DB
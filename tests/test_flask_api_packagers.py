@@ -239,6 +239,56 @@ class FlaskApiPackagersTest(Modeltests):
             output['acls'][1]['packagelist']['collection']['branchname'],
             'master')
 
+    def test_packager_acl_cursor(self):
+        """ Test the api_packager_acl function paginated with a cursor. """
+        create_package_acl(self.session)
+
+        output = self.app.get('/api/packager/acl/pingou/?cursor=abc')
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(
+            data, {'output': 'notok', 'error': 'Wrong cursor provided'})
+
+        # Cursor of the packagers
+        cursor = pkgdb2.lib.get_packager_cursor('pingou')
+        output = self.app.get(
+            '/api/packager/acl/pingou/?cursor=%s' % cursor)
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(
+            data, {'output': 'notok', 'error': 'Wrong cursor provided'})
+
+        output = self.app.get('/api/packager/acl/pingou/')
+        expected = json.loads(output.data)['acls']
+        self.assertEqual(len(expected), 5)
+
+        # First page
+        output = self.app.get('/api/packager/acl/pingou/?cursor=&limit=2')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            sorted(data.keys()), ['acls', 'next_cursor', 'output'])
+        self.assertEqual(data['acls'], expected[:2])
+        self.assertNotEqual(data['next_cursor'], None)
+
+        # Next page
+        output = self.app.get(
+            '/api/packager/acl/pingou/?limit=2&cursor=%s'
+            % data['next_cursor'])
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(data['acls'], expected[2:4])
+        self.assertNotEqual(data['next_cursor'], None)
+
+        # Last page
+        output = self.app.get(
+            '/api/packager/acl/pingou/?limit=2&cursor=%s'
+            % data['next_cursor'])
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(data['acls'], expected[4:])
+        self.assertEqual(data['next_cursor'], None)
+
     def test_packager_list(self):
         """ Test the api_packager_list function.  """
 
@@ -275,6 +325,52 @@ class FlaskApiPackagersTest(Modeltests):
         self.assertEqual(len(output['packagers']), 1)
         self.assertEqual(output['packagers'][0], 'pingou')
 
+    def test_packager_list_cursor(self):
+        """ Test the api_packager_list function paginated with a cursor.
+        """
+        create_package_acl(self.session)
+
+        output = self.app.get('/api/packagers/?cursor=abc')
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(
+            data, {'output': 'notok', 'error': 'Wrong cursor provided'})
+
+        # Cursor of the ACLs of a packager
+        cursor = self.session.query(
+            pkgdb2.lib.model.PackageListingAcl).first().cursor
+        output = self.app.get('/api/packagers/?cursor=%s' % cursor)
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(
+            data, {'output': 'notok', 'error': 'Wrong cursor provided'})
+
+        # First page
+        output = self.app.get('/api/packagers/?cursor=&limit=2')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            sorted(data.keys()), ['next_cursor', 'output', 'packagers'])
+        self.assertEqual(data['packagers'], ['group::gtk-sig', 'josef'])
+        self.assertNotEqual(data['next_cursor'], None)
+
+        # Last page
+        output = self.app.get(
+            '/api/packagers/?limit=2&cursor=%s' % data['next_cursor'])
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(data['packagers'], ['pingou'])
+        self.assertEqual(data['next_cursor'], None)
+
+        # Past the last page
+        output = self.app.get(
+            '/api/packagers/?limit=2&cursor=%s'
+            % pkgdb2.lib.get_packager_cursor('pingou'))
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            data, {'output': 'ok', 'packagers': [], 'next_cursor': None})
+
     def test_packager_stats(self):
         """ Test the api_packager_stats function.  """
 
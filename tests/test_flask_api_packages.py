@@ -1363,6 +1363,130 @@ class FlaskApiPackagesTest(Modeltests):
         self.assertEqual(data['output'], 'notok')
         self.assertEqual(data['packages'], [])
 
+    def test_api_package_list_multiple(self):
+        """ Test the api_package_list function when searching for several
+        branches and status at once.  """
+        create_package_acl(self.session)
+
+        output = self.app.get(
+            '/api/packages/?branches=master&branches=f18'
+            '&status=Approved&status=Orphaned&limit=1&page=2')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            [pkg['name'] for pkg in data['packages']], ['geany'])
+        self.assertEqual(data['page'], 2)
+        self.assertEqual(data['page_total'], 3)
+
+        output = self.app.get(
+            '/api/packages/?branches=master&branches=f18'
+            '&status=Approved&status=Orphaned&count=True')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(data['packages'], 3)
+
+        output = self.app.get(
+            '/api/packages/?branches=master&branches=f18&page=4&limit=1')
+        self.assertEqual(output.status_code, 404)
+
+    def test_api_package_list_cursor(self):
+        """ Test the api_package_list function when paginating with a
+        cursor.  """
+        create_package_acl(self.session)
+
+        output = self.app.get('/api/packages/?cursor=abc')
+        self.assertEqual(output.status_code, 500)
+        data = json.loads(output.data)
+        self.assertEqual(data['output'], 'notok')
+        self.assertEqual(data['error'], 'Wrong cursor provided')
+
+        # Cursors of the packagers and of the ACLs of a packager
+        for cursor in [
+                pkgdblib.get_packager_cursor('pingou'),
+                self.session.query(model.PackageListingAcl).first().cursor]:
+            output = self.app.get('/api/packages/?cursor=%s' % cursor)
+            self.assertEqual(output.status_code, 500)
+            data = json.loads(output.data)
+            self.assertEqual(data['output'], 'notok')
+            self.assertEqual(data['error'], 'Wrong cursor provided')
+
+        output = self.app.get('/api/packages/?cursor=&limit=2')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            sorted(data.keys()), ['next_cursor', 'output', 'packages'])
+        self.assertEqual(
+            [pkg['name'] for pkg in data['packages']], ['fedocal', 'geany'])
+        self.assertNotEqual(data['next_cursor'], None)
+
+        output = self.app.get(
+            '/api/packages/?limit=2&cursor=%s' % data['next_cursor'])
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            [pkg['name'] for pkg in data['packages']], ['guake'])
+        self.assertEqual(data['next_cursor'], None)
+
+        # Several branches
+        output = self.app.get(
+            '/api/packages/?cursor=&limit=1&branches=master&branches=f18')
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.data)
+        self.assertEqual(
+            [pkg['name'] for pkg in data['packages']], ['fedocal'])
+
+        output = self.app.get(
+            '/api/packages/?limit=1&branches=master&branches=f18&cursor=%s'
+            % data['next_cursor'])
+        data = json.loads(output.data)
+        self.assertEqual(
+            [pkg['name'] for pkg in data['packages']], ['geany'])
+
+    def test_api_package_list_conditional(self):
+        """ Test the conditional GET requests on api_package_list. """
+        create_package_acl(self.session)
+        model.Log.insert(self.session, 'pingou', None, 'Some change')
+        self.session.commit()
+
+        output = self.app.get('/api/packages/?pattern=g*')
+        self.assertEqual(output.status_code, 200)
+        etag = output.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        last_modified = output.headers['Last-Modified']
+
+        output = self.app.get(
+            '/api/packages/?pattern=g*', headers={'If-None-Match': etag})
+        self.assertEqual(output.status_code, 304)
+        self.assertEqual(output.data, '')
+
+        output = self.app.get(
+            '/api/packages/?pattern=g*',
+            headers={'If-Modified-Since': last_modified})
+        self.assertEqual(output.status_code, 304)
+
+        # JSONP
+        output = self.app.get(
+            '/api/packages/?pattern=g*&callback=cb')
+        self.assertEqual(output.status_code, 200)
+        self.assertTrue(output.data.startswith('cb('))
+        self.assertEqual(output.headers['ETag'], etag)
+
+        output = self.app.get(
+            '/api/packages/?pattern=g*&callback=cb',
+            headers={'If-None-Match': etag})
+        self.assertEqual(output.status_code, 304)
+
+        # The data changed
+        model.Log.insert(self.session, 'pingou', None, 'Another change')
+        self.session.commit()
+
+        output = self.app.get(
+            '/api/packages/?pattern=g*', headers={'If-None-Match': etag})
+        self.assertEqual(output.status_code, 200)
+        self.assertNotEqual(output.headers['ETag'], etag)
+        data = json.loads(output.data)
+        self.assertEqual(len(data['packages']), 2)
+
     @patch('pkgdb2.lib.utils')
     @patch('pkgdb2.is_admin')
     def test_api_package_edit(self, login_func, mock_func):
@@ -36,6 +36,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
 
 import pkgdb2
+from pkgdb2.lib import model
 from tests import (
     Modeltests, FakeFasUser, FakeFasUserAdmin, user_set,
     create_collection, create_package, create_admin_actions,
@@ -70,6 +71,33 @@ class FlaskUiAdminTest(Modeltests):
             self.assertEqual(output.status_code, 200)
             self.assertTrue('<h1>Admin interface</h1>' in output.data)
 
+    @patch('pkgdb2.is_admin')
+    def test_admin_bugzilla_jobs(self, login_func):
+        """ Test the admin_bugzilla_jobs function. """
+        login_func.return_value = None
+
+        user = FakeFasUserAdmin()
+        with user_set(pkgdb2.APP, user):
+            output = self.app.get('/admin/bugzilla/')
+            self.assertEqual(output.status_code, 200)
+            self.assertTrue('<h1>Bugzilla jobs</h1>' in output.data)
+            self.assertTrue('<p>No jobs found</p>' in output.data)
+
+        model.BugzillaJob.enqueue(
+            self.session, 'toshio', 'pingou', 'guake', 'Fedora', '18')
+        self.session.commit()
+
+        with user_set(pkgdb2.APP, user):
+            output = self.app.get('/admin/bugzilla/?status=Pending')
+            self.assertEqual(output.status_code, 200)
+            self.assertTrue('1 pending, 0 done,' in output.data)
+            self.assertTrue(
+                '<td class="col_odd">guake</td>' in output.data)
+
+            output = self.app.get('/admin/bugzilla/?status=Failed&page=a')
+            self.assertEqual(output.status_code, 200)
+            self.assertTrue('<p>No jobs found</p>' in output.data)
+
     @patch('pkgdb2.is_admin')
     def test_admin_log(self, login_func):
         """ Test the admin_log function. """
@@ -34,8 +34,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
 
 from pkgdb2.lib import model
-from tests import (Modeltests, create_package, create_package_acl,
-                   create_retired_pkgs)
+from tests import (Modeltests, count_statements, create_package,
+                   create_package_acl, create_retired_pkgs)
 
 
 class Packagetests(Modeltests):
@@ -135,6 +135,73 @@ class Packagetests(Modeltests):
         self.assertEqual(len(packages), 1)
         self.assertEqual(packages[0].name, 'geany')
 
+    def test_search_eager(self):
+        """ Test the search function of Package when loading everything
+        needed to serialize the packages with their ACLs. """
+        create_package_acl(self.session)
+
+        packages = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='g%')
+        expected = [pkg.to_json() for pkg in packages]
+
+        self.session.expunge_all()
+        packages = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='g%',
+            eager=True)
+
+        with count_statements(self.session) as queries:
+            output = [pkg.to_json() for pkg in packages]
+
+        self.assertEqual(output, expected)
+        self.assertEqual(queries, [])
+
+    def test_search_total(self):
+        """ Test the search function of Package when searching several
+        status and branches and retrieving the total number of results. """
+        create_package_acl(self.session)
+
+        packages, total = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='%',
+            pkg_status=['Approved', 'Orphaned'], pkg_branch=['master', 'f18'],
+            limit=2, total=True)
+        self.assertEqual(
+            [pkg.name for pkg in packages], ['fedocal', 'geany'])
+        self.assertEqual(total, 3)
+
+        packages, total = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='%',
+            pkg_status=['Approved', 'Orphaned'], pkg_branch=['master', 'f18'],
+            limit=2, offset=2, total=True)
+        self.assertEqual([pkg.name for pkg in packages], ['guake'])
+        self.assertEqual(total, 3)
+
+        packages, total = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='%',
+            pkg_branch='master', limit=2, offset=10, total=True)
+        self.assertEqual(packages, [])
+        self.assertEqual(total, 3)
+
+    def test_search_cursor(self):
+        """ Test the search function of Package when paginating with a
+        cursor. """
+        create_package_acl(self.session)
+
+        packages = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='%',
+            eol=True, limit=2)
+        self.assertEqual(
+            [pkg.name for pkg in packages], ['fedocal', 'geany'])
+
+        packages = model.Package.search(
+            session=self.session, namespace='rpms', pkg_name='%',
+            eol=True, limit=2,
+            after=model.decode_cursor(packages[-1].cursor))
+        self.assertEqual(
+            [pkg.name for pkg in packages], ['guake'])
+
+        self.assertRaises(
+            ValueError, model.decode_cursor, 'not a cursor')
+
     def test_get_package_of_user(self):
         """ Test the get_package_of_user function of Package. """
         create_package_acl(self.session)
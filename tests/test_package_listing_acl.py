@@ -184,6 +184,36 @@ class PackageListingAcltests(Modeltests):
             self.session, 'toshio', poc=True)
         self.assertEqual(0, len(acls))
 
+    def test_create_many(self):
+        """ Test the create_many function of PackageListingAcl. """
+        create_package_acl(self.session)
+
+        pkglisting = model.PackageListing.by_pkgid_collectionid(
+            self.session,
+            model.Package.by_name(self.session, 'rpms', 'geany').id,
+            model.Collection.by_name(self.session, 'master').id)
+
+        model.PackageListingAcl.create_many(self.session, [])
+        model.PackageListingAcl.create_many(
+            self.session,
+            [
+                ('toshio', pkglisting.id, 'commit', 'Approved'),
+                ('toshio', pkglisting.id, 'watchcommits', 'Awaiting Review'),
+            ]
+        )
+        self.session.commit()
+
+        acls = model.PackageListingAcl.get_many(
+            self.session, ['toshio'], [pkglisting.id])
+        self.assertEqual(
+            [(acl.acl, acl.status) for acl in acls],
+            [('commit', 'Approved'), ('watchcommits', 'Awaiting Review')])
+
+        # Only the approved ACL made it to the effective ACLs
+        effective = self.session.query(model.EffectiveAcl).filter(
+            model.EffectiveAcl.fas_name == 'toshio').all()
+        self.assertEqual([acl.acl for acl in effective], ['commit'])
+
 
 if __name__ == '__main__':
     SUITE = unittest.TestLoader().loadTestsFromTestCase(
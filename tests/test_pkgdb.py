@@ -33,7 +33,10 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(
     os.path.abspath(__file__)), '..'))
 
+import dogpile.cache
+
 import pkgdb2
+from pkgdb2.lib import model
 from tests import Modeltests, FakeFasUser, FakeFasUserAdmin
 
 
@@ -66,6 +69,50 @@ class Pkgdbtests(Modeltests):
         # Reset the ADMIN_GROUP for the other tests
         pkgdb2.APP.config['ADMIN_GROUP'] = ('sysadmin-main', 'sysadmin-cvs')
 
+    def test_cache_on_data_version(self):
+        """ Test the cache_on_data_version decorator of pkgdb2. """
+        calls = []
+
+        @pkgdb2.cache_on_data_version
+        def _double(session, value):
+            """ Function whose output is cached. """
+            calls.append(value)
+            return value * 2
+
+        cache = pkgdb2.CACHE
+        pkgdb2.CACHE = dogpile.cache.make_region().configure(
+            'dogpile.cache.memory')
+        try:
+            self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(_double(self.session, value=3), 6)
+            self.assertEqual(calls, [2, 3])
+
+            # Changes not committed yet are not cached
+            model.Log.insert(self.session, 'pingou', None, 'Some change')
+            self.session.flush()
+            self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(calls, [2, 3, 2, 2])
+
+            # The data changed, the output is computed again, once
+            self.session.commit()
+            self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(calls, [2, 3, 2, 2, 2])
+
+            # A change committed after another one with a higher
+            # identifier is a change of the data too
+            for log_id in (1000, 500):
+                log = model.Log('pingou', None, 'Change %s' % log_id)
+                log.id = log_id
+                self.session.add(log)
+                self.session.commit()
+                self.assertEqual(_double(self.session, 2), 4)
+            self.assertEqual(calls, [2, 3, 2, 2, 2, 2, 2])
+        finally:
+            pkgdb2.CACHE = cache
+
 
 if __name__ == '__main__':
     SUITE = unittest.TestLoader().loadTestsFromTestCase(Pkgdbtests)
@@ -30,9 +30,13 @@ import mock
 import unittest
 import sys
 import os
+import threading
+import time
 
+import datetime
 from datetime import date
 
+import sqlalchemy
 from mock import patch
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import IntegrityError
@@ -42,11 +46,16 @@ sys.path.insert(0, os.path.join(os.path.dirname(
 
 import pkgdb2
 import pkgdb2.lib as pkgdblib
+import pkgdb2.lib.notifications
 from tests import (FakeFasUser, FakeFasUserAdmin, Modeltests,
-                   FakeFasGroupValid, FakeFasGroupInvalid,
+                   FakeFas, FakeFasGroupValid, FakeFasGroupInvalid,
+                   FakeSMTPServer, count_statements,
                    create_collection, create_package_acl,
                    create_package_acl2, create_package_critpath)
 
+# Some of the tests below replace it with a mock
+GET_FAS_GROUP = pkgdb2.lib.utils.get_fas_group
+
 
 class PkgdbLibtests(Modeltests):
     """ PkgdbLib tests. """
@@ -217,6 +226,57 @@ class PkgdbLibtests(Modeltests):
         self.assertEqual('geany', packages[1].name)
         self.assertEqual('fedocal', packages[2].name)
 
+    def test_lookups(self):
+        """ Test the get_package, get_collection and get_package_listing
+        functions and their lookup cache. """
+        create_package_acl(self.session)
+
+        with count_statements(self.session) as statements:
+            package = pkgdblib.get_package(self.session, 'rpms', 'guake')
+            collection = pkgdblib.get_collection(self.session, 'master')
+            pkglist = pkgdblib.get_package_listing(
+                self.session, package.id, collection.id)
+            self.assertEqual(len(statements), 3)
+
+            # Served from the cache
+            self.assertTrue(
+                pkgdblib.get_package(self.session, 'rpms', 'guake')
+                is package)
+            self.assertTrue(
+                pkgdblib.get_collection(self.session, 'master')
+                is collection)
+            self.assertTrue(
+                pkgdblib.get_package_listing(
+                    self.session, package.id, collection.id) is pkglist)
+            # Only the listings and the f18 collection are queried
+            pkgdblib.get_acl_package(
+                self.session, 'rpms', 'guake', pkg_clt='master')
+            self.assertEqual(len(statements), 5)
+
+        # Not found is not cached
+        self.assertRaises(
+            NoResultFound, pkgdblib.get_package,
+            self.session, 'rpms', 'terminator')
+        self.assertEqual(
+            pkgdblib.get_package_listing(
+                self.session, package.id, 12345), None)
+
+        # Renaming a package drops the cache
+        package.name = 'guake2'
+        self.session.flush()
+        self.assertRaises(
+            NoResultFound, pkgdblib.get_package,
+            self.session, 'rpms', 'guake')
+        self.assertEqual(
+            pkgdblib.get_package(self.session, 'rpms', 'guake2'), package)
+
+        # So does committing or rolling back
+        self.session.rollback()
+        self.assertFalse('pkgdb2_lookups' in self.session.info)
+        pkgdblib.get_collection(self.session, 'master')
+        self.session.commit()
+        self.assertFalse('pkgdb2_lookups' in self.session.info)
+
     def test_get_acl_package(self):
         """ Test the get_acl_package function. """
         create_package_acl(self.session)
@@ -491,6 +551,71 @@ class PkgdbLibtests(Modeltests):
         self.assertEqual(pkg_acl[0].package.name, 'guake')
         self.assertEqual(len(pkg_acl[0].acls), 7)
 
+    @patch('pkgdb2.lib.utils.get_packagers')
+    @patch('pkgdb2.lib.utils.get_bz_email_user')
+    def test_set_acl_packages(self, bz_mail_func, pkger_func):
+        """ Test the set_acl_packages function. """
+        create_package_acl(self.session)
+
+        bz_mail_func.return_value = 1
+        pkger_func.return_value = ['pingou', 'ralph', 'toshio']
+
+        output = pkgdblib.set_acl_packages(
+            self.session,
+            [
+                ('rpms', 'guake', 'master', 'toshio', 'commit', 'Approved'),
+                ('rpms', 'guake', 'master', 'ralph', 'approveacls',
+                 'Denied'),
+                ('rpms', 'guake', 'master', 'toshio', 'commit', 'Approved'),
+                ('rpms', 'guake', 'f18', 'toshio', 'commit', 'Approved'),
+                ('rpms', 'test', 'master', 'toshio', 'commit', 'Approved'),
+                ('rpms', 'guake', 'f16', 'toshio', 'commit', 'Approved'),
+                ('rpms', 'guake', 'master', 'toshio', 'nothing', 'Approved'),
+            ],
+            user=FakeFasUser(),
+        )
+        self.session.commit()
+
+        self.assertEqual(len(output), 7)
+        self.assertEqual(
+            output[0],
+            'user: pingou set for toshio acl: commit of package: guake '
+            'from: Awaiting Review to: Approved on branch: master')
+        self.assertEqual(
+            output[1],
+            'user: pingou set for ralph acl: approveacls of package: guake '
+            'from: Awaiting Review to: Denied on branch: master')
+        self.assertEqual(output[2], None)
+        self.assertEqual(
+            [str(err) for err in output[3:]],
+            [
+                'You are not allowed to update ACLs of someone else.',
+                'No package found by this name',
+                'No collection found by the name of f16',
+                'Invalid ACL: nothing',
+            ]
+        )
+        # Each user is only validated once in FAS
+        self.assertEqual(bz_mail_func.call_count, 2)
+
+        acls = pkgdblib.get_acl_user_package(
+            self.session, 'toshio', 'rpms', 'guake')
+        self.assertEqual(
+            [(acl['collection'], acl['acl'], acl['status']) for acl in acls],
+            [('master', 'commit', 'Approved')])
+
+        # Admins can update the ACLs on every branch
+        output = pkgdblib.set_acl_packages(
+            self.session,
+            [('rpms', 'guake', 'f18', 'toshio', 'commit', 'Approved')],
+            user=FakeFasUserAdmin(),
+        )
+        self.session.commit()
+        self.assertEqual(
+            output,
+            ['user: admin set for toshio acl: commit of package: guake '
+             'from:  to: Approved on branch: f18'])
+
     @patch('pkgdb2.lib.utils')
     def test_update_pkg_poc(self, mock_func):
         """ Test the update_pkg_poc function. """
@@ -1078,6 +1203,60 @@ class PkgdbLibtests(Modeltests):
             "Collection(u'Fedora', u'19', u'Active', owner:u'admin')",
             collection.__repr__())
 
+    def test_get_collection_registry(self):
+        """ Test the get_collection_registry function. """
+        registry = pkgdblib.get_collection_registry(self.session)
+        self.assertEqual(registry.collections, ())
+
+        create_collection(self.session)
+
+        registry = pkgdblib.get_collection_registry(self.session)
+        self.assertEqual(
+            [clt.branchname for clt in registry.collections],
+            ['el4', 'el6', 'f17', 'f18', 'master'])
+        self.assertEqual(registry.by_branchname['f18'].version, '18')
+        self.assertEqual(
+            registry.by_name_version[('Fedora EPEL', '6')].branchname, 'el6')
+        collection = pkgdblib.model.Collection.by_name(self.session, 'f17')
+        self.assertEqual(
+            registry.by_id[collection.id].to_json(), collection.to_json())
+        self.assertRaises(
+            AttributeError, setattr, registry.by_id[collection.id],
+            'status', 'EOL')
+
+        self.assertEqual(
+            [clt.branchname for clt in registry.active()],
+            ['master', 'el6', 'f17', 'f18'])
+        self.assertEqual(
+            [clt.branchname for clt in registry.search(
+                'Active', name='Fedora', order_by='version', reverse=True)],
+            ['f18', 'f17'])
+        self.assertEqual(
+            [clt.branchname for clt in registry.search(
+                name='Fedora', order_by='version')],
+            ['f17', 'f18', 'master'])
+        self.assertRaises(
+            pkgdblib.PkgdbException, registry.search, order_by='id')
+
+        # Changes made through pkgdb2 are seen right away
+        with patch.dict(
+                pkgdb2.APP.config, {'PKGDB2_STATUS_CHECK_INTERVAL': 60}):
+            self.assertTrue(
+                pkgdblib.get_collection_registry(self.session) is registry)
+
+            pkgdblib.update_collection_status(
+                self.session, 'f17', 'EOL', user=FakeFasUserAdmin())
+            registry = pkgdblib.get_collection_registry(self.session)
+            self.assertEqual(registry.by_branchname['f17'].status, 'EOL')
+            self.session.commit()
+
+            registry = pkgdblib.get_collection_registry(self.session)
+            self.assertEqual(
+                [clt.branchname for clt in registry.active()],
+                ['master', 'el6', 'f18'])
+            self.assertTrue(
+                pkgdblib.get_collection_registry(self.session) is registry)
+
     def test_update_collection_status(self):
         """ Test the update_collection_status function. """
         create_collection(self.session)
@@ -1246,8 +1425,12 @@ class PkgdbLibtests(Modeltests):
         self.assertEqual(pending_acls[0]['acl'], 'commit')
         self.assertEqual(pending_acls[0]['status'], 'Awaiting Review')
 
-    def test_has_acls(self):
+    @patch('pkgdb2.lib.utils.get_bz_email_user')
+    @patch('pkgdb2.lib.utils.get_packagers')
+    def test_has_acls(self, mock_func, bz_mail_func):
         """ Test the has_acls function. """
+        mock_func.return_value = ['pingou', 'toshio']
+        bz_mail_func.return_value = 1
         self.assertFalse(
             pkgdblib.has_acls(
                 self.session, 'pingou', 'rpms', 'guake',
@@ -1268,6 +1451,579 @@ class PkgdbLibtests(Modeltests):
             self.session, 'toshio', 'rpms', 'guake', acl='commit'))
         self.assertFalse(pkgdblib.has_acls(
             self.session, 'toshio', 'rpms', 'guake', acl=['commit', 'approveacls']))
+        self.assertFalse(pkgdblib.has_acls(
+            self.session, 'pingou', 'rpms', 'guake', acl='commit',
+            branch='el6'))
+
+        # The answers are cached until the ACLs change
+        with count_statements(self.session) as statements:
+            self.assertFalse(pkgdblib.has_acls(
+                self.session, 'toshio', 'rpms', 'guake', acl='commit',
+                branch='master'))
+            self.assertFalse(pkgdblib.has_acls(
+                self.session, 'toshio', 'rpms', 'guake', acl='commit',
+                branch='master'))
+            self.assertEqual(len(statements), 1)
+
+        pkgdblib.set_acl_package(
+            self.session, 'rpms', 'guake', 'master', 'toshio', 'commit',
+            'Approved', user=FakeFasUserAdmin())
+        self.assertTrue(pkgdblib.has_acls(
+            self.session, 'toshio', 'rpms', 'guake', acl='commit',
+            branch='master'))
+
+    def test_local_cache(self):
+        """ Test the LocalCache of pkgdb2.lib.utils. """
+        values = [frozenset(['pingou']), ValueError('FAS is down'),
+                  frozenset(['pingou', 'toshio'])]
+        # Holds the loading until the test lets it go
+        loading = threading.Event()
+        loading.set()
+
+        def _load():
+            loading.wait()
+            value = values.pop(0)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        def _wait(cache):
+            while cache.refreshing:
+                time.sleep(0.01)
+
+        cache = pkgdb2.lib.utils.LocalCache(_load, max_age=3600)
+        self.assertEqual(cache.get(), frozenset(['pingou']))
+        self.assertEqual(cache.get(), frozenset(['pingou']))
+        self.assertEqual(len(values), 2)
+
+        # Stale: the old value is returned while it is being refreshed
+        cache.max_age = 0
+        loading.clear()
+        self.assertEqual(cache.get(), frozenset(['pingou']))
+        self.assertTrue(cache.refreshing)
+        self.assertEqual(len(values), 2)
+        loading.set()
+        _wait(cache)
+        # The refresh failed, the old value is kept
+        self.assertEqual(len(values), 1)
+        loading.clear()
+        self.assertEqual(cache.get(), frozenset(['pingou']))
+        self.assertTrue(cache.refreshing)
+        loading.set()
+        _wait(cache)
+        self.assertEqual(len(values), 0)
+        cache.max_age = 3600
+        self.assertEqual(cache.get(), frozenset(['pingou', 'toshio']))
+
+        cache.clear()
+        self.assertRaises(IndexError, cache.get)
+
+    @patch.dict(pkgdb2.lib.utils._FAS_GROUPS, clear=True)
+    @patch('pkgdb2.lib.utils._FAS_GROUPS_MAX', 2)
+    @patch('pkgdb2.lib.utils.get_fas')
+    def test_get_fas_group(self, mock_fas):
+        """ Test the get_fas_group function of pkgdb2.lib.utils. """
+        groups = {'gtk-sig': FakeFasGroupValid(), 'kde-sig': 'kde-sig',
+                  'qt-sig': 'qt-sig'}
+
+        def _group_by_name(name):
+            if name not in groups:
+                raise ValueError('No such group: %s' % name)
+            return groups[name]
+
+        mock_fas.return_value.group_by_name.side_effect = _group_by_name
+        cached = pkgdb2.lib.utils._FAS_GROUPS
+
+        self.assertEqual(GET_FAS_GROUP('gtk-sig'), groups['gtk-sig'])
+        self.assertEqual(GET_FAS_GROUP('gtk-sig'), groups['gtk-sig'])
+        self.assertEqual(
+            mock_fas.return_value.group_by_name.call_count, 1)
+
+        # A group which cannot be retrieved is not kept
+        self.assertRaises(ValueError, GET_FAS_GROUP, 'foo')
+        self.assertEqual(list(cached), ['gtk-sig'])
+
+        # Only the groups most recently asked for are kept
+        self.assertEqual(GET_FAS_GROUP('kde-sig'), 'kde-sig')
+        self.assertEqual(GET_FAS_GROUP('gtk-sig'), groups['gtk-sig'])
+        self.assertEqual(GET_FAS_GROUP('qt-sig'), 'qt-sig')
+        self.assertEqual(list(cached), ['gtk-sig', 'qt-sig'])
+        self.assertEqual(
+            mock_fas.return_value.group_by_name.call_count, 4)
+        self.assertEqual(GET_FAS_GROUP('kde-sig'), 'kde-sig')
+        self.assertEqual(
+            mock_fas.return_value.group_by_name.call_count, 5)
+        self.assertEqual(list(cached), ['qt-sig', 'kde-sig'])
+
+    def test_log_template(self):
+        """ Test the LogTemplate of pkgdb2.lib.utils. """
+        template = pkgdb2.lib.utils.LogTemplate(
+            'user: %(agent)s deleted acl: %(acl.acl)s of package: '
+            '%(acl.packagelist.package.name)s of user: %(acl.fas_name)s')
+        self.assertEqual(
+            template.paths,
+            [
+                ('acl.acl', ('acl', 'acl')),
+                ('acl.fas_name', ('acl', 'fas_name')),
+                ('acl.packagelist.package.name',
+                 ('acl', 'packagelist', 'package', 'name')),
+                ('agent', ('agent',)),
+            ]
+        )
+
+        message = {
+            'agent': 'pingou',
+            'acl': {
+                'acl': 'commit',
+                'fas_name': 'toshio',
+                'packagelist': {
+                    'package': {'name': 'guake', 'acls': []},
+                    'collection': {'branchname': 'master'},
+                },
+            },
+        }
+        self.assertEqual(
+            template.format(message),
+            'user: pingou deleted acl: commit of package: guake of user: '
+            'toshio')
+
+        del message['acl']['packagelist']['package']
+        self.assertRaises(KeyError, template.format, message)
+
+    def test_sync_fas_people(self):
+        """ Test the sync_fas_people function. """
+        fas = FakeFas({
+            'pingou': {
+                'bugzilla_email': 'pingou@pingoured.fr',
+                'status': 'active',
+                'memberships': [{'name': 'packager'}, {'name': 'gtk-sig'}],
+            },
+            'toshio': {
+                'bugzilla_email': 'toshio@fp.o',
+                'status': 'active',
+                'memberships': [{'name': 'packager'}],
+            },
+            'to_be': {
+                'bugzilla_email': None,
+                'status': 'inactive',
+                'memberships': [],
+            },
+        })
+
+        output = pkgdblib.sync_fas_people(self.session, fas)
+        self.assertEqual(output, {'added': 3, 'updated': 0, 'removed': 0})
+        self.session.commit()
+
+        people = pkgdblib.get_fas_people(
+            self.session, ['pingou', 'toshio', 'ralph'])
+        self.assertEqual(sorted(people), ['pingou', 'toshio'])
+        self.assertEqual(
+            people['pingou'].to_json(),
+            {
+                'username': 'pingou',
+                'bugzilla_email': 'pingou@pingoured.fr',
+                'groups': ['gtk-sig', 'packager'],
+                'status': 'active',
+            }
+        )
+
+        # Nothing changed, nothing written
+        output = pkgdblib.sync_fas_people(self.session, fas)
+        self.assertEqual(output, {'added': 0, 'updated': 0, 'removed': 0})
+
+        # Only the accounts matching the pattern are refreshed: `to_be` is
+        # removed but `toshio` is not updated, the `_` is not a wildcard
+        fas.people['toshio']['status'] = 'inactive'
+        del fas.people['to_be']
+        fas.people['tox'] = {
+            'bugzilla_email': 'tox@fp.o',
+            'status': 'active',
+            'memberships': [],
+        }
+        output = pkgdblib.sync_fas_people(self.session, fas, search='to_*')
+        self.assertEqual(output, {'added': 0, 'updated': 0, 'removed': 1})
+        self.session.commit()
+
+        output = pkgdblib.sync_fas_people(self.session, fas, search='to*')
+        self.assertEqual(output, {'added': 1, 'updated': 1, 'removed': 0})
+        self.session.commit()
+
+        people = pkgdblib.get_fas_people(
+            self.session, ['pingou', 'toshio', 'to_be', 'tox'])
+        self.assertEqual(sorted(people), ['pingou', 'toshio', 'tox'])
+        self.assertEqual(people['toshio'].status, 'inactive')
+        self.assertEqual(fas.queries, ['*', '*', 'to_*', 'to*'])
+
+    @patch('pkgdb2.lib.utils.get_bz_email_user')
+    def test_validate_fas_user(self, mock_func):
+        """ Test the _validate_fas_user function. """
+        mock_func.return_value = None
+
+        self.assertRaises(
+            pkgdblib.PkgdbException,
+            pkgdblib._validate_fas_user,
+            self.session, 'pingou')
+        self.assertEqual(mock_func.call_count, 1)
+
+        pkgdblib.sync_fas_people(self.session, FakeFas({
+            'pingou': {
+                'bugzilla_email': 'pingou@pingoured.fr',
+                'status': 'active',
+                'memberships': [],
+            },
+        }))
+
+        # Mirrored accounts are validated without querying FAS
+        pkgdblib._validate_fas_user(self.session, 'pingou')
+        pkgdblib._validate_fas_user(self.session, 'orphan')
+        people = pkgdblib.get_fas_people(self.session, ['pingou', 'ralph'])
+        pkgdblib._validate_fas_user(self.session, 'pingou', people)
+        self.assertEqual(mock_func.call_count, 1)
+
+        # The others are looked up in FAS
+        mock_func.return_value = 1
+        pkgdblib._validate_fas_user(self.session, 'ralph', people)
+        self.assertEqual(mock_func.call_count, 2)
+
+    @patch.dict(pkgdb2.APP.config, {'PKGDB2_NOTIFICATION_OUTBOX': True})
+    @patch('pkgdb2.lib.notifications.fedmsg_publish')
+    def test_dispatch_outbox(self, mock_func):
+        """ Test the notification outbox and its dispatch_outbox function.
+        """
+        notify = pkgdb2.lib.notifications
+
+        # Changes rolled back are not announced
+        pkgdblib.add_namespace(self.session, 'foo', FakeFasUserAdmin())
+        self.session.rollback()
+        self.assertEqual(
+            notify.outbox_depth(self.session), {'pending': 0, 'failed': 0})
+
+        pkgdblib.add_namespace(self.session, 'foo', FakeFasUserAdmin())
+        pkgdblib.add_namespace(self.session, 'bar', FakeFasUserAdmin())
+        self.session.commit()
+        self.assertEqual(
+            notify.outbox_depth(self.session), {'pending': 2, 'failed': 0})
+        # Nothing was published while processing the changes
+        self.assertFalse(mock_func.called)
+
+        sent = []
+
+        def _send(data):
+            if data['msg']['namespace'] == 'bar':
+                raise IOError('fedmsg is down')
+            sent.append((data['topic'], data['msg']['namespace']))
+
+        now = datetime.datetime.utcnow()
+        output = notify.dispatch_outbox(
+            self.session, max_attempts=2, backoff=30,
+            senders={'fedmsg': _send}, now=now)
+        self.session.commit()
+        self.assertEqual(output, {'sent': 1, 'retried': 1, 'failed': 0})
+        self.assertEqual(sent, [('namespace.new', 'foo')])
+        self.assertEqual(
+            notify.outbox_depth(self.session), {'pending': 1, 'failed': 0})
+
+        # Not retried before the backoff delay
+        output = notify.dispatch_outbox(
+            self.session, max_attempts=2, backoff=30,
+            senders={'fedmsg': _send},
+            now=now + datetime.timedelta(seconds=20))
+        self.assertEqual(output, {'sent': 0, 'retried': 0, 'failed': 0})
+
+        # Given up after the second attempt
+        output = notify.dispatch_outbox(
+            self.session, max_attempts=2, backoff=30,
+            senders={'fedmsg': _send},
+            now=now + datetime.timedelta(seconds=31))
+        self.session.commit()
+        self.assertEqual(output, {'sent': 0, 'retried': 0, 'failed': 1})
+        self.assertEqual(
+            notify.outbox_depth(self.session), {'pending': 0, 'failed': 1})
+        notification = self.session.query(
+            pkgdblib.model.NotificationOutbox).one()
+        self.assertEqual(notification.attempts, 2)
+        self.assertEqual(notification.last_error, 'IOError: fedmsg is down')
+
+    @patch.dict(pkgdb2.APP.config, {'PKGDB2_NOTIFICATION_OUTBOX': True})
+    @patch('pkgdb2.lib.notifications.fedmsg_publish')
+    def test_dispatch_outbox_claim(self, mock_func):
+        """ Test that concurrent dispatch_outbox do not send the same
+        notifications twice.
+        """
+        notify = pkgdb2.lib.notifications
+
+        pkgdblib.add_namespace(self.session, 'foo', FakeFasUserAdmin())
+        pkgdblib.add_namespace(self.session, 'bar', FakeFasUserAdmin())
+        self.session.commit()
+
+        other = sqlalchemy.orm.sessionmaker(bind=self.session.get_bind())()
+        now = datetime.datetime.utcnow()
+        sent = []
+        concurrent = []
+
+        def _send(data):
+            # Another dispatcher running while these are being sent
+            if not concurrent:
+                concurrent.append(notify.dispatch_outbox(
+                    other, senders={'fedmsg': _send}, now=now))
+                other.commit()
+            sent.append(data['msg']['namespace'])
+
+        output = notify.dispatch_outbox(
+            self.session, senders={'fedmsg': _send}, now=now, lease=60)
+        self.session.commit()
+        self.assertEqual(output, {'sent': 2, 'retried': 0, 'failed': 0})
+        self.assertEqual(
+            concurrent, [{'sent': 0, 'retried': 0, 'failed': 0}])
+        self.assertEqual(sent, ['foo', 'bar'])
+        self.assertEqual(
+            notify.outbox_depth(self.session), {'pending': 0, 'failed': 0})
+
+        # A notification claimed by a dispatcher which stopped before
+        # sending it is sent once the claim expired
+        pkgdblib.add_namespace(self.session, 'baz', FakeFasUserAdmin())
+        self.session.commit()
+        now = datetime.datetime.utcnow()
+        notifications = pkgdblib.model.NotificationOutbox.pending(
+            other, now=now)
+        claimed = pkgdblib.model.NotificationOutbox.claim(
+            other, notifications, now + datetime.timedelta(seconds=60),
+            now=now)
+        other.commit()
+        self.assertEqual(claimed, notifications)
+        self.assertEqual(len(claimed), 1)
+        # Already claimed, it cannot be claimed again
+        self.assertEqual(
+            pkgdblib.model.NotificationOutbox.claim(
+                other, notifications, now + datetime.timedelta(seconds=60),
+                now=now),
+            [])
+        other.close()
+
+        output = notify.dispatch_outbox(
+            self.session, senders={'fedmsg': _send},
+            now=now + datetime.timedelta(seconds=30), lease=60)
+        self.assertEqual(output, {'sent': 0, 'retried': 0, 'failed': 0})
+
+        output = notify.dispatch_outbox(
+            self.session, senders={'fedmsg': _send},
+            now=now + datetime.timedelta(seconds=61), lease=60)
+        self.session.commit()
+        self.assertEqual(output, {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(sent, ['foo', 'bar', 'baz'])
+
+    @patch.dict(pkgdb2.APP.config, {'PKGDB2_BUGZILLA_JOBS': True})
+    @patch('pkgdb2.lib.utils.set_bugzilla_owner')
+    @patch('pkgdb2.lib.utils.get_bz_email_user')
+    @patch('pkgdb2.lib.utils.get_packagers')
+    def test_run_bugzilla_jobs(self, mock_packagers, mock_bz, mock_owner):
+        """ Test the bugzilla jobs and the run_bugzilla_jobs function. """
+        mock_packagers.return_value = ['pingou', 'toshio', 'ralph']
+        mock_bz.return_value = True
+        create_package_acl(self.session)
+
+        pkgdblib.update_pkg_poc(
+            self.session, 'rpms', 'guake', 'master', 'toshio',
+            user=FakeFasUserAdmin())
+        pkgdblib.update_pkg_poc(
+            self.session, 'rpms', 'guake', 'f18', 'toshio',
+            user=FakeFasUserAdmin())
+        # Reassigned again before the job ran: still a single job, from
+        # the original point of contact
+        pkgdblib.update_pkg_poc(
+            self.session, 'rpms', 'guake', 'master', 'ralph',
+            user=FakeFasUserAdmin())
+        self.session.commit()
+
+        # Bugzilla is not called while processing the changes
+        self.assertFalse(mock_owner.called)
+        self.assertEqual(
+            pkgdblib.count_bugzilla_jobs(self.session),
+            {'Pending': 2, 'Done': 0, 'Failed': 0})
+        jobs = pkgdblib.search_bugzilla_jobs(self.session, status='Pending')
+        self.assertEqual(
+            sorted(
+                (job.collection_version, job.prev_poc, job.username)
+                for job in jobs),
+            [('18', 'pingou', 'toshio'), ('devel', 'pingou', 'ralph')])
+
+        # The first one fails, it is retried after the backoff delay
+        mock_owner.side_effect = [IOError('bugzilla is down'), None, None]
+        now = datetime.datetime.utcnow()
+        output = pkgdblib.run_bugzilla_jobs(
+            self.session, max_attempts=3, backoff=60, now=now)
+        self.assertEqual(output, {'done': 1, 'retried': 1, 'failed': 0})
+        self.assertEqual(mock_owner.call_count, 2)
+
+        output = pkgdblib.run_bugzilla_jobs(
+            self.session, max_attempts=3, backoff=60, now=now)
+        self.assertEqual(output, {'done': 0, 'retried': 0, 'failed': 0})
+
+        output = pkgdblib.run_bugzilla_jobs(
+            self.session, max_attempts=3, backoff=60,
+            now=now + datetime.timedelta(seconds=61))
+        self.assertEqual(output, {'done': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(
+            pkgdblib.count_bugzilla_jobs(self.session),
+            {'Pending': 0, 'Done': 2, 'Failed': 0})
+        self.assertEqual(mock_owner.call_count, 3)
+        self.assertEqual(
+            sorted(set(call[0][:5] for call in mock_owner.call_args_list)),
+            [
+                ('ralph', 'pingou', 'guake', 'Fedora', 'devel'),
+                ('toshio', 'pingou', 'guake', 'Fedora', '18'),
+            ])
+
+    @patch('pkgdb2.lib.utils.set_bugzilla_owner')
+    def test_run_bugzilla_jobs_updated(self, mock_owner):
+        """ Test the run_bugzilla_jobs function when the jobs are updated
+        while they run. """
+        model = pkgdblib.model
+        other = sqlalchemy.orm.sessionmaker(bind=self.session.get_bind())()
+        self.addCleanup(other.close)
+
+        model.BugzillaJob.enqueue(
+            self.session, 'toshio', 'pingou', 'guake', 'Fedora', '18')
+        self.session.commit()
+
+        # The point of contact changes again while the job runs: the job
+        # is not marked as done and the change does not fail
+        def _reassign(*args, **kwargs):
+            model.BugzillaJob.enqueue(
+                other, 'ralph', 'toshio', 'guake', 'Fedora', '18')
+            other.commit()
+
+        mock_owner.side_effect = _reassign
+        now = datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+        output = pkgdblib.run_bugzilla_jobs(self.session, now=now)
+        self.assertEqual(output, {'done': 0, 'retried': 0, 'failed': 0})
+        self.assertEqual(
+            pkgdblib.count_bugzilla_jobs(self.session),
+            {'Pending': 1, 'Done': 0, 'Failed': 0})
+
+        # It runs again, for the latest point of contact, from the one the
+        # bugs were just reassigned to
+        job = self.session.query(model.BugzillaJob).one()
+        self.assertEqual((job.prev_poc, job.username), ('toshio', 'ralph'))
+        mock_owner.side_effect = None
+        now = now + datetime.timedelta(seconds=1)
+        output = pkgdblib.run_bugzilla_jobs(self.session, now=now)
+        self.assertEqual(output, {'done': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(
+            mock_owner.call_args[0][:5],
+            ('ralph', 'toshio', 'guake', 'Fedora', '18'))
+
+        # If the run failed, the bugs are still to be reassigned from the
+        # point of contact the job was recorded for
+        model.BugzillaJob.enqueue(
+            self.session, 'toshio', 'ralph', 'guake', 'Fedora', '18')
+        self.session.commit()
+
+        def _fail(*args, **kwargs):
+            model.BugzillaJob.enqueue(
+                other, 'pingou', 'toshio', 'guake', 'Fedora', '18')
+            other.commit()
+            raise IOError('bugzilla is down')
+
+        mock_owner.side_effect = _fail
+        now = now + datetime.timedelta(seconds=1)
+        output = pkgdblib.run_bugzilla_jobs(self.session, now=now)
+        self.assertEqual(output, {'done': 0, 'retried': 0, 'failed': 0})
+        job = self.session.query(model.BugzillaJob).one()
+        self.assertEqual(
+            (job.status, job.attempts, job.prev_poc, job.username),
+            ('Pending', 0, 'ralph', 'pingou'))
+
+        mock_owner.side_effect = None
+        now = now + datetime.timedelta(seconds=1)
+        output = pkgdblib.run_bugzilla_jobs(self.session, now=now)
+        self.assertEqual(output, {'done': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(
+            mock_owner.call_args[0][:5],
+            ('pingou', 'ralph', 'guake', 'Fedora', '18'))
+
+        # The job runs while a request changing the point of contact
+        # again has it loaded, the request does not fail either
+        model.BugzillaJob.enqueue(
+            self.session, 'pingou', 'ralph', 'guake', 'Fedora', '18')
+        self.session.commit()
+        other.query(model.BugzillaJob).one()
+
+        now = now + datetime.timedelta(seconds=1)
+        output = pkgdblib.run_bugzilla_jobs(self.session, now=now)
+        self.assertEqual(output, {'done': 1, 'retried': 0, 'failed': 0})
+
+        model.BugzillaJob.enqueue(
+            other, 'toshio', 'pingou', 'guake', 'Fedora', '18')
+        other.commit()
+        job = self.session.query(model.BugzillaJob).one()
+        self.assertEqual(
+            (job.status, job.prev_poc, job.username),
+            ('Pending', 'pingou', 'toshio'))
+
+    @patch.dict(pkgdb2.APP.config, {'PKGDB2_EMAIL_DIGEST_WINDOW': 0})
+    def test_email_digest(self):
+        """ Test sending emails through a SMTPMailer, in digests. """
+        notify = pkgdb2.lib.notifications
+        server = FakeSMTPServer()
+        server.start()
+        self.addCleanup(server.stop)
+        mailer = notify.SMTPMailer(server.address)
+        self.addCleanup(mailer.close)
+
+        notify.email_publish(
+            'pingou', None, 'First', subject='one', to_email='a@fp.o',
+            mailer=mailer)
+        notify.email_publish(
+            'pingou', None, 'Second', subject='two', to_email='b@fp.o',
+            mailer=mailer)
+        self.assertEqual(
+            [(msg['Subject'], rcpt) for _, rcpt, msg in server.messages],
+            [('[PkgDB] one', ['a@fp.o']), ('[PkgDB] two', ['b@fp.o'])])
+        # Both were sent over the same connection
+        self.assertEqual(server.connections, 1)
+
+        pkgdb2.APP.config['PKGDB2_EMAIL_DIGEST_WINDOW'] = 60
+        for cnt in range(3):
+            notify.queue_email(
+                self.session, 'pingou', None, 'Orphaned pkg%s' % cnt,
+                subject='pkg%s orphaned' % cnt, to_email='a@fp.o')
+        notify.queue_email(
+            self.session, 'pingou', None, 'Retired pkg3',
+            subject='pkg3 retired', to_email='b@fp.o')
+        self.session.commit()
+
+        def _send(data):
+            notify.email_publish(
+                data['user'], None, data['message'],
+                subject=data['subject'], to_email=data['to_email'],
+                mailer=mailer)
+
+        # Held during the window
+        now = datetime.datetime.utcnow()
+        output = notify.dispatch_outbox(
+            self.session, senders={'email': _send}, now=now)
+        self.assertEqual(output, {'sent': 0, 'retried': 0, 'failed': 0})
+
+        output = notify.dispatch_outbox(
+            self.session, senders={'email': _send},
+            now=now + datetime.timedelta(seconds=61))
+        self.session.commit()
+        self.assertEqual(output, {'sent': 4, 'retried': 0, 'failed': 0})
+        self.assertEqual(
+            notify.outbox_depth(self.session), {'pending': 0, 'failed': 0})
+
+        messages = server.messages[2:]
+        self.assertEqual(
+            [(msg['Subject'], rcpt) for _, rcpt, msg in messages],
+            [('[PkgDB] 3 updates', ['a@fp.o']),
+             ('[PkgDB] pkg3 retired', ['b@fp.o'])])
+        self.assertEqual(
+            messages[0][2].get_payload(),
+            'pkg0 orphaned\n\nOrphaned pkg0\n\n----\n\n'
+            'pkg1 orphaned\n\nOrphaned pkg1\n\n----\n\n'
+            'pkg2 orphaned\n\nOrphaned pkg2')
+        self.assertEqual(server.connections, 1)
 
     def test_get_status(self):
         """ Test the get_status function. """
@@ -1295,6 +2051,40 @@ class PkgdbLibtests(Modeltests):
         self.assertEqual(obs['pkg_acl'], pkg_acl)
         self.assertEqual(obs['acl_status'], acl_status)
 
+        # The statuses are served from memory and can be modified safely
+        with count_statements(self.session) as statements:
+            with patch.dict(
+                    pkgdb2.APP.config, {'PKGDB2_STATUS_CHECK_INTERVAL': 60}):
+                obs = pkgdblib.get_status(self.session, 'pkg_acl')
+                obs['pkg_acl'].append('foo')
+                obs = pkgdblib.get_status(self.session, 'pkg_acl')
+                self.assertEqual(obs['pkg_acl'], pkg_acl)
+                self.assertEqual(statements, [])
+
+                # Changes made outside of pkgdb2 are noticed once checked
+                self.session.add(pkgdblib.model.Namespace('modules'))
+                self.session.commit()
+                obs = pkgdblib.get_status(self.session, 'namespaces')
+                self.assertEqual(obs['namespaces'], ['docker', 'rpms'])
+
+            # Checking costs one query, reloading one per status table
+            del statements[:]
+            obs = pkgdblib.get_status(self.session, 'namespaces')
+            self.assertEqual(
+                obs['namespaces'], ['docker', 'modules', 'rpms'])
+            obs = pkgdblib.get_status(self.session, 'namespaces')
+            self.assertEqual(len(statements), 8)
+
+            # So are the changes keeping the number of rows
+            self.session.execute(
+                pkgdblib.model.Namespace.__table__.update().where(
+                    pkgdblib.model.Namespace.namespace == 'modules'
+                ).values(namespace='flatpaks'))
+            self.session.commit()
+            obs = pkgdblib.get_status(self.session, 'namespaces')
+            self.assertEqual(
+                obs['namespaces'], ['docker', 'flatpaks', 'rpms'])
+
     def test_get_package_maintained(self):
         """ Test the get_package_maintained function. """
         create_package_acl(self.session)
@@ -1499,6 +2289,111 @@ class PkgdbLibtests(Modeltests):
         logs = pkgdblib.search_logs(self.session, packager='pingou')
         self.assertEqual(len(logs), 0)
 
+    def test_search_logs_cursor(self):
+        """ Test the search_logs function when paginating with a cursor.
+        """
+        self.test_add_package()
+
+        # Wrong cursor
+        self.assertRaises(pkgdblib.PkgdbException,
+                          pkgdblib.search_logs,
+                          self.session,
+                          cursor='a'
+                          )
+
+        expected = pkgdblib.search_logs(self.session)
+        self.assertEqual(len(expected), 23)
+
+        logs = []
+        cursor = None
+        while True:
+            page = pkgdblib.search_logs(
+                self.session, limit=5, page=1, cursor=cursor)
+            logs.extend(page)
+            if len(page) < 5:
+                break
+            cursor = page[-1].cursor
+
+        self.assertEqual(len(logs), 23)
+        self.assertEqual(logs, expected)
+
+    def test_search_changes(self):
+        """ Test the search_changes function. """
+        self.test_add_package()
+
+        # Wrong cursor
+        self.assertRaises(pkgdblib.PkgdbException,
+                          pkgdblib.search_changes,
+                          self.session,
+                          cursor='a'
+                          )
+
+        # Wrong package name
+        self.assertRaises(pkgdblib.PkgdbException,
+                          pkgdblib.search_changes,
+                          self.session,
+                          package='asdads'
+                          )
+
+        changes = pkgdblib.search_changes(self.session)
+        self.assertEqual(len(changes), 23)
+        self.assertEqual(changes, pkgdblib.search_logs(self.session)[::-1])
+
+        change = changes[1].to_json()
+        self.assertEqual(change['topic'], 'acl.update')
+        self.assertEqual(change['user'], 'admin')
+        self.assertEqual(change['namespace'], 'rpms')
+        self.assertEqual(change['package'], 'guake')
+        self.assertEqual(change['branch'], 'f18')
+        self.assertEqual(change['username'], 'ralph')
+        self.assertEqual(change['acl'], 'commit')
+        self.assertEqual(change['new_value'], 'Approved')
+
+        changes = pkgdblib.search_changes(
+            self.session, limit=5, cursor=changes[1].change_cursor,
+            topics='package.new')
+        self.assertEqual(
+            [(chg.to_json()['package'], chg.to_json()['branch'])
+             for chg in changes],
+            [('geany', 'master'), ('geany', 'f18'), ('fedocal', 'master'),
+             ('fedocal', 'f18')])
+
+        changes = pkgdblib.search_changes(
+            self.session, namespace='rpms', package='geany')
+        self.assertEqual(len(changes), 10)
+
+        # Cursor of the wrong length
+        self.assertRaises(pkgdblib.PkgdbException,
+                          pkgdblib.search_changes,
+                          self.session,
+                          cursor=pkgdblib.model.encode_cursor(
+                              [changes[0].id])
+                          )
+        # Cursor of the logs, sorted by date
+        self.assertRaises(pkgdblib.PkgdbException,
+                          pkgdblib.search_changes,
+                          self.session,
+                          cursor=changes[0].cursor
+                          )
+
+        # The entries are returned once committed, in the order they are
+        # committed rather than the order of their identifiers
+        cursor = pkgdblib.search_changes(self.session)[-1].change_cursor
+        for log_id, description in [(1000, 'first'), (500, 'second')]:
+            log = pkgdblib.model.Log(
+                'pingou', None, description, topic='test')
+            log.id = log_id
+            self.session.add(log)
+            self.session.flush()
+            self.assertEqual(
+                pkgdblib.search_changes(self.session, cursor=cursor), [])
+            self.session.commit()
+
+            changes = pkgdblib.search_changes(self.session, cursor=cursor)
+            self.assertEqual(
+                [change.description for change in changes], [description])
+            cursor = changes[-1].change_cursor
+
     def test_unorphan_package(self):
         """ Test the unorphan_package function. """
         create_package_acl(self.session)
@@ -1684,6 +2579,74 @@ class PkgdbLibtests(Modeltests):
         self.assertEqual(pkg_acl[2].collection.branchname, 'f19')
         self.assertEqual(len(pkg_acl[2].acls), 5)
 
+    def test_add_branch_chunks(self):
+        """ Test the add_branch function in chunks, dry-run and resumed.
+        """
+        create_package_acl(self.session)
+
+        new_collection = pkgdblib.model.Collection(
+            name='Fedora',
+            version='19',
+            status='Active',
+            owner='toshio',
+            branchname='f19',
+            dist_tag='.fc19',
+        )
+        self.session.add(new_collection)
+        self.session.commit()
+
+        # Dry-run: nothing is branched
+        msgs = pkgdblib.add_branch(
+            session=self.session,
+            clt_from='master',
+            clt_to='f19',
+            user=FakeFasUserAdmin(),
+            dry_run=True,
+        )
+        self.assertEqual(
+            msgs[0], 'rpms/guake would be branched from Fedora to Fedora 19')
+        pkg_acl = pkgdblib.get_acl_package(self.session, 'rpms', 'guake')
+        self.assertEqual(
+            [pkg.collection.branchname for pkg in pkg_acl], ['f18', 'master'])
+
+        calls = []
+        msgs = pkgdblib.add_branch(
+            session=self.session,
+            clt_from='master',
+            clt_to='f19',
+            user=FakeFasUserAdmin(),
+            chunk_size=1,
+            progress=lambda done, total: calls.append((done, total)),
+        )
+        self.assertEqual(len(msgs), len(calls))
+        self.assertEqual(
+            calls, [(cnt + 1, len(msgs)) for cnt in range(len(msgs))])
+        self.assertEqual(
+            msgs[0],
+            'rpms/guake branched successfully from Fedora to Fedora 19')
+
+        pkg_acl = pkgdblib.get_acl_package(
+            self.session, 'rpms', 'guake', pkg_clt='f19')
+        self.assertEqual(len(pkg_acl), 1)
+        self.assertEqual(pkg_acl[0].point_of_contact, 'pingou')
+        self.assertEqual(len(pkg_acl[0].acls), 5)
+        effective = self.session.query(pkgdblib.model.EffectiveAcl).filter(
+            pkgdblib.model.EffectiveAcl.packagelisting_id == pkg_acl[0].id
+        ).all()
+        self.assertEqual(
+            sorted((acl.fas_name, acl.acl) for acl in effective),
+            [(None, None), ('pingou', 'approveacls'), ('pingou', 'commit'),
+             ('pingou', 'watchcommits')])
+
+        # Branching again resumes where it stopped: nothing is left to do
+        msgs = pkgdblib.add_branch(
+            session=self.session,
+            clt_from='master',
+            clt_to='f19',
+            user=FakeFasUserAdmin(),
+        )
+        self.assertEqual(msgs, [])
+
     def test_get_critpath_packages(self):
         """ Test the get_critpath_packages method of pkgdblib. """
         create_package_acl(self.session)
@@ -1766,6 +2729,28 @@ class PkgdbLibtests(Modeltests):
             data,
             {u'guake': u'pingou', u'geany': u'group::gtk-sig,josef'})
 
+    def test_iter_exports(self):
+        """ Test the iter_notify, iter_bugzilla and iter_vcs_acls_text
+        functions against the functions returning the whole dict. """
+        create_package_acl2(self.session)
+
+        self.assertEqual(
+            list(pkgdblib.iter_notify(self.session, yield_per=2)),
+            sorted(pkgdblib.notify(self.session).items()))
+
+        data = pkgdblib.bugzilla(self.session)
+        self.assertEqual(
+            list(pkgdblib.iter_bugzilla(self.session, yield_per=2)),
+            [data[clt][pkg] for clt in sorted(data)
+             for pkg in sorted(data[clt])])
+
+        data = pkgdblib.vcs_acls(self.session, eol=True, skip_pp=[])
+        self.assertEqual(
+            list(pkgdblib.iter_vcs_acls_text(
+                self.session, eol=True, skip_pp=[], yield_per=2)),
+            [data[pkg][branch] for pkg in sorted(data)
+             for branch in sorted(data[pkg])])
+
     def test_set_monitor_package(self):
         """ Test the set_monitor_package function. """
         self.assertFalse(
@@ -1991,6 +2976,50 @@ class PkgdbLibtests(Modeltests):
         action = pkgdblib.get_admin_action(self.session, 2)
         self.assertEqual(action, None)
 
+    @patch('pkgdb2.lib.utils.get_packagers')
+    @patch('pkgdb2.lib.utils.get_bz_email_user')
+    def test_edit_action_status_request_package(self, bz_mail_func,
+                                                pkger_func):
+        """ Test the edit_action_status method of pkgdblib when approving
+        a request.package, which approves the requests of branches awaiting
+        review on that package. """
+        create_package_acl(self.session)
+        bz_mail_func.return_value = 1
+        pkger_func.return_value = ['admin', 'pingou']
+
+        package = pkgdblib.model.Package.by_name(
+            self.session, 'rpms', 'guake')
+        request = pkgdblib.model.AdminAction(
+            collection_id=pkgdblib.model.Collection.by_name(
+                self.session, 'master').id,
+            user='toshio',
+            action='request.package',
+            _status='Pending',
+            info='{"pkg_name": "guake", "pkg_namespace": "rpms"}',
+        )
+        branch_request = pkgdblib.model.AdminAction(
+            package_id=package.id,
+            collection_id=pkgdblib.model.Collection.by_name(
+                self.session, 'f17').id,
+            user='toshio',
+            action='request.branch',
+            _status='Awaiting Review',
+        )
+        self.session.add_all([request, branch_request])
+        self.session.commit()
+
+        pkgdblib.edit_action_status(
+            self.session, request, 'Approved', user=FakeFasUserAdmin())
+        self.session.commit()
+
+        self.assertEqual(branch_request.status, 'Approved')
+        acls = pkgdblib.get_acl_user_package(
+            self.session, 'admin', 'rpms', 'guake')
+        self.assertEqual(
+            sorted((acl['collection'], acl['acl']) for acl in acls),
+            [('f17', 'approveacls'), ('f17', 'commit'),
+             ('f17', 'watchbugzilla'), ('f17', 'watchcommits')])
+
     def test_edit_action_status(self):
         """ Test the edit_action_status method of pkgdblib. """
 
@@ -2258,6 +3287,12 @@ class PkgdbLibtests(Modeltests):
             self.session, 'namespaces')['namespaces']
         self.assertEqual(namespaces, ['docker', 'foo', 'rpms'])
 
+        # And once committed
+        self.session.commit()
+        namespaces = pkgdblib.get_status(
+            self.session, 'namespaces')['namespaces']
+        self.assertEqual(namespaces, ['docker', 'foo', 'rpms'])
+
     def test_drop_namespace(self):
         """ Test the drop_namespace method to pkgdblib. """
 
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+Script generating a synthetic, Fedora-sized, database and timing the
+queries backing the bulk exports and the log/admin actions searches with
+and without the composite indexes.
+'''
+
+## These two lines are needed to run on EL6
+__requires__ = ['SQLAlchemy >= 0.7', 'jinja2 >= 2.4']
+import pkg_resources
+
+import argparse
+import datetime
+import os
+import random
+import time
+
+try:
+    import pkgdb2
+except ImportError:
+    import sys
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+    import pkgdb2
+
+from pkgdb2.lib import model
+
+
+# The indexes whose gain is measured, (name, table, columns)
+INDEXES = [
+    ('ix_packagelisting_collection_id_status', 'PackageListing',
+     'collection_id, status'),
+    ('ix_packagelisting_package_id_collection_id_status', 'PackageListing',
+     'package_id, collection_id, status'),
+    ('ix_packagelistingacl_packagelisting_id_acl_status',
+     'PackageListingAcl', 'packagelisting_id, acl, status'),
+    ('ix_packagelistingacl_fas_name_acl_status', 'PackageListingAcl',
+     'fas_name, acl, status'),
+    ('ix_log_package_id_change_time', 'Log', 'package_id, change_time'),
+    ('ix_admin_actions_status_date_created', 'admin_actions',
+     'status, date_created'),
+    ('ix_package_lower_name', 'Package', 'lower(name)'),
+]
+
+
+def get_arguments():
+    ''' Set the command line parser and retrieve the arguments provided
+    by the command line.
+    '''
+    parser = argparse.ArgumentParser(
+        description='Benchmark the composite indexes of pkgdb2')
+    parser.add_argument(
+        '--db-url', dest='db_url',
+        default='sqlite:////var/tmp/pkgdb2_benchmark.sqlite',
+        help='URL of the database to generate, it will be emptied first')
+    parser.add_argument(
+        '--packages', type=int, default=20000,
+        help='Number of packages to generate')
+    parser.add_argument(
+        '--packagers', type=int, default=2000,
+        help='Number of packagers to generate')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='Number of time each query is ran, the best time is kept')
+
+    return parser.parse_args()
+
+
+def populate(session, n_packages, n_packagers):
+    ''' Fill the database with collections, packages, listings, ACLs,
+    logs and admin actions looking like what is in the Fedora instance,
+    then build the effective_acls table the exports are served from.
+    '''
+    engine = session.bind
+    collections = [
+        ('Fedora', 'devel', 'Under Development', 'master'),
+        ('Fedora', '24', 'Active', 'f24'),
+        ('Fedora', '23', 'Active', 'f23'),
+        ('Fedora', '22', 'EOL', 'f22'),
+        ('Fedora EPEL', '7', 'Active', 'epel7'),
+        ('Fedora EPEL', '6', 'Active', 'el6'),
+        ('Fedora EPEL', '5', 'EOL', 'el5'),
+    ]
+    now = datetime.datetime.utcnow()
+
+    engine.execute(model.Collection.__table__.insert(), [
+        dict(id=idx, name=name, version=version, status=status,
+             owner='admin', branchname=branch, dist_tag='.%s' % branch,
+             allow_retire=False, date_created=now, date_updated=now)
+        for idx, (name, version, status, branch) in enumerate(
+            collections, 1)
+    ])
+
+    engine.execute(model.Package.__table__.insert(), [
+        dict(id=idx, name='package-%s' % idx, namespace='rpms',
+             summary='Summary of package %s' % idx, status='Approved',
+             monitor='false', koschei=False, date_created=now)
+        for idx in range(1, n_packages + 1)
+    ])
+
+    packagers = ['packager%s' % idx for idx in range(n_packagers)]
+    listings = []
+    acls = []
+    for pkg_id in range(1, n_packages + 1):
+        poc = random.choice(packagers)
+        comaintainers = random.sample(packagers, random.randint(0, 3))
+        for clt_id in range(1, len(collections) + 1):
+            if clt_id > 1 and random.random() < 0.3:
+                continue
+            listing_id = len(listings) + 1
+            listings.append(dict(
+                id=listing_id, package_id=pkg_id, collection_id=clt_id,
+                point_of_contact=poc, critpath=False, status_change=now,
+                status=random.choice(
+                    ['Approved'] * 8 + ['Orphaned', 'Retired'])))
+            for user in set([poc] + comaintainers):
+                for acl in ['commit', 'watchbugzilla', 'watchcommits',
+                            'approveacls']:
+                    acls.append(dict(
+                        fas_name=user, packagelisting_id=listing_id,
+                        acl=acl, date_created=now,
+                        status=random.choice(['Approved'] * 9 + ['Obsolete'])
+                    ))
+
+    engine.execute(model.PackageListing.__table__.insert(), listings)
+    for idx in range(0, len(acls), 50000):
+        engine.execute(
+            model.PackageListingAcl.__table__.insert(),
+            acls[idx:idx + 50000])
+
+    logs = [
+        dict(user=random.choice(packagers), package_id=pkg_id,
+             description='Something happened to package-%s' % pkg_id,
+             change_time=now - datetime.timedelta(
+                 minutes=random.randint(0, 1000000)))
+        for pkg_id in range(1, n_packages + 1)
+        for _ in range(10)
+    ]
+    for idx in range(0, len(logs), 50000):
+        engine.execute(model.Log.__table__.insert(), logs[idx:idx + 50000])
+
+    engine.execute(model.AdminAction.__table__.insert(), [
+        dict(package_id=pkg_id, collection_id=random.randint(1, 7),
+             user=random.choice(packagers), action='request.branch',
+             status=random.choice(
+                 ['Approved'] * 6 + ['Awaiting Review', 'Pending', 'Denied']),
+             date_created=now - datetime.timedelta(
+                 days=random.randint(0, 1000)),
+             date_change=now)
+        for pkg_id in range(1, n_packages + 1, 3)
+    ])
+
+    # The rows are inserted without the ORM, thus without the session hook
+    # maintaining the table
+    model.EffectiveAcl.refresh(session)
+    session.commit()
+
+
+def timeit(function, repeat):
+    ''' Return the best time, in ms, out of ``repeat`` calls to
+    ``function``.
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        function()
+        duration = (time.time() - start) * 1000
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def run_queries(session, n_packages, repeat):
+    ''' Time each of the queries benchmarked. '''
+    pkg_ids = [random.randint(1, n_packages) for _ in range(100)]
+    queries = [
+        ('EffectiveAcl.refresh', lambda: model.EffectiveAcl.refresh(session)),
+        ('vcs_acls', lambda: model.vcs_acls(session)),
+        ('bugzilla', lambda: model.bugzilla(session)),
+        ('notify', lambda: model.notify(session)),
+        ('Log.search x100', lambda: [
+            model.Log.search(session, package_id=pkg_id, limit=50)
+            for pkg_id in pkg_ids]),
+        ('AdminAction.search', lambda: model.AdminAction.search(
+            session, status='Awaiting Review', limit=50)),
+        ('Package.search (case insensitive) x100', lambda: [
+            model.Package.search(
+                session, 'rpms', 'PACKAGE-%s' % pkg_id,
+                case_sensitive=False, eol=True)
+            for pkg_id in pkg_ids]),
+    ]
+    output = []
+    for name, query in queries:
+        output.append((name, timeit(query, repeat)))
+        session.rollback()
+    return output
+
+
+def main():
+    ''' Generate the database, time the queries without and with the
+    composite indexes and print the results.
+    '''
+    args = get_arguments()
+
+    if args.db_url.startswith('sqlite:///'):
+        dbfile = args.db_url.split('sqlite:///', 1)[1]
+        if os.path.exists(dbfile):
+            os.unlink(dbfile)
+    else:
+        model.drop_tables(args.db_url, None)
+    session = model.create_tables(args.db_url)
+    engine = session.bind
+
+    print 'Generating %s packages...' % args.packages
+    populate(session, args.packages, args.packagers)
+
+    for name, _, _ in INDEXES:
+        engine.execute('DROP INDEX IF EXISTS "%s"' % name)
+    engine.execute('ANALYZE')
+    before = run_queries(session, args.packages, args.repeat)
+
+    for name, table, columns in INDEXES:
+        engine.execute('CREATE INDEX "%s" ON "%s" (%s)' % (
+            name, table, columns))
+    engine.execute('ANALYZE')
+    after = run_queries(session, args.packages, args.repeat)
+
+    print
+    print '%-40s %12s %12s %8s' % (
+        'query', 'before (ms)', 'after (ms)', 'gain')
+    for (name, time_before), (_, time_after) in zip(before, after):
+        print '%-40s %12.1f %12.1f %7.1fx' % (
+            name, time_before, time_after,
+            time_before / max(time_after, 0.001))
+
+    session.remove()
+    model.drop_tables(args.db_url, engine)
+    return 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+Script timing the rendering of the log message, the email subject and the
+details of a change, as done in ``pkgdb2.lib.utils.log``, with the
+precompiled templates against flattening the entire fedmsg message as it
+used to be done.
+
+The flattening only walks the nested dicts of the message, the package
+listing, its package and its collection, the lists such as the ACLs of
+the package are not walked, so the messages timed are of a fixed size.
+'''
+
+## These two lines are needed to run on EL6
+__requires__ = ['SQLAlchemy >= 0.7', 'jinja2 >= 2.4']
+import pkg_resources
+
+import argparse
+import os
+import time
+
+try:
+    import pkgdb2
+except ImportError:
+    import sys
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+    import pkgdb2
+
+from pkgdb2.lib import utils
+
+
+def get_arguments():
+    ''' Set the command line parser and retrieve the arguments provided
+    by the command line.
+    '''
+    parser = argparse.ArgumentParser(
+        description='Benchmark the log templates of pkgdb2')
+    parser.add_argument(
+        '--iterations', type=int, default=20000,
+        help='Number of messages rendered per run')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='Number of runs, the best time is kept')
+
+    return parser.parse_args()
+
+
+def make_messages():
+    ''' Return a list of (topic, message) looking like the messages sent
+    when updating an ACL and the point of contact of a package, the
+    package listing being the output of ``PackageListing.to_json``.
+    '''
+    collection = {
+        'name': 'Fedora', 'version': 'devel', 'branchname': 'master',
+        'status': 'Under Development', 'koji_name': 'rawhide',
+        'dist_tag': '.fc25', 'allow_retire': False,
+        'date_created': '2016-01-01 00:00:00',
+        'date_updated': '2016-01-01 00:00:00',
+    }
+    package = {
+        'name': 'guake', 'namespace': 'rpms',
+        'summary': 'Top down terminal for GNOME',
+        'description': 'Top down terminal...',
+        'review_url': 'https://bugzilla.redhat.com/450189',
+        'upstream_url': 'http://guake.org', 'status': 'Approved',
+        'monitor': False, 'koschei_monitor': False,
+        'creation_date': 1400070978.0,
+        'acls': [],
+    }
+    listing = {
+        'package': package, 'collection': collection,
+        'point_of_contact': 'pingou', 'status': 'Approved',
+        'critpath': False, 'status_change': 1400070978.0,
+    }
+    return [
+        ('acl.update', {
+            'agent': 'pingou', 'username': 'toshio', 'acl': 'commit',
+            'previous_status': 'Awaiting Review', 'status': 'Approved',
+            'package_name': 'guake', 'package_listing': listing,
+        }),
+        ('owner.update', {
+            'agent': 'pingou', 'username': 'toshio',
+            'previous_owner': 'pingou', 'status': 'Approved',
+            'package_name': 'guake', 'package_listing': listing,
+        }),
+    ]
+
+
+def _flatten(msg):
+    ''' Convert a fedmsg message into a dict of substitutions, the way
+    ``pkgdb2.lib.utils.log`` used to. '''
+    subs = {}
+    for key1 in msg:
+        if isinstance(msg[key1], dict):
+            subs.update(dict([
+                ('.'.join([key1, key2]), val2)
+                for key2, val2 in _flatten(msg[key1]).items()
+            ]))
+        subs[key1] = msg[key1]
+    return subs
+
+
+def render_flattened(topic, message):
+    ''' Render a change by flattening its entire message. '''
+    templates = dict(utils._LOG_TEMPLATES)
+    subject_templates = dict(utils._SUBJECT_TEMPLATES)
+    substitutions = _flatten(message)
+
+    final_msg = templates[topic] % substitutions
+    subject = None
+    if topic in subject_templates:
+        subject = subject_templates[topic] % substitutions
+
+    details = {}
+    for name, paths in utils._DETAILS_PATHS:
+        for path in paths:
+            value = substitutions.get('.'.join(path))
+            if value is not None and not isinstance(value, dict):
+                details[name] = value
+                break
+    return final_msg, subject, details
+
+
+def render_compiled(topic, message):
+    ''' Render a change with the precompiled templates. '''
+    final_msg = utils._LOG_FORMATTERS[topic].format(message)
+    subject = None
+    if topic in utils._SUBJECT_FORMATTERS:
+        subject = utils._SUBJECT_FORMATTERS[topic].format(message)
+    details = utils._construct_details(None, topic, message)
+    return final_msg, subject, details
+
+
+def timeit(function, messages, iterations, repeat):
+    ''' Return the best time, in ms, out of ``repeat`` runs rendering
+    ``iterations`` messages with ``function``.
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        for idx in xrange(iterations):
+            topic, message = messages[idx % len(messages)]
+            function(topic, message)
+        duration = (time.time() - start) * 1000
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def main():
+    ''' Check both ways render the same log messages, time them and print
+    the results.
+    '''
+    args = get_arguments()
+    messages = make_messages()
+
+    for topic, message in messages:
+        flattened = render_flattened(topic, message)
+        compiled = render_compiled(topic, message)
+        if flattened[:2] != compiled[:2]:
+            print 'The renderings of %s differ:\n  %s\n  %s' % (
+                topic, flattened[:2], compiled[:2])
+            return 1
+
+    before = timeit(render_flattened, messages, args.iterations, args.repeat)
+    after = timeit(render_compiled, messages, args.iterations, args.repeat)
+
+    print '%-30s %12s %12s' % ('rendering', 'total (ms)', 'per msg (us)')
+    for name, duration in [('flattened', before), ('compiled', after)]:
+        print '%-30s %12.1f %12.2f' % (
+            name, duration, duration * 1000 / args.iterations)
+    print 'gain: %.1fx' % (before / max(after, 0.001))
+    return 0
+
+
+if __name__ == '__main__':
+    main()
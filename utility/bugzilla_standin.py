@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+Local XML-RPC server standing in for bugzilla, to benchmark the
+``pkgdb-sync-bugzilla`` script without touching the real bugzilla.
+
+It keeps the components in memory, answers the calls the script makes
+after the specified latency and reports the number of requests served per
+second.
+
+Point the script to it with, in the pkgdb2 configuration file:
+
+    PKGDB2_BUGZILLA_URL = 'http://localhost:8123/xmlrpc.cgi'
+
+'''
+
+import argparse
+import collections
+import SimpleXMLRPCServer
+import SocketServer
+import sys
+import threading
+import time
+import xmlrpclib
+
+
+class RequestHandler(SimpleXMLRPCServer.SimpleXMLRPCRequestHandler):
+    ''' Serve the XML-RPC calls at the same path as bugzilla. '''
+    rpc_paths = ('/xmlrpc.cgi',)
+
+    def log_message(self, format, *args):
+        ''' Do not log every request. '''
+        pass
+
+
+class Server(SocketServer.ThreadingMixIn,
+             SimpleXMLRPCServer.SimpleXMLRPCServer):
+    ''' XML-RPC server answering each request in its own thread, as
+    bugzilla answers requests made in parallel. '''
+    daemon_threads = True
+
+
+class Bugzilla(object):
+    ''' In memory stand-in for the bugzilla methods used by the
+    ``pkgdb-sync-bugzilla`` script. '''
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.components = {}
+        self.calls = collections.Counter()
+        self.lock = threading.Lock()
+
+    def _call(self, method):
+        ''' Account for and delay a call to the given method. '''
+        with self.lock:
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def register(self, server):
+        ''' Register the bugzilla methods on the given server. '''
+        for name, function in [
+                ('Bugzilla.extensions', self.extensions),
+                ('Bugzilla.version', self.version),
+                ('User.login', self.login),
+                ('User.logout', self.logout),
+                ('Component.get', self.get_components),
+                ('Component.create', self.create_component),
+                ('Component.update', self.update_component)]:
+            server.register_function(function, name)
+
+    def extensions(self):
+        self._call('Bugzilla.extensions')
+        return {'extensions': {'RedHat': {'version': '0.1'}}}
+
+    def version(self):
+        self._call('Bugzilla.version')
+        return {'version': '4.4.0'}
+
+    def login(self, params):
+        self._call('User.login')
+        return {'id': 1, 'token': '1-standin'}
+
+    def logout(self, params=None):
+        self._call('User.logout')
+        return {}
+
+    def get_components(self, params):
+        self._call('Component.get')
+        components = []
+        for name in params.get('names', []):
+            key = (name['product'], name['component'].lower())
+            if key in self.components:
+                components.append(self.components[key])
+        return {'components': components}
+
+    def create_component(self, params):
+        self._call('Component.create')
+        key = (params['product'], params['component'].lower())
+        if key in self.components:
+            raise xmlrpclib.Fault(
+                1200, 'Component %s already exists' % params['component'])
+        self.components[key] = {
+            'name': params['component'],
+            'description': params['description'],
+            'default_assignee': params['default_assignee'],
+            'default_qa_contact': params.get('default_qa_contact', ''),
+            'default_cc': params.get('default_cc', []),
+        }
+        return {'id': len(self.components)}
+
+    def update_component(self, params):
+        self._call('Component.update')
+        for name in params['names']:
+            key = (name['product'], name['component'].lower())
+            if key not in self.components:
+                raise xmlrpclib.Fault(
+                    105, 'There is no component named %s' % name['component'])
+            self.components[key].update(params['updates'])
+        return {'components': []}
+
+
+def report(bugzilla, interval):
+    ''' Print every `interval` seconds the number of requests served. '''
+    total = 0
+    while True:
+        time.sleep(interval)
+        with bugzilla.lock:
+            calls = dict(bugzilla.calls)
+        current = sum(calls.values())
+        print '%.1f requests/s -- %s' % (
+            float(current - total) / interval,
+            ', '.join('%s: %s' % item for item in sorted(calls.items())))
+        sys.stdout.flush()
+        total = current
+
+
+def main():
+    ''' Parse the arguments and serve the requests. '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--host', default='localhost',
+        help='Address to listen on (default: localhost)')
+    parser.add_argument(
+        '--port', type=int, default=8123,
+        help='Port to listen on (default: 8123)')
+    parser.add_argument(
+        '--latency', type=float, default=0.2,
+        help='Time, in seconds, taken to answer each request '
+        '(default: 0.2)')
+    parser.add_argument(
+        '--interval', type=float, default=5,
+        help='Time, in seconds, between two reports (default: 5)')
+    args = parser.parse_args()
+
+    bugzilla = Bugzilla(latency=args.latency)
+    server = Server(
+        (args.host, args.port), requestHandler=RequestHandler,
+        logRequests=False, allow_none=True)
+    bugzilla.register(server)
+
+    thread = threading.Thread(
+        target=report, args=(bugzilla, args.interval))
+    thread.daemon = True
+    thread.start()
+
+    print 'Serving on http://%s:%s/xmlrpc.cgi' % (args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
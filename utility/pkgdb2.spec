@@ -91,6 +91,15 @@ install -m 644 createdb.py $RPM_BUILD_ROOT/%{_datadir}/pkgdb2/pkgdb2_createdb.py
 # Install the pkgdb2_branch script
 install -m 644 utility/pkgdb2_branch.py $RPM_BUILD_ROOT/%{_datadir}/pkgdb2/pkgdb2_branch.py
 
+# Install the pkgdb2_bugzilla_jobs script
+install -m 644 utility/pkgdb2_bugzilla_jobs.py $RPM_BUILD_ROOT/%{_datadir}/pkgdb2/pkgdb2_bugzilla_jobs.py
+
+# Install the pkgdb2_dispatch_notifications script
+install -m 644 utility/pkgdb2_dispatch_notifications.py $RPM_BUILD_ROOT/%{_datadir}/pkgdb2/pkgdb2_dispatch_notifications.py
+
+# Install the pkgdb2_sync_fas script
+install -m 644 utility/pkgdb2_sync_fas.py $RPM_BUILD_ROOT/%{_datadir}/pkgdb2/pkgdb2_sync_fas.py
+
 # Install the set_monitoring_script
 install -m 644 utility/set_monitoring_status.py $RPM_BUILD_ROOT/%{_datadir}/pkgdb2/set_monitoring_status.py
 
@@ -113,6 +122,9 @@ install -m 644 utility/alembic.ini $RPM_BUILD_ROOT/%{_sysconfdir}/pkgdb2/alembic
 %{python_sitelib}/pkgdb2/
 %{python_sitelib}/%{name}*.egg-info
 %{_bindir}/pkgdb2_branch.py
+%{_bindir}/pkgdb2_bugzilla_jobs.py
+%{_bindir}/pkgdb2_dispatch_notifications.py
+%{_bindir}/pkgdb2_sync_fas.py
 %{_bindir}/update_package_info.py
 %{_bindir}/pkgdb-sync-bugzilla
 
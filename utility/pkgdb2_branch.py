@@ -31,7 +31,10 @@ import pkg_resources
 
 import argparse
 import os
+import sys
+import time
 
+from sqlalchemy import event
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -44,7 +47,6 @@ if 'PKGDB2_CONFIG' not in os.environ \
 try:
     import pkgdb2
 except ImportError:
-    import sys
     sys.path.insert(
         0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
     import pkgdb2
@@ -87,7 +89,7 @@ def get_arguments():
         'new_branch',
         help='Name of the new collection in which to branch `master`')
     parser.add_argument(
-        '--user', dest='user', nargs='+',
+        '--user', dest='user',
         help='FAS username of the user performing the action')
     parser.add_argument(
         '--groups', dest='groups', action='append',
@@ -95,10 +97,93 @@ def get_arguments():
     parser.add_argument(
         '--nomail', dest='nomail', action='store_true', default=False,
         help='Print the repo instead of sending it by email')
+    parser.add_argument(
+        '--chunk-size', dest='chunk_size', type=int, default=1000,
+        help='Number of packages branched, and committed, at once '
+        '(default: 1000)')
+    parser.add_argument(
+        '--dry-run', dest='dry_run', action='store_true', default=False,
+        help='Report the packages that would be branched without '
+        'branching them')
+    parser.add_argument(
+        '--explain', dest='explain', action='store_true', default=False,
+        help='Print the query plans of the statements used to branch one '
+        'chunk of packages, without branching them')
 
     return parser.parse_args()
 
 
+class ProgressBar(object):
+    ''' Text progress bar printed on stderr while branching. '''
+
+    def __init__(self, width=50):
+        self.width = width
+        self.start = time.time()
+
+    def __call__(self, done, total):
+        ''' Update the progress bar.
+
+        :arg done: the number of packages processed so far.
+        :arg total: the number of packages to process.
+
+        '''
+        filled = self.width * done / max(total, 1)
+        elapsed = time.time() - self.start
+        sys.stderr.write('\r[%s%s] %s/%s %.1fs' % (
+            '#' * filled, ' ' * (self.width - filled), done, total, elapsed))
+        if done >= total:
+            sys.stderr.write('\n')
+        sys.stderr.flush()
+
+
+class StopBranching(Exception):
+    ''' Raised to stop branching after the first chunk of packages. '''
+    pass
+
+
+def _stop(done, total):
+    ''' Progress callback stopping the branching after the first chunk.
+    '''
+    raise StopBranching()
+
+
+def explain(session, clt_from, clt_to, user, chunk_size):
+    ''' Branch one chunk of packages without committing it and print the
+    query plan of each statement run to do so.
+    '''
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(
+                ('SELECT', 'INSERT')):
+            statements.append((statement, parameters))
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', _capture)
+    try:
+        pkgdb2.lib.add_branch(
+            session, clt_from=clt_from, clt_to=clt_to, user=user,
+            chunk_size=chunk_size, dry_run=True, progress=_stop,
+        )
+    except StopBranching:
+        pass
+    finally:
+        event.remove(engine, 'before_cursor_execute', _capture)
+
+    prefix = 'EXPLAIN '
+    if engine.dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+
+    cursor = session.connection().connection.cursor()
+    for statement, parameters in statements:
+        print statement.strip()
+        cursor.execute(prefix + statement, parameters)
+        for row in cursor.fetchall():
+            print '    %s' % ' | '.join(str(col) for col in row)
+        print
+    session.rollback()
+
+
 def main():
     ''' Retrieve all the package associated to the collection `devel` and
     branch them into the specified collection.
@@ -112,12 +197,26 @@ def main():
 
     user = FakeFasUser(username=args.user, groups=args.groups)
 
+    if args.explain:
+        try:
+            explain(
+                pkgdb2.SESSION, 'master', args.new_branch, user,
+                args.chunk_size)
+        except pkgdb2.lib.PkgdbException, err:
+            print err
+            return 1
+        return 0
+
+    start = time.time()
     try:
         pkgdblist = pkgdb2.lib.add_branch(
             pkgdb2.SESSION,
             clt_from='master',
             clt_to=args.new_branch,
             user=user,
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            progress=ProgressBar(),
         )
     except pkgdb2.lib.PkgdbException, err:
         print err
@@ -125,10 +224,17 @@ def main():
 
     try:
         pkgdb2.SESSION.commit()
-    except SQLAlchemyError. err:
+    except SQLAlchemyError, err:
         print err
         return 1
 
+    elapsed = time.time() - start
+    failed = len([msg for msg in pkgdblist if msg.startswith('FAILED: ')])
+    # Each failure comes with the error that caused it
+    done = len(pkgdblist) - 2 * failed
+    print '%s packages branched, %s failed, in %.1fs (%.1f packages/s)' % (
+        done, failed, elapsed, done / elapsed if elapsed else 0)
+
     message = 'Nothing happened'
     if pkgdblist:
         message = 'Output from the branching:\n\n%s' % ('\n'.join(pkgdblist))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+Script running the jobs reassigning bugs in bugzilla recorded by pkgdb2
+when `PKGDB2_BUGZILLA_JOBS` is set.
+
+Jobs which fail are retried later, with an increasing delay, see
+`PKGDB2_BUGZILLA_JOBS_MAX_ATTEMPTS` and `PKGDB2_BUGZILLA_JOBS_BACKOFF`.
+Their status can be followed on the admin interface.
+'''
+
+## These two lines are needed to run on EL6
+__requires__ = ['SQLAlchemy >= 0.7', 'jinja2 >= 2.4']
+import pkg_resources
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+
+if 'PKGDB2_CONFIG' not in os.environ \
+        and os.path.exists('/etc/pkgdb2/pkgdb2.cfg'):
+    print 'Using configuration file `/etc/pkgdb2/pkgdb2.cfg`'
+    os.environ['PKGDB2_CONFIG'] = '/etc/pkgdb2/pkgdb2.cfg'
+
+
+try:
+    import pkgdb2
+except ImportError:
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+    import pkgdb2
+
+import pkgdb2.lib
+
+
+def get_arguments():
+    ''' Set the command line parser and retrieve the arguments provided
+    by the command line.
+    '''
+    parser = argparse.ArgumentParser(
+        description='pkgdb2_bugzilla_jobs')
+    parser.add_argument(
+        '--limit', dest='limit', type=int, default=10,
+        help='Number of jobs run between two checks for new jobs '
+        '(default: 10)')
+    parser.add_argument(
+        '--interval', dest='interval', type=float, default=10,
+        help='Number of seconds to wait for new jobs once all the jobs due '
+        'are run (default: 10)')
+    parser.add_argument(
+        '--once', dest='once', action='store_true', default=False,
+        help='Run the jobs due once and exit')
+
+    return parser.parse_args()
+
+
+def main():
+    ''' Run the jobs due, until interrupted unless `--once` is specified.
+    '''
+    # Retrieve arguments
+    args = get_arguments()
+
+    while True:
+        start = time.time()
+        try:
+            output = pkgdb2.lib.run_bugzilla_jobs(
+                pkgdb2.SESSION, limit=args.limit)
+            counts = pkgdb2.lib.count_bugzilla_jobs(pkgdb2.SESSION)
+            pkgdb2.SESSION.commit()
+        except SQLAlchemyError, err:
+            pkgdb2.SESSION.rollback()
+            print err
+            return 1
+
+        if any(output.values()) or args.once:
+            print '%s done, %s retried, %s given up in %.1fs -- ' \
+                'jobs: %s pending, %s failed' % (
+                    output['done'], output['retried'], output['failed'],
+                    time.time() - start, counts['Pending'],
+                    counts['Failed'])
+            sys.stdout.flush()
+
+        if args.once and sum(output.values()) < args.limit:
+            return 0
+        if sum(output.values()) < args.limit:
+            time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        pass
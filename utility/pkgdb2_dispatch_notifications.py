@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+Script sending the notifications queued in the outbox of pkgdb2 when
+`PKGDB2_NOTIFICATION_OUTBOX` is set.
+
+The outbox is drained by batches, each batch being claimed before it is
+sent and committed once sent, so several dispatchers may run at once
+without sending the same notification twice.  A notification is sent at
+least once: if the dispatcher sending it stops before committing, it is
+sent again once its claim expires, see `PKGDB2_OUTBOX_LEASE`.
+Notifications which cannot be sent are retried later, with an increasing
+delay, see `PKGDB2_OUTBOX_MAX_ATTEMPTS` and `PKGDB2_OUTBOX_BACKOFF`.
+The emails are sent over a single connection to the SMTP server and, if
+`PKGDB2_EMAIL_DIGEST_WINDOW` is set, collapsed into one digest per address.
+'''
+
+## These two lines are needed to run on EL6
+__requires__ = ['SQLAlchemy >= 0.7', 'jinja2 >= 2.4']
+import pkg_resources
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+
+if 'PKGDB2_CONFIG' not in os.environ \
+        and os.path.exists('/etc/pkgdb2/pkgdb2.cfg'):
+    print 'Using configuration file `/etc/pkgdb2/pkgdb2.cfg`'
+    os.environ['PKGDB2_CONFIG'] = '/etc/pkgdb2/pkgdb2.cfg'
+
+
+try:
+    import pkgdb2
+except ImportError:
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+    import pkgdb2
+
+import pkgdb2.lib.notifications as notify
+
+
+def get_arguments():
+    ''' Set the command line parser and retrieve the arguments provided
+    by the command line.
+    '''
+    parser = argparse.ArgumentParser(
+        description='pkgdb2_dispatch_notifications')
+    parser.add_argument(
+        '--batch-size', dest='batch_size', type=int, default=100,
+        help='Number of notifications sent, and committed, at once '
+        '(default: 100)')
+    parser.add_argument(
+        '--interval', dest='interval', type=float, default=5,
+        help='Number of seconds to wait for new notifications once the '
+        'outbox is drained (default: 5)')
+    parser.add_argument(
+        '--once', dest='once', action='store_true', default=False,
+        help='Drain the outbox once and exit')
+    parser.add_argument(
+        '--depth', dest='depth', action='store_true', default=False,
+        help='Print the number of notifications in the outbox and exit')
+
+    return parser.parse_args()
+
+
+def drain(session, batch_size):
+    ''' Send the notifications due, batch by batch, and return the number
+    of notifications sent, retried and given up.
+    '''
+    total = {'sent': 0, 'retried': 0, 'failed': 0}
+    while True:
+        output = notify.dispatch_outbox(session, batch_size=batch_size)
+        session.commit()
+        for key in total:
+            total[key] += output[key]
+        if sum(output.values()) < batch_size:
+            return total
+
+
+def main():
+    ''' Send the queued notifications, until interrupted unless `--once`
+    is specified.
+    '''
+    # Retrieve arguments
+    args = get_arguments()
+
+    if args.depth:
+        depth = notify.outbox_depth(pkgdb2.SESSION)
+        print '%(pending)s pending, %(failed)s failed' % depth
+        return 0
+
+    while True:
+        start = time.time()
+        try:
+            total = drain(pkgdb2.SESSION, args.batch_size)
+            depth = notify.outbox_depth(pkgdb2.SESSION)
+            pkgdb2.SESSION.commit()
+        except SQLAlchemyError, err:
+            pkgdb2.SESSION.rollback()
+            print err
+            return 1
+
+        if any(total.values()) or args.once:
+            print '%s sent, %s retried, %s given up in %.1fs -- ' \
+                'outbox: %s pending, %s failed' % (
+                    total['sent'], total['retried'], total['failed'],
+                    time.time() - start, depth['pending'], depth['failed'])
+            sys.stdout.flush()
+
+        if args.once:
+            notify.MAILER.close()
+            return 0
+        if not any(total.values()):
+            # Do not hold the connection to the SMTP server while idle
+            notify.MAILER.close()
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        pass
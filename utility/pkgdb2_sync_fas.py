@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions
+# of the GNU General Public License v.2, or (at your option) any later
+# version.  This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY expressed or implied, including the
+# implied warranties of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.  You
+# should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# Any Red Hat trademarks that are incorporated in the source
+# code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission
+# of Red Hat, Inc.
+#
+
+'''
+Script to run regularly to refresh the local mirror of the accounts of the
+Fedora Account System kept in the `fas_people` table of pkgdb2.
+
+Only the accounts which changed are written.  Rather than all the accounts
+at once, the refresh can be restricted to the usernames matching one or
+more patterns, for example to spread it over several runs.
+'''
+
+## These two lines are needed to run on EL6
+__requires__ = ['SQLAlchemy >= 0.7', 'jinja2 >= 2.4']
+import pkg_resources
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+
+if 'PKGDB2_CONFIG' not in os.environ \
+        and os.path.exists('/etc/pkgdb2/pkgdb2.cfg'):
+    print 'Using configuration file `/etc/pkgdb2/pkgdb2.cfg`'
+    os.environ['PKGDB2_CONFIG'] = '/etc/pkgdb2/pkgdb2.cfg'
+
+
+try:
+    import pkgdb2
+except ImportError:
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+    import pkgdb2
+
+import pkgdb2.lib
+import pkgdb2.lib.utils
+
+
+def get_arguments():
+    ''' Set the command line parser and retrieve the arguments provided
+    by the command line.
+    '''
+    parser = argparse.ArgumentParser(
+        description='pkgdb2_sync_fas')
+    parser.add_argument(
+        'search', nargs='*', default=['*'],
+        help='Patterns, using `*` as wildcard, the usernames of the '
+        'accounts to refresh should match (default: every account)')
+
+    return parser.parse_args()
+
+
+def main():
+    ''' Refresh the accounts matching each of the patterns provided,
+    committing after each of them.
+    '''
+    # Retrieve arguments
+    args = get_arguments()
+
+    try:
+        fas = pkgdb2.lib.utils.get_fas()
+    except pkgdb2.lib.PkgdbException, err:
+        print err
+        return 1
+
+    for search in args.search:
+        start = time.time()
+        try:
+            output = pkgdb2.lib.sync_fas_people(
+                pkgdb2.SESSION, fas, search=search)
+            pkgdb2.SESSION.commit()
+        except SQLAlchemyError, err:
+            pkgdb2.SESSION.rollback()
+            print err
+            return 1
+
+        print '%s: %s added, %s updated, %s removed in %.1fs' % (
+            search, output['added'], output['updated'], output['removed'],
+            time.time() - start)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())